@@ -1,15 +1,17 @@
-from app.services.gemini_service import get_gemini_response
+from typing import AsyncIterator
+from app.core.prompt_builder import PromptSection, build_prompt, json_or_text
+from app.services.gemini_service import (
+    get_gemini_response,
+    stream_gemini_response_async,
+)
 
 
-def generate_final_report(
-    resume_json_string: str, market_brief: str, seniority: str
-) -> str:
-    prompt = f"""
+FINAL_REPORT_PROMPT = """
     You are a world-class AI Career Strategist. Your task is to conduct a detailed analysis of a candidate's resume against a live, up-to-the-minute Market Intelligence Brief. This brief was generated by an advanced AI search engine that synthesizes information from across the web.
 
     **Candidate Seniority Level:** {seniority}
     **Candidate's Structured Resume (JSON):**
-    {resume_json_string}
+    {resume}
     ---
     **LIVE Market Intelligence Brief (from Perplexica AI Search Engine):**
     {market_brief}
@@ -27,4 +29,34 @@ def generate_final_report(
     - Career Growth Roadmap
     - Final Insight Summary
     """
-    return get_gemini_response(prompt)
+
+
+def build_final_report_prompt(
+    resume_json_string: str, market_brief: str, seniority: str
+) -> str:
+    # The resume outranks the brief: when over budget the brief is cut first.
+    return build_prompt(
+        FINAL_REPORT_PROMPT,
+        [
+            PromptSection("seniority", seniority, priority=3),
+            PromptSection("resume", json_or_text(resume_json_string), priority=2, min_tokens=800),
+            PromptSection("market_brief", market_brief, priority=1, min_tokens=500),
+        ],
+        call_site="chief_analyst",
+    )
+
+
+def generate_final_report(
+    resume_json_string: str, market_brief: str, seniority: str
+) -> str:
+    prompt = build_final_report_prompt(resume_json_string, market_brief, seniority)
+    return get_gemini_response(prompt, call_site="chief_analyst")
+
+
+async def stream_final_report(
+    resume_json_string: str, market_brief: str, seniority: str
+) -> AsyncIterator[str]:
+    """Streams the final report as Gemini produces it."""
+    prompt = build_final_report_prompt(resume_json_string, market_brief, seniority)
+    async for chunk in stream_gemini_response_async(prompt, call_site="chief_analyst"):
+        yield chunk
@@ -1,19 +1,44 @@
 import requests
 import os
 import re
+import asyncio
 from urllib.parse import urlparse
 import json
-import cv2  # <--- Import OpenCV
-import numpy as np  # <--- Import NumPy
 import logging
+import httpx
+from app.agents.research_cache import research_cache
+from app.services.resilience import CircuitOpenError, ResiliencePolicy, register_policy
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 # --- CONFIGURATION ---
-PERPLEXICA_URL = "http://localhost:3000"
+PERPLEXICA_URL = os.getenv("PERPLEXICA_URL", "http://localhost:3000")
 SEARXNG_URL = "http://localhost:4000"
+PERPLEXICA_TIMEOUT_SECONDS = float(os.getenv("PERPLEXICA_TIMEOUT_SECONDS", "60"))
+PERPLEXICA_MAX_CONCURRENCY = int(os.getenv("PERPLEXICA_MAX_CONCURRENCY", "4"))
+PERPLEXICA_RETRIES = int(os.getenv("PERPLEXICA_RETRIES", "1"))
+# Each search runs web queries and an LLM on the Perplexica side, so duplicate
+# (hedged) requests are opt-in.
+PERPLEXICA_HEDGE = os.getenv("PERPLEXICA_HEDGE", "false").lower() == "true"
+
+_policy = register_policy(
+    ResiliencePolicy(
+        "perplexica",
+        timeout=PERPLEXICA_TIMEOUT_SECONDS,
+        retries=PERPLEXICA_RETRIES,
+        hedge=PERPLEXICA_HEDGE,
+    )
+)
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "User-Agent": "Direct-Query-Tool/1.0",
+}
+
+# Reused across direct_search calls so connections to Perplexica stay alive.
+_session = requests.Session()
 
 
 def clean_text_for_search_query(text: str) -> str:
@@ -23,6 +48,32 @@ def clean_text_for_search_query(text: str) -> str:
     return cleaned_text
 
 
+def dedupe_queries(queries: List[str]) -> List[str]:
+    """Cleans queries and drops empty ones and case-insensitive repeats, keeping order."""
+    seen = set()
+    unique = []
+    for query in queries:
+        cleaned = clean_text_for_search_query(query)
+        key = cleaned.casefold()
+        if cleaned and key not in seen:
+            seen.add(key)
+            unique.append(cleaned)
+    return unique
+
+
+def _build_payload(user_query: str, focus_mode: str) -> Dict:
+    return {
+        "chatModel": {"provider": "gemini", "name": "gemini-2.0-flash"},
+        "embeddingModel": {"provider": "gemini", "name": "models/text-embedding-004"},
+        "optimizationMode": "balanced",
+        "focusMode": focus_mode,
+        "query": user_query,  # Direct user query
+        "stream": False,
+        # No medical-specific system instructions are added here.
+        "systemInstructions": "You are a helpful AI assistant.",
+    }
+
+
 def direct_search(user_query: str, focus_mode: str = "webSearch") -> Optional[Dict]:
     """
     Executes a user's query directly on Perplexity AI without any modifications.
@@ -38,35 +89,24 @@ def direct_search(user_query: str, focus_mode: str = "webSearch") -> Optional[Di
         f"🚀 Executing direct user query: '{user_query}' with focus '{focus_mode}'"
     )
 
-    # Use the existing _search_perplexica method but without the medical-specific system instructions.
     search_url = f"{PERPLEXICA_URL}/api/search"
+    payload = _build_payload(user_query, focus_mode)
 
-    payload = {
-        "chatModel": {"provider": "gemini", "name": "gemini-2.0-flash"},
-        "embeddingModel": {"provider": "gemini", "name": "models/text-embedding-004"},
-        "optimizationMode": "balanced",
-        "focusMode": focus_mode,
-        "query": user_query,  # Direct user query
-        "stream": False,
-        # No medical-specific system instructions are added here.
-        "systemInstructions": "You are a helpful AI assistant.",
-    }
-
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": "Direct-Query-Tool/1.0",
-    }
+    def post() -> requests.Response:
+        response = _session.post(
+            search_url, json=payload, headers=HEADERS, timeout=PERPLEXICA_TIMEOUT_SECONDS
+        )
+        response.raise_for_status()  # Raise an exception for bad status codes
+        return response
 
     try:
-        response = requests.post(search_url, json=payload, headers=headers, timeout=60)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        result = response.json()
+        result = _policy.call_sync(post).json()
         logger.info(
             f"✅ Direct query successful. AI response length: {len(result.get('message', ''))} chars."
         )
         return result
 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, CircuitOpenError) as e:
         logger.error(f"❌ Direct Perplexica API request failed: {e}")
         return None
     except json.JSONDecodeError as e:
@@ -74,6 +114,142 @@ def direct_search(user_query: str, focus_mode: str = "webSearch") -> Optional[Di
         return None
 
 
+async def _direct_search_async(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    user_query: str,
+    focus_mode: str,
+) -> Optional[Dict]:
+    """Async counterpart of direct_search over a shared client."""
+
+    async def post() -> httpx.Response:
+        async with semaphore:
+            response = await client.post(
+                "/api/search", json=_build_payload(user_query, focus_mode)
+            )
+            response.raise_for_status()
+            return response
+
+    logger.info(f"🚀 Executing batched query: '{user_query}' with focus '{focus_mode}'")
+    try:
+        return (await _policy.call(post)).json()
+    except (httpx.HTTPError, asyncio.TimeoutError, CircuitOpenError) as e:
+        logger.error(f"❌ Perplexica request failed for '{user_query}': {e!r}")
+        return None
+    except json.JSONDecodeError as e:
+        logger.error(f"❌ Failed to parse Perplexica response for '{user_query}': {e}")
+        return None
+
+
+def merge_search_results(queries: List[str], results: List[Optional[Dict]]) -> Dict:
+    """
+    Merges per-query Perplexica answers into one brief.
+
+    Returns {"message", "sources", "queries", "failed_queries"}; sources are
+    de-duplicated by URL and failed queries are listed rather than raised.
+    """
+    sections = []
+    sources = []
+    seen_urls = set()
+    failed = []
+    for query, result in zip(queries, results):
+        if not result or not result.get("message"):
+            failed.append(query)
+            continue
+        sections.append(f"### {query}\n{result['message']}")
+        for source in result.get("sources", []):
+            url = source.get("metadata", {}).get("url")
+            if url and url not in seen_urls:
+                seen_urls.add(url)
+                sources.append(source)
+
+    return {
+        "message": "\n\n".join(sections),
+        "sources": sources,
+        "queries": queries,
+        "failed_queries": failed,
+    }
+
+
+async def batch_search_async(
+    user_queries: List[str],
+    focus_mode: str = "webSearch",
+    max_concurrency: int = PERPLEXICA_MAX_CONCURRENCY,
+    read_cache: bool = True,
+) -> Dict:
+    """
+    Runs several queries against Perplexica concurrently over one pooled client.
+
+    Queries are cleaned and de-duplicated first, then answered from the research
+    cache where possible; stale cached answers are served immediately and
+    refreshed in the background. Failed queries do not fail the batch; they are
+    reported in "failed_queries" of the merged result.
+    """
+    queries = dedupe_queries(user_queries)
+    answers: Dict[str, Optional[Dict]] = {}
+    stale = []
+    if read_cache:
+        for query in queries:
+            cached, is_stale = research_cache.lookup("perplexica", query, focus_mode)
+            if cached is not None:
+                answers[query] = cached
+                if is_stale:
+                    stale.append(query)
+    to_fetch = [query for query in queries if query not in answers]
+    if answers:
+        logger.info(f"♻️ Research cache served {len(answers)}/{len(queries)} queries.")
+
+    if to_fetch:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limits = httpx.Limits(
+            max_connections=max_concurrency, max_keepalive_connections=max_concurrency
+        )
+        async with httpx.AsyncClient(
+            base_url=PERPLEXICA_URL,
+            headers=HEADERS,
+            limits=limits,
+            timeout=PERPLEXICA_TIMEOUT_SECONDS,
+        ) as client:
+            results = await asyncio.gather(
+                *(
+                    _direct_search_async(client, semaphore, query, focus_mode)
+                    for query in to_fetch
+                )
+            )
+        for query, result in zip(to_fetch, results):
+            answers[query] = result
+            if result and result.get("message"):
+                research_cache.store("perplexica", query, result, focus_mode)
+
+    if stale:
+        research_cache.refresh_in_background(
+            ("perplexica", focus_mode, tuple(stale)),
+            batch_search,
+            stale,
+            focus_mode,
+            max_concurrency,
+            False,
+        )
+
+    merged = merge_search_results(queries, [answers[query] for query in queries])
+    logger.info(
+        f"✅ Batch search finished: {len(queries) - len(merged['failed_queries'])}/{len(queries)} queries succeeded."
+    )
+    return merged
+
+
+def batch_search(
+    user_queries: List[str],
+    focus_mode: str = "webSearch",
+    max_concurrency: int = PERPLEXICA_MAX_CONCURRENCY,
+    read_cache: bool = True,
+) -> Dict:
+    """Blocking wrapper around batch_search_async."""
+    return asyncio.run(
+        batch_search_async(user_queries, focus_mode, max_concurrency, read_cache)
+    )
+
+
 # def get_context_from_perplexica(query: str) -> str | None:
 #     """Queries the Perplexica API using Gemini models to get a detailed text answer on a topic."""
 #     print(f"--- Step 1: Querying Perplexica (Gemini) for context on: '{query}' ---")
@@ -138,6 +314,10 @@ def direct_search(user_query: str, focus_mode: str = "webSearch") -> Optional[Di
 #     """
 #     Downloads, VALIDATES, CORRECTS THE COLOR, and saves a single image.
 #     """
+#     # Imported here so that importing this module doesn't load OpenCV/NumPy.
+#     import cv2
+#     import numpy as np
+#
 #     if not os.path.exists(save_folder):
 #         os.makedirs(save_folder)
 #     try:
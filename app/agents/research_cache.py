@@ -0,0 +1,88 @@
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Optional
+from app.core.disk_cache import DiskCache
+
+# Results younger than this are served as-is.
+RESEARCH_CACHE_TTL_SECONDS = float(os.getenv("RESEARCH_CACHE_TTL_SECONDS", str(24 * 3600)))
+# After the TTL, results are still served for this long while a refresh runs
+# in the background (stale-while-revalidate); after that they are dropped.
+RESEARCH_CACHE_STALE_SECONDS = float(
+    os.getenv("RESEARCH_CACHE_STALE_SECONDS", str(7 * 24 * 3600))
+)
+RESEARCH_CACHE_MAX_ENTRIES = int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "20000"))
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "best", "by", "for", "from", "how",
+    "in", "is", "it", "latest", "of", "on", "or", "the", "to", "top", "what",
+    "which", "who", "with",
+}
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a research query: citations and extra whitespace removed,
+    case-folded, punctuation (other than the +#. that matter in tech names) and
+    stopwords dropped, and the remaining terms sorted so word order doesn't matter.
+    """
+    # Imported locally: the researcher modules import this cache at load time.
+    from app.agents.perplexica_researcher import clean_text_for_search_query
+
+    text = clean_text_for_search_query(query).casefold()
+    terms = re.findall(r"[\w+#.]+", text)
+    terms = {term.strip(".") for term in terms} - STOPWORDS - {""}
+    return " ".join(sorted(terms))
+
+
+class ResearchCache:
+    """Persistent, shared cache of market-research results keyed by normalized query."""
+
+    def __init__(self):
+        self._disk = DiskCache("research_cache.sqlite3", max_entries=RESEARCH_CACHE_MAX_ENTRIES)
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(source: str, query: str, focus_mode: str) -> str:
+        return f"{source}:{focus_mode}:{normalize_query(query)}"
+
+    def lookup(self, source: str, query: str, focus_mode: str = "") -> tuple[Optional[Any], bool]:
+        """Returns (result, is_stale); result is None on a miss."""
+        entry = self._disk.get(self._key(source, query, focus_mode))
+        if entry is None:
+            return None, False
+        is_stale = time.time() - entry["fetched_at"] > RESEARCH_CACHE_TTL_SECONDS
+        return entry["result"], is_stale
+
+    def store(self, source: str, query: str, result: Any, focus_mode: str = "") -> None:
+        self._disk.set(
+            self._key(source, query, focus_mode),
+            {"result": result, "fetched_at": time.time()},
+            RESEARCH_CACHE_TTL_SECONDS + RESEARCH_CACHE_STALE_SECONDS,
+        )
+
+    def refresh_in_background(self, refresh_id: tuple, func: Callable, *args) -> None:
+        """
+        Runs `func(*args)` on a daemon thread unless the same refresh is already in
+        flight. `func` is expected to store its own fresh results.
+        """
+        with self._lock:
+            if refresh_id in self._refreshing:
+                return
+            self._refreshing.add(refresh_id)
+
+        def run():
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Research cache: background refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(refresh_id)
+
+        threading.Thread(target=run, name="research-refresh", daemon=True).start()
+
+
+research_cache = ResearchCache()
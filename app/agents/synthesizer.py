@@ -1,12 +1,8 @@
-import json
+from app.core.near_duplicates import dedupe_research_results
+from app.core.prompt_builder import PromptSection, build_prompt
 from app.services.gemini_service import get_gemini_response
 
-
-def create_market_intelligence_brief(web_results: list[dict]) -> str:
-    """Agent 2: Takes raw web search results and synthesizes them into a clean brief."""
-    web_results_string = json.dumps(web_results, indent=2)
-
-    prompt = f"""
+MARKET_BRIEF_PROMPT = """
     You are a Data Synthesizer AI. Your job is to read the following raw web search results and synthesize them into a concise and structured "Market Intelligence Brief" in Markdown format.
     
     Filter out ads, boilerplate, and irrelevant information. Focus on extracting:
@@ -16,8 +12,21 @@ def create_market_intelligence_brief(web_results: list[dict]) -> str:
     - Typical career progression advice or salary benchmarks if available.
 
     **Raw Web Results (JSON):**
-    {web_results_string}
+    {web_results}
     ---
     **Concise Market Intelligence Brief (Markdown):**
     """
-    return get_gemini_response(prompt)
+
+
+def create_market_intelligence_brief(web_results: list[dict]) -> str:
+    """Agent 2: Takes raw web search results and synthesizes them into a clean brief."""
+    # The same posting or article often comes back under several URLs and
+    # queries; each text is sent once, with all of its sources.
+    web_results, _ = dedupe_research_results(web_results)
+    # Over budget, the last (least relevant) results are dropped first.
+    prompt = build_prompt(
+        MARKET_BRIEF_PROMPT,
+        [PromptSection("web_results", web_results)],
+        call_site="synthesizer",
+    )
+    return get_gemini_response(prompt, call_site="synthesizer")
@@ -1,51 +1,240 @@
 import os
-import requests
-from googleapiclient.discovery import build
-from bs4 import BeautifulSoup
+import asyncio
+from collections import defaultdict
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+from urllib.parse import urlparse
+import httpx
+from app.core.html_text import PageTextReader
+from app.agents.research_cache import research_cache
+from app.services.resilience import (
+    RETRYABLE_STATUS_CODES,
+    CircuitOpenError,
+    ResiliencePolicy,
+    LatencyWindow,
+    register_policy,
+)
 
+CUSTOM_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+RESULTS_PER_QUERY = 3
 
-def _get_page_content(url: str) -> str:
+# One connection pool is shared by every search and page fetch in a research run.
+MAX_CONNECTIONS = int(os.getenv("WEB_RESEARCH_MAX_CONNECTIONS", "20"))
+# Be polite to any single site, and don't let one slow host hog the pool.
+PER_HOST_CONCURRENCY = int(os.getenv("WEB_RESEARCH_PER_HOST_CONCURRENCY", "2"))
+PAGE_TIMEOUT_SECONDS = float(os.getenv("WEB_RESEARCH_PAGE_TIMEOUT_SECONDS", "10"))
+RESEARCH_DEADLINE_SECONDS = float(os.getenv("WEB_RESEARCH_DEADLINE_SECONDS", "30"))
+PAGE_MAX_WORDS = 500
+PAGE_MAX_BYTES = int(os.getenv("WEB_RESEARCH_PAGE_MAX_BYTES", str(2 * 1024 * 1024)))
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("WEB_RESEARCH_SEARCH_TIMEOUT_SECONDS", "10"))
+# Page fetches are idempotent GETs, so a fetch slower than the recent p95 of
+# all page fetches gets a hedged duplicate.
+PAGE_HEDGE = os.getenv("WEB_RESEARCH_PAGE_HEDGE", "true").lower() == "true"
+PAGE_ERROR_PREFIX = "Error fetching page"
+
+_search_policy = register_policy(
+    ResiliencePolicy("custom_search", timeout=SEARCH_TIMEOUT_SECONDS, retries=2)
+)
+_page_latency = LatencyWindow()
+
+
+@lru_cache(maxsize=512)
+def _page_policy(host: str) -> ResiliencePolicy:
+    """One policy per site, so a site that is down only fails fast on its own."""
+    return ResiliencePolicy(
+        f"page:{host}",
+        timeout=PAGE_TIMEOUT_SECONDS,
+        retries=1,
+        hedge=PAGE_HEDGE,
+        failure_threshold=3,
+        reset_seconds=60.0,
+        latency=_page_latency,
+    )
+
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+
+async def _read_page_text(client: httpx.AsyncClient, url: str) -> str:
+    """
+    Streams the body through the incremental extractor and hangs up as soon as
+    the word budget or byte cap is reached.
+    """
+    async with client.stream("GET", url) as response:
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            response.raise_for_status()
+        if response.status_code != 200:
+            return ""
+        reader = PageTextReader(
+            response.encoding or "utf-8", PAGE_MAX_WORDS, PAGE_MAX_BYTES
+        )
+        async for chunk in response.aiter_bytes():
+            if reader.feed(chunk):
+                break
+        return reader.text()
+
+
+async def _get_page_content(
+    client: httpx.AsyncClient, url: str, host_limits: dict
+) -> str:
     """Fetches and cleans the text content of a single webpage."""
+    host = urlparse(url).netloc
+
+    async def fetch() -> str:
+        async with host_limits[host]:
+            return await _read_page_text(client, url)
+
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, "html.parser")
-            # Extract text and clean it up
-            for script in soup(["script", "style"]):
-                script.decompose()
-            text = soup.get_text(separator=" ", strip=True)
-            return " ".join(text.split()[:500])  # Return first 500 words
-        return ""
+        # The policy's deadline bounds each whole attempt, including servers
+        # that trickle bytes.
+        return await _page_policy(host).call(fetch)
+    except asyncio.TimeoutError:
+        return f"{PAGE_ERROR_PREFIX}: timed out"
     except Exception as e:
-        return f"Error fetching page: {e}"
+        return f"{PAGE_ERROR_PREFIX}: {e}"
 
 
-def search_the_web(search_queries: list[str]) -> list[dict]:
-    """Agent 1B: Executes web searches and scrapes the top results."""
-    api_key = os.getenv("GOOGLE_API_KEY")
-    search_engine_id = os.getenv("PROGRAMMABLE_SEARCH_ENGINE_ID")
+async def _search(client: httpx.AsyncClient, query: str) -> list[dict]:
+    """Runs one Custom Search query and returns its result items."""
+    print(f"Researcher Agent: Searching for '{query}'...")
+    params = {
+        "key": os.getenv("GOOGLE_API_KEY"),
+        "cx": os.getenv("PROGRAMMABLE_SEARCH_ENGINE_ID"),
+        "q": query,
+        "num": RESULTS_PER_QUERY,
+    }
+
+    async def search() -> httpx.Response:
+        response = await client.get(CUSTOM_SEARCH_URL, params=params)
+        response.raise_for_status()
+        return response
+
+    try:
+        return (await _search_policy.call(search)).json().get("items", [])
+    except (httpx.HTTPError, ValueError, asyncio.TimeoutError, CircuitOpenError) as e:
+        print(f"Researcher Agent: Search failed for '{query}': {e}")
+        return []
+
+
+async def _scrape(
+    client: httpx.AsyncClient, query: str, item: dict, host_limits: dict
+) -> dict:
+    content = await _get_page_content(client, item["link"], host_limits)
+    return {
+        "query": query,
+        "url": item["link"],
+        "title": item["title"],
+        "content_snippet": content,
+    }
+
+
+async def iter_search_results(
+    search_queries: list[str],
+    deadline_seconds: float = RESEARCH_DEADLINE_SECONDS,
+    incomplete: Optional[set] = None,
+) -> AsyncIterator[dict]:
+    """
+    Runs every search concurrently and yields scraped results as they complete.
+
+    Page fetches start as soon as their search returns. Whatever has not finished
+    when the overall deadline passes is cancelled and dropped, and its query is
+    added to `incomplete`.
+    """
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS
+    )
+    host_limits = defaultdict(lambda: asyncio.Semaphore(PER_HOST_CONCURRENCY))
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + deadline_seconds
+
+    async with httpx.AsyncClient(
+        headers=HEADERS,
+        limits=limits,
+        timeout=PAGE_TIMEOUT_SECONDS,
+        follow_redirects=True,
+    ) as client:
+        searches = {
+            asyncio.create_task(_search(client, query)): query
+            for query in search_queries
+        }
+        scrapes = {}
+        pending = set(searches)
+        try:
+            while pending:
+                remaining = deadline_at - loop.time()
+                if remaining <= 0:
+                    print(
+                        f"Researcher Agent: Deadline reached, dropping {len(pending)} unfinished fetches."
+                    )
+                    if incomplete is not None:
+                        incomplete.update(searches.get(t) or scrapes[t] for t in pending)
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task in searches:
+                        query = searches[task]
+                        for item in task.result():
+                            scrape = asyncio.create_task(
+                                _scrape(client, query, item, host_limits)
+                            )
+                            scrapes[scrape] = query
+                            pending.add(scrape)
+                    else:
+                        yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
-    service = build("customsearch", "v1", developerKey=api_key)
+
+async def search_the_web_async(
+    search_queries: list[str], read_cache: bool = True
+) -> list[dict]:
+    """
+    Agent 1B: Executes web searches and scrapes the top results concurrently.
+
+    Each query's scraped results are cached by normalized query, unless a page
+    failed to load or the deadline cut the query short; stale entries are
+    returned immediately and refreshed in the background.
+    """
+    cached_results = {}
+    stale = []
+    if read_cache:
+        for query in search_queries:
+            cached, is_stale = research_cache.lookup("web", query)
+            if cached is not None:
+                cached_results[query] = cached
+                if is_stale:
+                    stale.append(query)
+    to_fetch = [query for query in search_queries if query not in cached_results]
+
+    fetched = defaultdict(list)
+    if to_fetch:
+        incomplete = set()
+        async for result in iter_search_results(to_fetch, incomplete=incomplete):
+            fetched[result["query"]].append(result)
+        for query, results in fetched.items():
+            failed = any(r["content_snippet"].startswith(PAGE_ERROR_PREFIX) for r in results)
+            if query in incomplete or failed:
+                print(f"Researcher Agent: Not caching partial results for '{query}'.")
+                continue
+            research_cache.store("web", query, results)
+
+    if stale:
+        research_cache.refresh_in_background(
+            ("web", tuple(stale)), search_the_web, stale, False
+        )
 
     web_results = []
     for query in search_queries:
-        print(f"Researcher Agent: Searching for '{query}'...")
-        response = (
-            service.cse().list(q=query, cx=search_engine_id, num=3).execute()
-        )  # Get top 3 results
-
-        for item in response.get("items", []):
-            url = item["link"]
-            content = _get_page_content(url)
-            web_results.append(
-                {
-                    "query": query,
-                    "url": url,
-                    "title": item["title"],
-                    "content_snippet": content,
-                }
-            )
+        web_results.extend(cached_results.get(query) or fetched.get(query, []))
     return web_results
+
+
+def search_the_web(search_queries: list[str], read_cache: bool = True) -> list[dict]:
+    """Agent 1B: Executes web searches and scrapes the top results."""
+    return asyncio.run(search_the_web_async(search_queries, read_cache))
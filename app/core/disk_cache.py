@@ -0,0 +1,116 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+CACHE_DIR = os.getenv("CACHE_DIR", "./db/cache")
+
+
+class DiskCache:
+    """
+    A small persistent key/value store on SQLite with per-entry expiry and
+    size-bounded eviction of the least recently used entries.
+
+    Values are stored as JSON, so anything json.dumps can handle round-trips.
+    The database is opened lazily and is safe to share between threads and
+    between worker processes (SQLite does the cross-process locking).
+    """
+
+    def __init__(self, filename: str, max_entries: int = 10_000):
+        self.path = os.path.join(CACHE_DIR, filename)
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_entry(self, key: str) -> Optional[tuple[Any, float]]:
+        """Returns (value, expires_at) even if the entry has expired, or None."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            conn.commit()
+        return json.loads(row[0]), row[1]
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the stored value, or None if it is missing or expired."""
+        entry = self.get_entry(key)
+        if entry is None or entry[1] < time.time():
+            return None
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl_seconds, now),
+            )
+            conn.commit()
+            self._writes_since_evict += 1
+            # Checking the row count on every write is wasteful; amortize it.
+            if self._writes_since_evict >= max(1, self.max_entries // 100):
+                self._writes_since_evict = 0
+                self._evict(conn, now)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drops expired entries, then the least recently used ones over the cap."""
+        conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        overflow = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        overflow -= self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,),
+            )
+        conn.commit()
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Optional
+import numpy as np
+from app.core.disk_cache import CACHE_DIR
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "2048"))
+# Texts sent to the embedding model per call on a cache miss.
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+
+def embedding_key(model_id: str, text: str) -> str:
+    return hashlib.sha256(f"{model_id}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Vectors on SQLite as raw float32 blobs (4 bytes per dimension), looked up
+    many keys at a time. Entries never expire: a key already names the model
+    and the exact text, so a stored vector can't go stale.
+    """
+
+    def __init__(self, filename: str = "embeddings.sqlite3"):
+        self.path = os.path.join(CACHE_DIR, filename)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            # Stay well under SQLite's bound-parameter limit.
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def set_many(self, items: dict[str, np.ndarray]) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()],
+            )
+            conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachingEmbeddingFunction:
+    """
+    Wraps an embedding function (anything called with a list of texts that
+    returns one vector per text) with a memory LRU and a persistent store keyed
+    by model and text hash. Only the misses reach the model, in batches.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[list[str]], list],
+        model_id: str,
+        store: Optional[EmbeddingStore] = None,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        memory_entries: int = EMBEDDING_CACHE_MEMORY_ENTRIES,
+    ):
+        self.embed = embed
+        self.model_id = model_id
+        self.store = store or EmbeddingStore()
+        self.batch_size = batch_size
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def __call__(self, input: list[str]) -> list[np.ndarray]:
+        if not EMBEDDING_CACHE_ENABLED:
+            return [np.asarray(v, dtype=np.float32) for v in self.embed(list(input))]
+
+        keys = [embedding_key(self.model_id, text) for text in input]
+        vectors: dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    vectors[key] = self._memory[key]
+        missing = [key for key in dict.fromkeys(keys) if key not in vectors]
+        if missing:
+            for key, vector in self.store.get_many(missing).items():
+                vectors[key] = vector
+                self._remember(key, vector)
+
+        # Embed each distinct uncached text once, batch by batch.
+        to_embed = {key: text for key, text in zip(keys, input) if key not in vectors}
+        self.hits += len(keys) - len(to_embed)
+        self.misses += len(to_embed)
+        pending = list(to_embed.items())
+        for i in range(0, len(pending), self.batch_size):
+            batch = pending[i : i + self.batch_size]
+            embedded = self.embed([text for _, text in batch])
+            fresh = {
+                key: np.asarray(vector, dtype=np.float32)
+                for (key, _), vector in zip(batch, embedded)
+            }
+            self.store.set_many(fresh)
+            for key, vector in fresh.items():
+                vectors[key] = vector
+                self._remember(key, vector)
+        return [vectors[key] for key in keys]
+
+    def stats(self) -> dict:
+        return {"model": self.model_id, "hits": self.hits, "misses": self.misses}
+
+
+@lru_cache(maxsize=1)
+def get_embedding_function() -> CachingEmbeddingFunction:
+    """
+    The cached embedding function shared by the API and the ingestion script.
+    Wraps Chroma's default model (all-MiniLM-L6-v2), so vectors match what the
+    collection was built with.
+    """
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+    return CachingEmbeddingFunction(
+        DefaultEmbeddingFunction(), model_id="chroma-default-all-MiniLM-L6-v2"
+    )
@@ -0,0 +1,126 @@
+import codecs
+from html.parser import HTMLParser
+from typing import Iterable, Union
+
+DEFAULT_MAX_WORDS = 500
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024
+
+# Elements whose content is never visible article text.
+SKIP_TAGS = {"script", "style", "nav", "noscript", "svg", "template", "iframe"}
+
+
+class StreamingTextExtractor(HTMLParser):
+    """
+    Incremental HTML-to-text extractor.
+
+    Feed it decoded chunks as they arrive; it keeps only visible words, ignores
+    everything inside SKIP_TAGS and sets `done` once `max_words` words have been
+    collected, at which point the caller should stop reading the body.
+    """
+
+    def __init__(self, max_words: int = DEFAULT_MAX_WORDS):
+        super().__init__(convert_charrefs=True)
+        self.max_words = max_words
+        self.words: list[str] = []
+        self.done = False
+        self._skip_depth = 0
+        # HTMLParser flushes pending text at the end of every fed chunk, so a
+        # word can arrive in pieces; its unfinished tail waits here until the
+        # next whitespace, tag or close().
+        self._partial = ""
+
+    def _add_words(self, words: list[str]) -> None:
+        self.words.extend(words)
+        if len(self.words) >= self.max_words:
+            del self.words[self.max_words :]
+            self.done = True
+
+    def _flush_partial(self) -> None:
+        if self._partial and not self.done:
+            self._add_words([self._partial])
+        self._partial = ""
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_partial()
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        self._flush_partial()
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth or self.done:
+            return
+        data = self._partial + data
+        self._partial = ""
+        words = data.split()
+        if words and not data[-1].isspace():
+            self._partial = words.pop()
+        self._add_words(words)
+
+    def close(self):
+        super().close()
+        self._flush_partial()
+
+    def feed_chunk(self, chunk: str) -> bool:
+        """Feeds one chunk of markup; returns True once the word budget is met."""
+        if not self.done:
+            self.feed(chunk)
+        return self.done
+
+    def text(self) -> str:
+        return " ".join(self.words)
+
+
+class PageTextReader:
+    """
+    Byte-level front end for StreamingTextExtractor: decodes raw body chunks
+    incrementally and enforces a download cap alongside the word budget.
+    """
+
+    def __init__(
+        self,
+        encoding: str = "utf-8",
+        max_words: int = DEFAULT_MAX_WORDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        try:
+            decoder_factory = codecs.getincrementaldecoder(encoding)
+        except LookupError:
+            decoder_factory = codecs.getincrementaldecoder("utf-8")
+        self._decoder = decoder_factory(errors="replace")
+        self._extractor = StreamingTextExtractor(max_words)
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        """Feeds raw bytes; returns True when reading should stop."""
+        remaining = self.max_bytes - self.bytes_read
+        chunk = chunk[:remaining]
+        self.bytes_read += len(chunk)
+        done = self._extractor.feed_chunk(self._decoder.decode(chunk))
+        return done or self.bytes_read >= self.max_bytes
+
+    def text(self) -> str:
+        if not self._extractor.done:
+            self._extractor.feed_chunk(self._decoder.decode(b"", final=True))
+            self._extractor.close()
+        return self._extractor.text()
+
+
+def extract_text(
+    chunks: Iterable[Union[bytes, str]],
+    max_words: int = DEFAULT_MAX_WORDS,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    encoding: str = "utf-8",
+) -> str:
+    """Extracts up to `max_words` visible words from an iterable of body chunks."""
+    reader = PageTextReader(encoding, max_words, max_bytes)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode(encoding, errors="replace")
+        if reader.feed(chunk):
+            break
+    return reader.text()
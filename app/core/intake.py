@@ -0,0 +1,228 @@
+import os
+from typing import Literal, Optional
+from pydantic import BaseModel, Field, ValidationError
+from app.core.prompt_builder import PromptSection, build_prompt
+from app.core.resume_structurer import (
+    STRUCTURER_MIN_CONFIDENCE,
+    structure_locally,
+    structure_resume,
+)
+from app.core.seniority import SENIORITY_LEVELS, SENIORITY_MIN_CONFIDENCE, estimate_seniority
+from app.services.gemini_quota import QuotaError
+from app.services.gemini_service import get_gemini_response
+from app.services.resilience import CircuitOpenError
+
+# "auto": one intake call whenever the local structurer or seniority estimate
+# would otherwise need the LLM; "always": intake for every resume; "off": the
+# separate parser / seniority / profiler calls.
+INTAKE_MODE = os.getenv("INTAKE_MODE", "auto").lower()
+# Bump when the prompt, schema or models change what an intake produces.
+INTAKE_VERSION = "1"
+
+INTAKE_PROMPT = """
+    You are an expert resume analyst. Read the resume text below and return ONE JSON object with:
+    - "structured_resume": the resume as structured data. Use empty strings or lists for anything that is not present; group skills by category (e.g. "languages", "frameworks", "tools").
+    - "seniority": the candidate's level, one of Intern, Entry-Level, Mid-Level, Senior. Intern: still studying with no work experience; Entry-Level: 0-2 years; Mid-Level: 2-7 years; Senior: 7+ years with progressive titles.
+    - "primary_field": the candidate's primary professional field, e.g. "Data Science".
+    - "key_skills": the candidate's 5-7 most important skills.
+    - "search_queries": 5-7 highly specific web search queries to find the latest job market trends, in-demand skills, typical responsibilities, and salary or career path information for this candidate.
+
+    **Resume Text:**
+    ---
+    {resume_text}
+    ---
+    """
+
+_STRING = {"type": "string"}
+_STRINGS = {"type": "array", "items": _STRING}
+
+
+def _object(properties: dict, required: Optional[list[str]] = None) -> dict:
+    return {"type": "object", "properties": properties, "required": required or list(properties)}
+
+
+# Gemini's structured-output schema (an OpenAPI subset: no $ref, so it is
+# written out rather than generated from the models below).
+INTAKE_SCHEMA = _object(
+    {
+        "structured_resume": _object(
+            {
+                "personal_info": _object(
+                    {k: _STRING for k in ("name", "email", "phone", "linkedin", "github")},
+                    required=["name"],
+                ),
+                "summary": _STRING,
+                "skills": {
+                    "type": "array",
+                    "items": _object({"category": _STRING, "skills": _STRINGS}),
+                },
+                "work_experience": {
+                    "type": "array",
+                    "items": _object(
+                        {
+                            "title": _STRING,
+                            "company": _STRING,
+                            "start_date": _STRING,
+                            "end_date": _STRING,
+                            "description": _STRINGS,
+                        }
+                    ),
+                },
+                "education": {
+                    "type": "array",
+                    "items": _object(
+                        {
+                            "degree": _STRING,
+                            "institution": _STRING,
+                            "start_date": _STRING,
+                            "end_date": _STRING,
+                            "details": _STRINGS,
+                        }
+                    ),
+                },
+                "projects": {
+                    "type": "array",
+                    "items": _object(
+                        {"name": _STRING, "description": _STRINGS, "technologies": _STRINGS}
+                    ),
+                },
+            }
+        ),
+        "seniority": {"type": "string", "enum": SENIORITY_LEVELS},
+        "primary_field": _STRING,
+        "key_skills": _STRINGS,
+        "search_queries": _STRINGS,
+    }
+)
+
+
+class PersonalInfo(BaseModel):
+    name: str = ""
+    email: str = ""
+    phone: str = ""
+    linkedin: str = ""
+    github: str = ""
+
+
+class SkillGroup(BaseModel):
+    category: str = "other"
+    skills: list[str] = []
+
+
+class WorkExperience(BaseModel):
+    title: str = ""
+    company: str = ""
+    start_date: str = ""
+    end_date: str = ""
+    description: list[str] = []
+
+
+class Education(BaseModel):
+    degree: str = ""
+    institution: str = ""
+    start_date: str = ""
+    end_date: str = ""
+    details: list[str] = []
+
+
+class Project(BaseModel):
+    name: str = ""
+    description: list[str] = []
+    technologies: list[str] = []
+
+
+class StructuredResume(BaseModel):
+    personal_info: PersonalInfo = PersonalInfo()
+    summary: str = ""
+    skills: list[SkillGroup] = []
+    work_experience: list[WorkExperience] = []
+    education: list[Education] = []
+    projects: list[Project] = []
+
+
+class Intake(BaseModel):
+    """Everything the analysis needs before research, from one LLM call."""
+
+    structured_resume: StructuredResume
+    seniority: Literal["Intern", "Entry-Level", "Mid-Level", "Senior"]
+    primary_field: str = Field(min_length=1)
+    key_skills: list[str] = []
+    search_queries: list[str] = Field(min_length=1)
+
+    def resume_dict(self) -> dict:
+        """The structured resume in the parser's schema (skills keyed by category)."""
+        resume = self.structured_resume.model_dump()
+        skills: dict[str, list[str]] = {}
+        for group in self.structured_resume.skills:
+            if group.skills:
+                skills.setdefault(group.category or "other", []).extend(group.skills)
+        resume["skills"] = skills
+        return resume
+
+    def search_brief(self) -> dict:
+        """The profiler's output."""
+        return {"primary_field": self.primary_field, "search_queries": self.search_queries}
+
+
+class IntakeError(ValueError):
+    """Raised when the intake response is missing or does not match the schema."""
+
+
+def run_intake(resume_text: str) -> Intake:
+    prompt = build_prompt(
+        INTAKE_PROMPT, [PromptSection("resume_text", resume_text)], call_site="intake"
+    )
+    try:
+        response = get_gemini_response(
+            prompt,
+            call_site="intake",
+            generation_config={
+                "response_mime_type": "application/json",
+                "response_schema": INTAKE_SCHEMA,
+            },
+        )
+    except (CircuitOpenError, QuotaError):
+        # The fallback would need Gemini too; let the endpoint answer 503 now.
+        raise
+    except Exception as e:
+        raise IntakeError(f"Intake call failed: {e}") from e
+    try:
+        return Intake.model_validate_json(
+            response.strip().removeprefix("```json").removesuffix("```")
+        )
+    except ValidationError as e:
+        raise IntakeError(f"Invalid intake response: {e.error_count()} errors") from e
+
+
+def structure_with_intake(
+    resume_text: str, pdf_bytes: Optional[bytes] = None
+) -> tuple[dict, Optional[Intake]]:
+    """
+    Returns (structured resume, intake). In "auto" mode a resume the local
+    rules structure fully, with an unambiguous seniority, needs no intake
+    (None); otherwise a single intake call replaces the parser, seniority and
+    profiler calls. Falls back to structure_resume if the intake fails.
+    """
+    confidence = None
+    if INTAKE_MODE == "auto":
+        result, confidence, unfilled = structure_locally(resume_text, pdf_bytes)
+        if (
+            confidence >= STRUCTURER_MIN_CONFIDENCE
+            and not unfilled
+            and estimate_seniority(result)["confidence"] >= SENIORITY_MIN_CONFIDENCE
+        ):
+            result["parser"] = {"method": "rules", "confidence": confidence}
+            return result, None
+
+    try:
+        intake = run_intake(resume_text)
+    except IntakeError as e:
+        print(f"Intake: {e}; falling back to separate calls.")
+        return structure_resume(resume_text, pdf_bytes), None
+    print(
+        f"Intake: {intake.seniority} {intake.primary_field} candidate, "
+        f"{len(intake.search_queries)} search queries."
+    )
+    structured = intake.resume_dict()
+    structured["parser"] = {"method": "intake", "confidence": confidence}
+    return structured, intake
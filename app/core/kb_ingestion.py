@@ -0,0 +1,255 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+from app.core.embedding_cache import get_embedding_function
+from app.core.knowledge_base import get_collection
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+INGEST_EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", "4"))
+# Documents longer than this are split into chunks of about this many words,
+# on sentence boundaries, with a little overlap so no sentence loses its context.
+CHUNK_MAX_WORDS = int(os.getenv("KB_CHUNK_MAX_WORDS", "200"))
+CHUNK_OVERLAP_WORDS = int(os.getenv("KB_CHUNK_OVERLAP_WORDS", "30"))
+DEFAULT_METADATA = {"type": "document", "field": "General"}
+TEXT_EXTENSIONS = (".txt", ".md")
+
+
+def content_id(content: str, metadata: dict) -> str:
+    """Stable ID from the text and its metadata: same input, same ID, every run."""
+    payload = json.dumps(
+        {"content": " ".join(content.split()), "metadata": metadata}, sort_keys=True
+    )
+    return "kb-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def chunk_text(
+    text: str, max_words: int = CHUNK_MAX_WORDS, overlap_words: int = CHUNK_OVERLAP_WORDS
+) -> list[str]:
+    words = text.split()
+    if len(words) <= max_words:
+        return [" ".join(words)] if words else []
+
+    # Sentences, with any run-on sentence longer than a chunk hard-split.
+    pieces = []
+    for sentence in re.split(r"(?<=[.!?])\s+", " ".join(words)):
+        sentence_words = sentence.split()
+        pieces += [
+            sentence_words[i : i + max_words] for i in range(0, len(sentence_words), max_words)
+        ]
+
+    chunks: list[str] = []
+    current: list[str] = []
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_words:
+            chunks.append(" ".join(current))
+            overlap = current[-overlap_words:] if overlap_words else []
+            current = overlap[max(0, len(overlap) + len(piece) - max_words) :]
+        current += piece
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _clean_metadata(metadata: dict) -> dict:
+    """Chroma only stores scalar metadata values; anything else is JSON-encoded."""
+    clean = {}
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        clean[key] = value if isinstance(value, (str, int, float, bool)) else json.dumps(value)
+    return clean
+
+
+def iter_records(items: Iterable[dict], source: str = "inline") -> Iterator[dict]:
+    """Normalizes {"content", "metadata"} records (e.g. data/market_trends.py)."""
+    for item in items:
+        content = item.get("content") or item.get("document") or ""
+        if not content.strip():
+            continue
+        metadata = {**DEFAULT_METADATA, **(item.get("metadata") or {})}
+        metadata.setdefault("source", item.get("source") or source)
+        yield {"content": content, "metadata": metadata}
+
+
+def iter_jsonl(path: str) -> Iterator[dict]:
+    """Streams records from a JSONL file, one line at a time."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                print(f"Ingestion: skipping {path}:{line_number}: {e}")
+                continue
+            yield from iter_records([item], source=os.path.basename(path))
+
+
+def iter_directory(path: str) -> Iterator[dict]:
+    """
+    Streams every *.jsonl file (one record per line) and every .txt/.md file
+    (one document each, "General" metadata) under `path`.
+    """
+    for file_path in sorted(glob.glob(os.path.join(path, "**", "*"), recursive=True)):
+        if file_path.endswith(".jsonl"):
+            yield from iter_jsonl(file_path)
+        elif file_path.endswith(TEXT_EXTENSIONS):
+            with open(file_path, encoding="utf-8") as f:
+                content = f.read()
+            source = os.path.relpath(file_path, path)
+            yield from iter_records([{"content": content, "source": source}], source=source)
+
+
+def iter_source(path: str) -> Iterator[dict]:
+    """A JSONL file or a directory of them (and text files)."""
+    if os.path.isdir(path):
+        return iter_directory(path)
+    return iter_jsonl(path)
+
+
+def iter_chunks(records: Iterable[dict]) -> Iterator[dict]:
+    """Splits each record into chunks and gives every chunk its content-hash ID."""
+    for record in records:
+        chunks = chunk_text(record["content"])
+        for index, chunk in enumerate(chunks):
+            metadata = dict(record["metadata"])
+            if len(chunks) > 1:
+                metadata["chunk"] = index
+            metadata = _clean_metadata(metadata)
+            yield {"id": content_id(chunk, metadata), "content": chunk, "metadata": metadata}
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest(
+    records: Iterable[dict],
+    batch_size: int = INGEST_BATCH_SIZE,
+    workers: int = INGEST_EMBED_WORKERS,
+    replace_sources: bool = False,
+) -> dict:
+    """
+    Streams records into the knowledge base in fixed-size batches. Chunks whose
+    content-hash ID is already stored are skipped without being embedded; new
+    ones are embedded on `workers` threads while the next batch is being diffed,
+    and written in order.
+
+    With `replace_sources`, stored chunks of every source seen in this run that
+    were not produced again (i.e. the source changed) are deleted afterwards,
+    so re-ingesting an edited file replaces it instead of adding to it.
+    """
+    started = time.perf_counter()
+    collection = get_collection()
+    embed = get_embedding_function()
+    stats = {"chunks": 0, "unchanged": 0, "added": 0, "deleted": 0}
+    submitted: set[str] = set()
+    seen_by_source: dict[str, set[str]] = {}
+    in_flight: deque[tuple[list[dict], Future]] = deque()
+
+    def write(batch: list[dict], embeddings: Future) -> None:
+        collection.upsert(
+            ids=[chunk["id"] for chunk in batch],
+            documents=[chunk["content"] for chunk in batch],
+            metadatas=[chunk["metadata"] for chunk in batch],
+            embeddings=embeddings.result(),
+        )
+        stats["added"] += len(batch)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kb-embed") as pool:
+        for batch in _batched(iter_chunks(records), batch_size):
+            stats["chunks"] += len(batch)
+            if replace_sources:
+                for chunk in batch:
+                    source = chunk["metadata"].get("source", "")
+                    seen_by_source.setdefault(source, set()).add(chunk["id"])
+            batch = list({chunk["id"]: chunk for chunk in batch}.values())
+            stored = set(collection.get(ids=[chunk["id"] for chunk in batch], include=[])["ids"])
+            fresh = [
+                chunk for chunk in batch
+                if chunk["id"] not in stored and chunk["id"] not in submitted
+            ]
+            stats["unchanged"] += len(batch) - len(fresh)
+            if fresh:
+                submitted.update(chunk["id"] for chunk in fresh)
+                in_flight.append(
+                    (fresh, pool.submit(embed, [chunk["content"] for chunk in fresh]))
+                )
+            while len(in_flight) > workers:
+                write(*in_flight.popleft())
+        while in_flight:
+            write(*in_flight.popleft())
+
+    for source, ids in seen_by_source.items():
+        if not source:
+            continue
+        stored = collection.get(where={"source": source}, include=[])["ids"]
+        stale = [doc_id for doc_id in stored if doc_id not in ids]
+        if stale:
+            collection.delete(ids=stale)
+            stats["deleted"] += len(stale)
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    print(f"Ingestion: {stats}")
+    return stats
+
+
+def delete_documents(ids: Optional[list[str]] = None, source: Optional[str] = None) -> int:
+    """Deletes documents by ID and/or every chunk of a source; returns the count."""
+    collection = get_collection()
+    targets = list(ids or [])
+    if source:
+        targets += collection.get(where={"source": source}, include=[])["ids"]
+    if targets:
+        collection.delete(ids=targets)
+    return len(targets)
+
+
+def compact(page_size: int = 1000) -> int:
+    """
+    Removes stored documents whose text and field/type duplicate another one
+    (e.g. rows written under the old timestamp IDs), keeping the content-hash
+    ID where there is one. Returns the number of documents deleted.
+    """
+    collection = get_collection()
+    keep: dict[str, str] = {}
+    duplicates: list[str] = []
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            break
+        for doc_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+            metadata = metadata or {}
+            key = hashlib.sha256(
+                json.dumps(
+                    [" ".join((document or "").split()), metadata.get("field"), metadata.get("type")]
+                ).encode("utf-8")
+            ).hexdigest()
+            kept = keep.get(key)
+            if kept is None:
+                keep[key] = doc_id
+            elif doc_id.startswith("kb-") and not kept.startswith("kb-"):
+                duplicates.append(kept)
+                keep[key] = doc_id
+            else:
+                duplicates.append(doc_id)
+        offset += len(page["ids"])
+
+    for batch in _batched(duplicates, page_size):
+        collection.delete(ids=batch)
+    print(f"Compaction: removed {len(duplicates)} duplicate documents.")
+    return len(duplicates)
@@ -1,32 +1,177 @@
-import chromadb
+import os
+import threading
+from typing import Optional
+from app.core.embedding_cache import get_embedding_function
 
-client = chromadb.PersistentClient(path="./db")
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./db")
+COLLECTION_NAME = "resume_insights_knowledge_base"
+# "chroma" queries the Chroma collection; "numpy" queries an in-process,
+# memory-mapped snapshot of it (app/core/vector_index.py).
+KB_BACKEND = os.getenv("KB_BACKEND", "chroma")
+
+# Opened on first use (or by the startup warm-up), not at import: importing
+# chromadb and opening the persistent client is the slowest part of startup.
+_collection = None
+_collection_lock = threading.Lock()
+
+# Documents tagged with this field apply to every field and are kept by field filters.
+GENERAL_FIELD = "General"
+
+
+def get_collection():
+    """Returns the shared Chroma collection, opening the client on first call."""
+    global _collection
+    if _collection is None:
+        with _collection_lock:
+            if _collection is None:
+                import chromadb
+
+                client = chromadb.PersistentClient(path=CHROMA_PATH)
+                _collection = client.get_or_create_collection(COLLECTION_NAME)
+    return _collection
 
-collection = client.get_or_create_collection("resume_insights_knowledge_base")
 
 def initialize_knowledge_base():
-    """Loads the INITIAL data into the ChromaDB collection if it's empty."""
+    """
+    Loads the seed data into the ChromaDB collection. Safe to run on every
+    start: documents are keyed by content hash, so only new or changed seed
+    documents are embedded and written, chunks of seed documents that were
+    edited or removed are deleted, and so are rows stored under the seed
+    data's original IDs ("skill-1", ...) by earlier versions.
+    """
     from data.market_trends import knowledge_base_data  # Import it locally
+    from app.core.kb_ingestion import ingest, iter_records
 
-    if collection.count() == 0:
-        print("Initializing Knowledge Base for the first time...")
-        documents = [item["content"] for item in knowledge_base_data]
-        metadata = [item["metadata"] for item in knowledge_base_data]
-        ids = [item["id"] for item in knowledge_base_data]
-        collection.add(documents=documents, metadatas=metadata, ids=ids)
-        print("Knowledge Base Initialized.")
-    else:
-        print("Knowledge Base already contains data. Skipping initialization.")
+    collection = get_collection()
+    legacy_ids = [item["id"] for item in knowledge_base_data if item.get("id")]
+    legacy = collection.get(ids=legacy_ids, include=[])["ids"] if legacy_ids else []
+    if legacy:
+        collection.delete(ids=legacy)
+        print(f"Knowledge base: removed {len(legacy)} documents stored under legacy seed IDs.")
 
+    stats = ingest(
+        iter_records(knowledge_base_data, source="market_trends"), replace_sources=True
+    )
+    stats["deleted"] += len(legacy)
+    if KB_BACKEND == "numpy":
+        from app.core.vector_index import get_vector_index, snapshot_collection
 
-def query_knowledge_base(query_text: str, n_results: int = 5) -> list[str]:
-    """Queries the knowledge base to find relevant context."""
+        if stats["added"] or stats["deleted"] or get_vector_index() is None:
+            snapshot_collection(get_collection())
+        get_vector_index()
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def build_where_filter(
+    fields: Optional[list[str]] = None,
+    types: Optional[list[str]] = None,
+    include_general: bool = True,
+) -> Optional[dict]:
+    """Builds a Chroma `where` clause restricting metadata "field" and "type"."""
+    clauses = []
+    if fields:
+        fields = list(fields) + ([GENERAL_FIELD] if include_general else [])
+        clauses.append({"field": {"$in": sorted(set(fields))}})
+    if types:
+        clauses.append({"type": {"$in": sorted(set(types))}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _query_vector_index(
+    query_embeddings: list,
+    n_results: int,
+    fields: list[str],
+    types: list[str],
+    seniority: Optional[str],
+    include_general: bool,
+) -> dict:
+    """Searches the in-process snapshot and returns results shaped like Chroma's."""
+    from app.core.vector_index import get_vector_index, reading_vector_index, snapshot_collection
+
+    if get_vector_index() is None:
+        snapshot_collection(get_collection())
+    if fields and include_general:
+        fields = fields + [GENERAL_FIELD]
+    results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+    with reading_vector_index() as index:
+        for hits in index.search(query_embeddings, n_results, fields, types, seniority):
+            records = [index.record(row) for row, _ in hits]
+            results["ids"].append([record[0] for record in records])
+            results["documents"].append([record[1] for record in records])
+            results["metadatas"].append([record[2] for record in records])
+            results["distances"].append([distance for _, distance in hits])
+    return results
+
+
+def retrieve(
+    queries: list[str],
+    n_results: int = 5,
+    field=None,
+    doc_type=None,
+    seniority: Optional[str] = None,
+    include_general: bool = True,
+) -> list[dict]:
+    """
+    Runs several queries in one round trip against the documents matching the
+    field/type filters (each may be a string or a list) and returns the best
+    `n_results` distinct documents as {"id", "document", "metadata", "score"},
+    highest score first.
+
+    Documents may carry an optional "seniority" metadata value; when `seniority`
+    is given, documents tagged for a different level are dropped (untagged ones
+    apply to every level). Chroma can't express "missing or equal" in `where`,
+    so for that backend it is filtered here after over-fetching; the numpy
+    backend (KB_BACKEND=numpy) applies it as a mask.
+    """
+    queries = [query for query in dict.fromkeys(queries) if query and query.strip()]
+    if not queries:
+        return []
+    fields = _as_list(field)
+    types = _as_list(doc_type)
     try:
-        results = collection.query(query_texts=[query_text], n_results=n_results)
-        if not results["documents"]:
-            return []
-        return results["documents"][0]
+        query_embeddings = get_embedding_function()(queries)
+        if KB_BACKEND == "numpy":
+            results = _query_vector_index(
+                query_embeddings, n_results, fields, types, seniority, include_general
+            )
+        else:
+            results = get_collection().query(
+                query_embeddings=query_embeddings,
+                n_results=n_results * 2 if seniority else n_results,
+                where=build_where_filter(fields, types, include_general),
+                include=["documents", "metadatas", "distances"],
+            )
     except Exception as e:
         print(f"Error querying knowledge base: {e}")
-        # Return empty list as fallback
         return []
+
+    best: dict[str, dict] = {}
+    for ids, documents, metadatas, distances in zip(
+        results["ids"], results["documents"], results["metadatas"], results["distances"]
+    ):
+        for doc_id, document, metadata, distance in zip(ids, documents, metadatas, distances):
+            metadata = metadata or {}
+            level = metadata.get("seniority")
+            if seniority and level and level != seniority:
+                continue
+            score = 1.0 / (1.0 + distance)
+            if doc_id not in best or score > best[doc_id]["score"]:
+                best[doc_id] = {
+                    "id": doc_id,
+                    "document": document,
+                    "metadata": metadata,
+                    "score": round(score, 4),
+                }
+    return sorted(best.values(), key=lambda hit: hit["score"], reverse=True)[:n_results]
+
+
+def query_knowledge_base(query_text: str, n_results: int = 5) -> list[str]:
+    """Queries the knowledge base to find relevant context."""
+    return [hit["document"] for hit in retrieve([query_text], n_results=n_results)]
@@ -0,0 +1,129 @@
+import os
+import re
+import zlib
+from collections import defaultdict
+from typing import Optional
+import numpy as np
+
+# Estimated Jaccard similarity of word shingles above which two snippets are
+# treated as the same text (e.g. one job posting syndicated to several boards).
+DEDUPE_THRESHOLD = float(os.getenv("RESEARCH_DEDUPE_THRESHOLD", "0.7"))
+SHINGLE_WORDS = 5
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs start being compared at a similarity of about
+# (1/16) ** (1/8) ~= 0.71, in line with the threshold.
+LSH_BANDS = 16
+ERROR_PREFIX = "Error fetching page"
+
+_WORD_RE = re.compile(r"\w+")
+_rng = np.random.default_rng(20240601)
+# Multiply-shift hashing: (a * x + b) mod 2**64, keeping the top 32 bits.
+_PERM_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> np.ndarray:
+    """Hashes of the overlapping `size`-word windows of the lower-cased text."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = [" ".join(words[i : i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), np.uint64))
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """NUM_PERM-value MinHash signature, or None for text without words."""
+    hashes = shingles(text)
+    if not hashes.size:
+        return None
+    with np.errstate(over="ignore"):
+        permuted = (hashes[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+    return permuted.min(axis=0)
+
+
+def _find(parent: list[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def cluster_near_duplicates(
+    texts: list[str], threshold: float = DEDUPE_THRESHOLD
+) -> list[list[int]]:
+    """
+    Groups indexes of texts whose estimated Jaccard similarity is at least
+    `threshold`. Only pairs sharing an LSH band are compared. Texts without
+    words are left out; clusters are in order of their first member.
+    """
+    signatures = {i: minhash(text) for i, text in enumerate(texts)}
+    signatures = {i: sig for i, sig in signatures.items() if sig is not None}
+    parent = list(range(len(texts)))
+    rows = NUM_PERM // LSH_BANDS
+
+    buckets = defaultdict(list)
+    for i, signature in signatures.items():
+        for band in range(LSH_BANDS):
+            buckets[(band, signature[band * rows : (band + 1) * rows].tobytes())].append(i)
+
+    compared = set()
+    for members in buckets.values():
+        for a_pos, a in enumerate(members):
+            for b in members[a_pos + 1 :]:
+                if (a, b) in compared:
+                    continue
+                compared.add((a, b))
+                similarity = float(np.mean(signatures[a] == signatures[b]))
+                if similarity >= threshold:
+                    root_a, root_b = _find(parent, a), _find(parent, b)
+                    if root_a != root_b:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = defaultdict(list)
+    for i in signatures:
+        clusters[_find(parent, i)].append(i)
+    return [clusters[root] for root in sorted(clusters)]
+
+
+def dedupe_research_results(
+    results: list[dict],
+    text_key: str = "content_snippet",
+    threshold: float = DEDUPE_THRESHOLD,
+) -> tuple[list[dict], dict]:
+    """
+    Collapses scraped results whose text is a near-duplicate of another's and
+    drops empty or failed fetches. Each cluster keeps its longest text, at the
+    position of its highest-ranked member, with every member's URL under
+    "urls" and query under "queries". Returns (results, stats).
+    """
+    texts = []
+    for result in results:
+        text = (result.get(text_key) or "").strip()
+        texts.append("" if text.startswith(ERROR_PREFIX) else text)
+
+    deduped = []
+    for members in cluster_near_duplicates(texts, threshold):
+        keeper = max(members, key=lambda i: len(texts[i]))
+        merged = dict(results[keeper])
+        for key, merged_key in (("url", "urls"), ("query", "queries")):
+            values = (results[i].get(key) for i in members)
+            merged[merged_key] = list(dict.fromkeys(value for value in values if value))
+            merged.pop(key, None)
+        deduped.append(merged)
+
+    empty = sum(1 for text in texts if not _WORD_RE.search(text))
+    total_words = sum(len(text.split()) for text in texts)
+    stats = {
+        "results": len(results),
+        "kept": len(deduped),
+        "empty": empty,
+        "near_duplicates": len(results) - len(deduped) - empty,
+        "words_removed": total_words - sum(len(r[text_key].split()) for r in deduped),
+    }
+    print(
+        f"Dedupe: {stats['results']} results -> {stats['kept']} "
+        f"({stats['near_duplicates']} near-duplicates, {stats['empty']} empty; "
+        f"{stats['words_removed']} of {total_words} words removed)."
+    )
+    return deduped, stats
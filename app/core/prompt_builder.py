@@ -0,0 +1,225 @@
+import copy
+import json
+import os
+import re
+from typing import Any, Optional
+
+# Per-call-site prompt budgets in (estimated) tokens. Override any of them with
+# PROMPT_TOKEN_BUDGETS="chief_analyst=4000,synthesizer=3000".
+PROMPT_TOKEN_BUDGETS = {
+    "chief_analyst": 6000,
+    "rag_analysis": 6000,
+    "synthesizer": 6000,
+    "resume_parser": 8000,
+    "intake": 8000,
+    "profiler": 3000,
+    "rag_pre_analysis": 3000,
+    "seniority": 2000,
+    "cover_letter": 5000,
+    "resume_summary": 4000,
+}
+
+
+def parse_budgets(spec: str) -> dict[str, int]:
+    """Parses "site=tokens,..."; malformed entries are skipped with a warning."""
+    budgets = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        site, _, budget = entry.partition("=")
+        try:
+            value = int(budget)
+        except ValueError:
+            value = 0
+        if not site.strip() or value <= 0:
+            print(f"Prompt budgets: ignoring invalid PROMPT_TOKEN_BUDGETS entry '{entry.strip()}'.")
+            continue
+        budgets[site.strip()] = value
+    return budgets
+
+
+PROMPT_TOKEN_BUDGETS.update(parse_budgets(os.getenv("PROMPT_TOKEN_BUDGETS", "")))
+PROMPT_DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_DEFAULT_TOKEN_BUDGET", "8000"))
+TRUNCATION_MARKER = " …[truncated]"
+
+# Counting tokens with Gemini's own tokenizer is an API round trip, so prompts
+# are measured locally: words in pieces of up to four characters plus every
+# punctuation mark, which tracks (and slightly overestimates) subword tokenizers.
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text))
+
+
+def prune_empty(value: Any) -> Any:
+    """Drops None, empty strings, lists and dicts at every level (0 and False stay)."""
+    if isinstance(value, dict):
+        pruned = {key: prune_empty(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        pruned = [prune_empty(item) for item in value]
+        return [item for item in pruned if item not in (None, "", [], {})]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def compact_json(value: Any) -> str:
+    """Serializes without indentation or empty fields, for embedding in prompts."""
+    return json.dumps(prune_empty(value), separators=(",", ":"), ensure_ascii=False)
+
+
+def json_or_text(value: str) -> Any:
+    """Parses a JSON string so it can be shrunk structurally; other text is returned as is."""
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cuts text to `max_tokens`, at a word boundary where there is one."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep = max_tokens - count_tokens(TRUNCATION_MARKER)
+    if keep <= 0:
+        return ""
+    for count, match in enumerate(_TOKEN_RE.finditer(text), start=1):
+        if count > keep:
+            cut = text[: match.start()]
+            boundary = max(cut.rfind(" "), cut.rfind("\n"))
+            if boundary > 0:
+                cut = cut[:boundary]
+            return cut.rstrip() + TRUNCATION_MARKER
+    return text
+
+
+def _largest(value: Any, kind: type) -> Optional[tuple[Any, Any]]:
+    """(container, key) of the largest list with 2+ items, or string, inside `value`."""
+    best, best_size = None, 0
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        children = node.items() if isinstance(node, dict) else enumerate(node)
+        for key, child in children:
+            if isinstance(child, (dict, list)):
+                stack.append(child)
+            if isinstance(child, kind) and (kind is str or len(child) > 1):
+                size = len(json.dumps(child, ensure_ascii=False))
+                if size > best_size:
+                    best, best_size = (node, key), size
+    return best
+
+
+def shrink_json(value: Any, max_tokens: int) -> str:
+    """
+    Compact JSON for `value` within `max_tokens`: the last items of the largest
+    lists go first, then the longest strings are shortened, so what is left is
+    still valid JSON with every section represented.
+    """
+    value = prune_empty(copy.deepcopy(value))
+    text = compact_json(value)
+    while count_tokens(text) > max_tokens and isinstance(value, (dict, list)):
+        target = _largest(value, list)
+        if target is not None:
+            container, key = target
+            container[key].pop()
+        else:
+            target = _largest(value, str)
+            if target is None:
+                break
+            container, key = target
+            string = container[key]
+            if len(string) < 40:
+                break
+            container[key] = string[: len(string) // 2].rstrip() + TRUNCATION_MARKER
+        text = compact_json(value)
+    if count_tokens(text) > max_tokens:
+        text = truncate_text(text, max_tokens)
+    return text
+
+
+class PromptSection:
+    """
+    One variable part of a prompt. `content` is text, a list of text items
+    (e.g. retrieved documents, joined by `separator`) or any JSON value.
+    When the prompt is over budget, sections with the lowest `priority` are
+    cut first, but never below `min_tokens`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        content: Any,
+        priority: int = 0,
+        min_tokens: int = 0,
+        separator: str = "\n---\n",
+    ):
+        self.name = name
+        self.content = content
+        self.priority = priority
+        self.min_tokens = min_tokens
+        self.separator = separator
+
+    def _is_items(self) -> bool:
+        return isinstance(self.content, list) and all(
+            isinstance(item, str) for item in self.content
+        )
+
+    def render(self, max_tokens: Optional[int] = None) -> str:
+        if isinstance(self.content, str):
+            text = self.content.strip()
+            return text if max_tokens is None else truncate_text(text, max_tokens)
+        if self._is_items():
+            items = [item.strip() for item in self.content if item and item.strip()]
+            if max_tokens is None:
+                return self.separator.join(items)
+            kept, used = [], 0
+            separator_tokens = count_tokens(self.separator)
+            for item in items:
+                cost = count_tokens(item) + (separator_tokens if kept else 0)
+                if used + cost > max_tokens:
+                    if not kept:
+                        kept.append(truncate_text(item, max_tokens))
+                    break
+                kept.append(item)
+                used += cost
+            return self.separator.join(kept)
+        if max_tokens is None:
+            return compact_json(self.content)
+        return shrink_json(self.content, max_tokens)
+
+
+def build_prompt(
+    template: str,
+    sections: list[PromptSection],
+    call_site: str = "default",
+    budget: Optional[int] = None,
+) -> str:
+    """
+    Fills `template`'s {placeholders} with the sections, cutting the
+    lowest-priority sections first until the prompt fits the call site's token
+    budget, and logs the resulting token count.
+    """
+    if budget is None:
+        budget = PROMPT_TOKEN_BUDGETS.get(call_site, PROMPT_DEFAULT_TOKEN_BUDGET)
+    rendered = {section.name: section.render() for section in sections}
+    needed = {name: count_tokens(text) for name, text in rendered.items()}
+    fixed = count_tokens(template.format(**{section.name: "" for section in sections}))
+
+    overflow = fixed + sum(needed.values()) - budget
+    truncated = []
+    for section in sorted(sections, key=lambda s: s.priority):
+        if overflow <= 0:
+            break
+        cut = min(overflow, max(0, needed[section.name] - section.min_tokens))
+        if cut:
+            rendered[section.name] = section.render(needed[section.name] - cut)
+            truncated.append(f"{section.name} {needed[section.name]}->{needed[section.name] - cut}")
+            overflow -= cut
+
+    prompt = template.format(**rendered)
+    note = f"; truncated {', '.join(truncated)}" if truncated else ""
+    print(f"Prompt [{call_site}]: {count_tokens(prompt)} tokens (budget {budget}){note}.")
+    return prompt
@@ -1,93 +1,57 @@
-from app.core.knowledge_base import query_knowledge_base
+import os
+from typing import Optional
+from app.core.knowledge_base import retrieve
+from app.core.prompt_builder import PromptSection, build_prompt, json_or_text
+from app.core.seniority import get_candidate_seniority
+from app.core.skill_taxonomy import build_retrieval_query, get_skill_taxonomy
 from app.services.gemini_service import get_gemini_response
 
+# The retrieval query is built by the local skill taxonomy; set this to use an
+# LLM round trip for the pre-analysis instead.
+RAG_LLM_PRE_ANALYSIS = os.getenv("RAG_LLM_PRE_ANALYSIS", "false").lower() == "true"
 
-def _pre_analyze_resume(resume_text: str) -> str:
-    """
-    A quick pre-analysis step to identify the core field and skills of the candidate.
-    This focused summary will be used to retrieve more relevant context from the knowledge base.
-    """
-    prompt = f"""
+PRE_ANALYSIS_PROMPT = """
     Analyze the following resume text and identify the candidate's primary field/domain and list their top 5-7 key skills.
     Your output should be a single, concise string formatted like this: "Field: [Identified Field]. Skills: [Skill1, Skill2, Skill3]".
 
     Resume Text:
-    {resume_text}
+    {resume}
 
     Analysis:
     """
-    return get_gemini_response(prompt)
-
-
-def build_detailed_prompt(resume_json_string: str, context_documents: list[str]) -> str:
-    """
-    Builds the comprehensive prompt for the LLM using a structured resume.
-    """
-    context = "\n---\n".join(context_documents)
 
-    prompt = f"""
+DETAILED_ANALYSIS_PROMPT = """
     You are a world-class AI Resume Insight Assistant. Your task is to conduct a detailed analysis of a candidate's resume, provided as a structured JSON object, and generate actionable feedback.
     You MUST use the "Market & ATS Context" provided below.
 
+    **Candidate Seniority Level:** {seniority}
     **Market & ATS Context:**
     {context}
     ---
     **Candidate's Structured Resume (JSON):**
-    {resume_json_string}
+    {resume}
     ---
     **INSTRUCTIONS:**
     Based on the structured resume and the context, generate a professional report in Markdown using EXACTLY the following sections:
     Identified Field, Key Skills, Skill Gaps / Missing Keywords, ATS Optimization Tips, Suitable Job Roles, Upskilling Recommendations, Career Growth Roadmap, Final Insight Summary.
     """
-    return prompt
-
-
-def analyze_resume(resume_json_string: str) -> str:
-    # Step 1: Determine Seniority
-    seniority = _get_candidate_seniority(resume_json_string)
-
-    # Step 2: Perform Pre-analysis for retrieval (can even include seniority for a better query)
-    pre_analysis_summary = (
-        _pre_analyze_resume(resume_json_string) + f" Seniority: {seniority}"
-    )
-
-    # Step 3: Retrieve context
-    retrieved_context = query_knowledge_base(pre_analysis_summary, n_results=5)
-
-    # Step 4: Augment the main prompt WITH the seniority level
-    prompt = build_detailed_prompt(resume_json_string, retrieved_context, seniority)
 
-    # Step 5: Generate the final analysis
-    final_analysis = get_gemini_response(prompt)
-    return final_analysis
-
-
-def _pre_analyze_for_job_match(resume_text: str, job_description: str) -> str:
-    """A quick pre-analysis to extract key terms from both resume and JD for targeted retrieval."""
-    prompt = f"""
+JOB_MATCH_PRE_ANALYSIS_PROMPT = """
     Analyze the resume and the job description. Extract the primary field, 5-7 key skills from the resume, 
     and 5-7 key requirements from the job description.
     Format your output as a single, concise string: 
     "Field: [Identified Field]. Resume Skills: [Skill1, Skill2]. Job Requirements: [Req1, Req2]".
 
     Resume Text:
-    {resume_text}
+    {resume}
 
     Job Description:
     {job_description}
 
     Analysis:
     """
-    return get_gemini_response(prompt)
-
-
-def build_job_match_prompt(
-    resume_json_string: str, job_description: str, context_documents: list[str]
-) -> str:
-    """Builds the comprehensive prompt for a detailed resume-to-job-description analysis from a structured resume."""
-    context = "\n---\n".join(context_documents)
 
-    prompt = f"""
+JOB_MATCH_PROMPT = """
     You are an expert AI Talent Acquisition Specialist. Your task is to perform a detailed gap analysis between a candidate's resume (provided as a JSON object) and a specific job description.
     You MUST use the "Market Context" to inform your analysis.
 
@@ -95,7 +59,7 @@ def build_job_match_prompt(
     {context}
     ---
     **Candidate's Structured Resume (JSON):**
-    {resume_json_string}
+    {resume}
     ---
     **Job Description:**
     {job_description}
@@ -104,7 +68,115 @@ def build_job_match_prompt(
     Provide a detailed, structured analysis in Markdown. Use EXACTLY the following format:
     Overall Match Score, Key Strengths & Matches, Critical Gaps & Mismatches, Resume Tailoring Suggestions.
     """
-    return prompt
+
+
+def _pre_analyze_resume(resume_text: str) -> str:
+    """
+    A quick pre-analysis step to identify the core field and skills of the candidate.
+    This focused summary will be used to retrieve more relevant context from the knowledge base.
+    """
+    if not RAG_LLM_PRE_ANALYSIS:
+        return build_retrieval_query(resume_text)
+    prompt = build_prompt(
+        PRE_ANALYSIS_PROMPT,
+        [PromptSection("resume", json_or_text(resume_text))],
+        call_site="rag_pre_analysis",
+    )
+    try:
+        return get_gemini_response(prompt, call_site="rag_pre_analysis")
+    except Exception:
+        return build_retrieval_query(resume_text)
+
+
+def _retrieve_context(
+    queries: list[str], text: str, seniority: Optional[str] = None, n_results: int = 5
+) -> list[str]:
+    """
+    One retrieval round trip for all queries, limited to the documents for the
+    field detected in `text` (plus general ones). Falls back to the whole
+    collection when the field has no documents.
+    """
+    field = get_skill_taxonomy().match(text)["field"]
+    hits = retrieve(queries, n_results=n_results, field=field, seniority=seniority)
+    if not hits and field:
+        hits = retrieve(queries, n_results=n_results, seniority=seniority)
+    return [hit["document"] for hit in hits]
+
+
+def build_detailed_prompt(
+    resume_json_string: str, context_documents: list[str], seniority: Optional[str] = None
+) -> str:
+    """
+    Builds the comprehensive prompt for the LLM using a structured resume.
+    Retrieved documents arrive best-first, so the tail of the context is what
+    gets dropped when the prompt is over budget.
+    """
+    return build_prompt(
+        DETAILED_ANALYSIS_PROMPT,
+        [
+            PromptSection("seniority", seniority or "Not determined", priority=3),
+            PromptSection("resume", json_or_text(resume_json_string), priority=2, min_tokens=800),
+            PromptSection("context", context_documents, priority=1),
+        ],
+        call_site="rag_analysis",
+    )
+
+
+def analyze_resume(resume_json_string: str) -> str:
+    # Step 1: Determine Seniority
+    seniority = get_candidate_seniority(resume_json_string)
+
+    # Step 2: Perform Pre-analysis for retrieval (can even include seniority for a better query)
+    pre_analysis_summary = (
+        _pre_analyze_resume(resume_json_string) + f" Seniority: {seniority}"
+    )
+
+    # Step 3: Retrieve context (skills, plus career-path documents for the level)
+    retrieved_context = _retrieve_context(
+        [pre_analysis_summary, f"Career roadmap and growth for a {seniority} candidate"],
+        resume_json_string,
+        seniority,
+    )
+
+    # Step 4: Augment the main prompt WITH the seniority level
+    prompt = build_detailed_prompt(resume_json_string, retrieved_context, seniority)
+
+    # Step 5: Generate the final analysis
+    final_analysis = get_gemini_response(prompt, call_site="rag_analysis")
+    return final_analysis
+
+
+def _pre_analyze_for_job_match(resume_text: str, job_description: str) -> str:
+    """A quick pre-analysis to extract key terms from both resume and JD for targeted retrieval."""
+    if not RAG_LLM_PRE_ANALYSIS:
+        return build_retrieval_query(resume_text, job_description)
+    prompt = build_prompt(
+        JOB_MATCH_PRE_ANALYSIS_PROMPT,
+        [
+            PromptSection("resume", json_or_text(resume_text), priority=1),
+            PromptSection("job_description", job_description, priority=2, min_tokens=300),
+        ],
+        call_site="rag_pre_analysis",
+    )
+    try:
+        return get_gemini_response(prompt, call_site="rag_pre_analysis")
+    except Exception:
+        return build_retrieval_query(resume_text, job_description)
+
+
+def build_job_match_prompt(
+    resume_json_string: str, job_description: str, context_documents: list[str]
+) -> str:
+    """Builds the comprehensive prompt for a detailed resume-to-job-description analysis from a structured resume."""
+    return build_prompt(
+        JOB_MATCH_PROMPT,
+        [
+            PromptSection("job_description", job_description, priority=3, min_tokens=500),
+            PromptSection("resume", json_or_text(resume_json_string), priority=2, min_tokens=800),
+            PromptSection("context", context_documents, priority=1),
+        ],
+        call_site="rag_analysis",
+    )
 
 
 def analyze_resume_for_job(resume_text: str, job_description: str) -> str:
@@ -113,34 +185,14 @@ def analyze_resume_for_job(resume_text: str, job_description: str) -> str:
     pre_analysis_summary = _pre_analyze_for_job_match(resume_text, job_description)
 
     # 2. Retrieve relevant context
-    retrieved_context = query_knowledge_base(pre_analysis_summary, n_results=5)
+    retrieved_context = _retrieve_context(
+        [pre_analysis_summary], resume_text + "\n" + job_description
+    )
 
     # 3. Augment with the detailed job-matching prompt
     prompt = build_job_match_prompt(resume_text, job_description, retrieved_context)
 
     # 4. Generate the final analysis
-    analysis = get_gemini_response(prompt)
+    analysis = get_gemini_response(prompt, call_site="rag_analysis")
 
     return analysis
-
-
-def _get_candidate_seniority(resume_json_string: str) -> str:
-    """
-    Analyzes the resume to determine the candidate's experience level.
-    Returns one of: 'Intern', 'Entry-Level', 'Mid-Level', 'Senior'.
-    """
-    prompt = f"""
-    Analyze the "work_experience" and "education" sections of the following structured resume. 
-    Based on the total years of experience, job titles, and graduation dates, classify the candidate's seniority level.
-
-    - If there is no work experience and the candidate is still in university, classify as 'Intern'.
-    - If there is 0-2 years of experience and a recent graduation date, classify as 'Entry-Level'.
-    - If there are 2-7 years of relevant experience, classify as 'Mid-Level'.
-    - If there are 7+ years of experience with progressive titles, classify as 'Senior'.
-
-    Return ONLY ONE of the following keywords: Intern, Entry-Level, Mid-Level, Senior.
-
-    **Structured Resume (JSON):**
-    {resume_json_string}
-    """
-    return get_gemini_response(prompt).strip()
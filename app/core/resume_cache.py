@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import os
+import re
+from typing import Optional
+from app.core.intake import INTAKE_MODE, INTAKE_VERSION, Intake, structure_with_intake
+from app.core.disk_cache import DiskCache
+from app.core.resume_parser import (
+    PARSER_VERSION,
+    TEXT_EXTRACTOR_VERSION,
+    parse_pdf_to_text,
+    parse_pdf_to_text_async,
+    preprocess_text,
+)
+from app.core.resume_structurer import STRUCTURER_VERSION, structure_resume
+
+RESUME_CACHE_TTL_SECONDS = float(os.getenv("RESUME_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+RESUME_CACHE_MAX_ENTRIES = int(os.getenv("RESUME_CACHE_MAX_ENTRIES", "50000"))
+
+# Two independent tables: uploaded bytes -> extracted text, and normalized text
+# -> structured JSON. A re-exported PDF with identical text still hits the
+# second table, which is the one that saves the LLM call.
+_text_cache = DiskCache("resume_text.sqlite3", max_entries=RESUME_CACHE_MAX_ENTRIES)
+_json_cache = DiskCache("resume_json.sqlite3", max_entries=RESUME_CACHE_MAX_ENTRIES)
+
+
+def fingerprint_pdf(pdf_bytes: bytes) -> str:
+    """SHA-256 of the raw uploaded bytes."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def normalize_resume_text(text: str) -> str:
+    """Collapses whitespace so trivially different extractions share a key."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def fingerprint_text(text: str) -> str:
+    """SHA-256 of the normalized resume text."""
+    return hashlib.sha256(normalize_resume_text(text).encode("utf-8")).hexdigest()
+
+
+def get_or_extract_text(pdf_bytes: bytes) -> str:
+    """Returns the preprocessed resume text, extracting it only on a cache miss."""
+    key = f"{TEXT_EXTRACTOR_VERSION}:{fingerprint_pdf(pdf_bytes)}"
+    cached = _text_cache.get(key)
+    if cached is not None:
+        print("Resume cache: text hit.")
+        return cached
+
+    processed_text = preprocess_text(parse_pdf_to_text(pdf_bytes))
+    if processed_text:
+        _text_cache.set(key, processed_text, RESUME_CACHE_TTL_SECONDS)
+    return processed_text
+
+
+async def get_or_extract_text_async(pdf_bytes: bytes) -> str:
+    """Like get_or_extract_text, but extracts in the PDF process pool."""
+    key = f"{TEXT_EXTRACTOR_VERSION}:{fingerprint_pdf(pdf_bytes)}"
+    cached = await asyncio.to_thread(_text_cache.get, key)
+    if cached is not None:
+        return cached
+
+    processed_text = preprocess_text(await parse_pdf_to_text_async(pdf_bytes))
+    if processed_text:
+        await asyncio.to_thread(
+            _text_cache.set, key, processed_text, RESUME_CACHE_TTL_SECONDS
+        )
+    return processed_text
+
+
+def get_or_structure_resume(resume_text: str, pdf_bytes: Optional[bytes] = None) -> dict:
+    """
+    Returns the structured resume, running the structurer only on a cache miss.
+    `pdf_bytes`, when given, lets the structurer use the PDF's font layout.
+    """
+    key = f"{PARSER_VERSION}:{STRUCTURER_VERSION}:{fingerprint_text(resume_text)}"
+    cached = _json_cache.get(key)
+    if cached is not None:
+        print("Resume cache: structured resume hit.")
+        return cached
+
+    structured_resume = structure_resume(resume_text, pdf_bytes)
+    if "error" not in structured_resume:
+        _json_cache.set(key, structured_resume, RESUME_CACHE_TTL_SECONDS)
+    return structured_resume
+
+
+def get_or_run_intake(
+    resume_text: str, pdf_bytes: Optional[bytes] = None
+) -> tuple[dict, Optional[Intake]]:
+    """
+    Returns (structured resume, intake or None), cached like
+    get_or_structure_resume. With INTAKE_MODE=off this is just
+    get_or_structure_resume.
+    """
+    if INTAKE_MODE == "off":
+        return get_or_structure_resume(resume_text, pdf_bytes), None
+    key = (
+        f"intake:{INTAKE_VERSION}:{PARSER_VERSION}:{STRUCTURER_VERSION}:"
+        f"{fingerprint_text(resume_text)}"
+    )
+    cached = _json_cache.get(key)
+    if cached is not None:
+        print("Resume cache: intake hit.")
+        intake = Intake.model_validate(cached["intake"]) if cached["intake"] else None
+        return cached["structured_resume"], intake
+
+    structured_resume, intake = structure_with_intake(resume_text, pdf_bytes)
+    if "error" not in structured_resume:
+        _json_cache.set(
+            key,
+            {
+                "structured_resume": structured_resume,
+                "intake": intake.model_dump() if intake else None,
+            },
+            RESUME_CACHE_TTL_SECONDS,
+        )
+    return structured_resume, intake
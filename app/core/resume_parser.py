@@ -1,7 +1,83 @@
-import fitz
+import os
 import re
 import json
-from app.services.gemini_service import get_gemini_response
+import hashlib
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from app.core.prompt_builder import PromptSection, build_prompt
+from app.services.gemini_service import get_gemini_response, GEMINI_MODEL_NAME
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 2)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "30"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Documents longer than this are split into chunks of this many pages and
+# extracted on several pool workers at once.
+PAGES_PER_CHUNK = int(os.getenv("PDF_PAGES_PER_CHUNK", "4"))
+
+# Bump when parse_pdf_to_text or preprocess_text change what they produce.
+TEXT_EXTRACTOR_VERSION = "1"
+
+RESUME_PARSER_PROMPT = """
+    You are an expert resume parsing AI. Your task is to extract information from the following resume text and convert it into a structured JSON object.
+    
+    The JSON object should have the following keys: "personal_info", "summary", "skills", "work_experience", "education", "projects".
+    - "work_experience", "education", and "projects" should be lists of objects.
+    - If a section is not present in the resume, its value should be an empty list or an empty string.
+    - For skills, categorize them if possible (e.g., "languages", "frameworks", "tools").
+
+    **Resume Text:**
+    ---
+    {resume_text}
+    ---
+
+    **JSON Output:**
+    """
+
+RESUME_FIELDS_PROMPT = """
+    You are an expert resume parsing AI. Extract ONLY the following sections from the resume text below and return them as a JSON object with exactly these keys: {fields}.
+    - "work_experience", "education", and "projects" should be lists of objects.
+    - If a section is not present in the resume, its value should be an empty list or an empty string.
+    - For skills, categorize them if possible (e.g., "languages", "frameworks", "tools").
+
+    **Resume Text:**
+    ---
+    {resume_text}
+    ---
+
+    **JSON Output:**
+    """
+
+# Derived from the prompt and model, so any change to either invalidates
+# previously cached structured resumes.
+PARSER_VERSION = hashlib.sha256(
+    (RESUME_PARSER_PROMPT + RESUME_FIELDS_PROMPT + GEMINI_MODEL_NAME).encode("utf-8")
+).hexdigest()[:12]
+
+
+class PDFLimitError(ValueError):
+    """Raised when an uploaded PDF exceeds the configured size or page limits."""
+
+
+def _extract_pages(file_bytes: bytes, start: int, stop: int) -> tuple[str, int]:
+    """
+    Extracts the text of pages [start, stop) and returns it with the document's
+    total page count. The document is always closed before returning.
+    """
+    import fitz  # PyMuPDF, loaded on first use (normally in a pool worker)
+
+    # Open the PDF from bytes in memory
+    with fitz.open(stream=file_bytes, filetype="pdf") as pdf_document:
+        page_count = len(pdf_document)
+        if page_count > MAX_PDF_PAGES:
+            raise PDFLimitError(
+                f"PDF has {page_count} pages; the limit is {MAX_PDF_PAGES}."
+            )
+        # Join once at the end instead of growing a string page by page.
+        pages = [
+            pdf_document.load_page(page_num).get_text()
+            for page_num in range(start, min(stop, page_count))
+        ]
+    return "".join(page + "\n" for page in pages), page_count  # Page separators
 
 
 def parse_pdf_to_text(file_bytes: bytes) -> str:
@@ -9,19 +85,64 @@ def parse_pdf_to_text(file_bytes: bytes) -> str:
     Extracts raw text content from a PDF file provided as bytes.
     """
     try:
-        # Open the PDF from bytes in memory
-        pdf_document = fitz.open(stream=file_bytes, filetype="pdf")
+        raw_text, _ = _extract_pages(file_bytes, 0, MAX_PDF_PAGES)
+        return raw_text
+    except PDFLimitError:
+        raise
+    except Exception as e:
+        print(f"Error parsing PDF: {e}")
+        return ""
 
-        raw_text = ""
-        # Iterate through each page and extract text
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            raw_text += page.get_text() + "\n"  # Add a separator between pages
 
-        return raw_text
+_pdf_executor = None
+
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Process pool for CPU-bound PDF extraction, created on first use."""
+    global _pdf_executor
+    if _pdf_executor is None:
+        _pdf_executor = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _pdf_executor
+
+
+def _load_pdf_library() -> None:
+    import fitz  # noqa: F401
+
+
+def warm_up_pdf_pool() -> None:
+    """Starts the pool's worker processes and loads PyMuPDF in each of them."""
+    executor = get_pdf_executor()
+    for future in [executor.submit(_load_pdf_library) for _ in range(PDF_WORKERS)]:
+        future.result()
+
+
+async def parse_pdf_to_text_async(file_bytes: bytes) -> str:
+    """
+    Extracts PDF text in the process pool, off the event loop. The first chunk
+    of pages also reports the page count; longer documents have their remaining
+    pages extracted in parallel chunks.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_pdf_executor()
+    try:
+        first_chunk, page_count = await loop.run_in_executor(
+            executor, _extract_pages, file_bytes, 0, PAGES_PER_CHUNK
+        )
+        rest = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    executor, _extract_pages, file_bytes, start, start + PAGES_PER_CHUNK
+                )
+                for start in range(PAGES_PER_CHUNK, page_count, PAGES_PER_CHUNK)
+            )
+        )
+    except PDFLimitError:
+        raise
     except Exception as e:
         print(f"Error parsing PDF: {e}")
         return ""
+    return first_chunk + "".join(text for text, _ in rest)
+
 
 def preprocess_text(text: str) -> str:
     """
@@ -57,24 +178,38 @@ def parse_text_to_json(resume_text: str) -> dict:
     """
     Uses an LLM to parse raw resume text into a structured JSON object.
     """
-    prompt = f"""
-    You are an expert resume parsing AI. Your task is to extract information from the following resume text and convert it into a structured JSON object.
-    
-    The JSON object should have the following keys: "personal_info", "summary", "skills", "work_experience", "education", "projects".
-    - "work_experience", "education", and "projects" should be lists of objects.
-    - If a section is not present in the resume, its value should be an empty list or an empty string.
-    - For skills, categorize them if possible (e.g., "languages", "frameworks", "tools").
+    prompt = build_prompt(
+        RESUME_PARSER_PROMPT,
+        [PromptSection("resume_text", resume_text)],
+        call_site="resume_parser",
+    )
 
-    **Resume Text:**
-    ---
-    {resume_text}
-    ---
+    response_text = get_gemini_response(prompt, call_site="resume_parser")
+    return _decode_llm_json(response_text, resume_text)
 
-    **JSON Output:**
+
+def parse_fields_to_json(resume_text: str, fields: list[str]) -> dict:
+    """
+    Uses an LLM to extract only the given top-level resume fields, for when the
+    local structurer filled everything else. The rules' result is usable
+    without them, so a failed call returns an error instead of raising.
     """
+    prompt = build_prompt(
+        RESUME_FIELDS_PROMPT,
+        [
+            PromptSection("fields", ", ".join(f'"{field}"' for field in fields), priority=1),
+            PromptSection("resume_text", resume_text),
+        ],
+        call_site="resume_parser",
+    )
+    try:
+        response_text = get_gemini_response(prompt, call_site="resume_parser")
+    except Exception as e:
+        return {"error": f"LLM field extraction failed: {e}"}
+    return _decode_llm_json(response_text, resume_text)
 
-    response_text = get_gemini_response(prompt)
 
+def _decode_llm_json(response_text: str, resume_text: str) -> dict:
     try:
         # The LLM might return the JSON wrapped in markdown ```json ... ```, so we clean it.
         cleaned_json_string = re.sub(
@@ -0,0 +1,394 @@
+import os
+import re
+import statistics
+from typing import Optional
+from app.core.resume_parser import parse_text_to_json, parse_fields_to_json
+from app.core.skill_taxonomy import get_skill_taxonomy
+
+# Bump when the rules below change what they produce (invalidates cached results).
+STRUCTURER_VERSION = "3"
+# Below this the local result is discarded and the whole resume goes to the LLM.
+STRUCTURER_MIN_CONFIDENCE = float(os.getenv("STRUCTURER_MIN_CONFIDENCE", "0.6"))
+
+RESUME_FIELDS = ["personal_info", "summary", "skills", "work_experience", "education", "projects"]
+
+SECTION_ALIASES = {
+    "summary": [
+        "summary", "professional summary", "profile", "professional profile",
+        "about", "about me", "objective", "career objective",
+    ],
+    "skills": [
+        "skills", "technical skills", "core skills", "key skills", "core competencies",
+        "competencies", "technologies", "tech stack", "tools and technologies",
+    ],
+    "work_experience": [
+        "experience", "work experience", "professional experience", "employment",
+        "employment history", "work history", "career history", "internships",
+        "relevant experience",
+    ],
+    "education": ["education", "academic background", "education and training", "academics"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects", "selected projects"],
+}
+_ALIAS_TO_SECTION = {
+    alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases
+}
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+DATE_PATTERN = rf"(?:{_MONTH}\s+\d{{4}}|\d{{1,2}}/\d{{4}}|\d{{4}})"
+DATE_RANGE_RE = re.compile(
+    rf"(?P<start>{DATE_PATTERN})\s*(?:-|–|—|to)\s*(?P<end>{DATE_PATTERN}|present|current|now|ongoing)",
+    re.IGNORECASE,
+)
+SINGLE_DATE_RE = re.compile(rf"(?:expected\s+)?(?P<date>{DATE_PATTERN})", re.IGNORECASE)
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"(?:\+?\d{1,3}[\s.-]?)?(?:\(\d{2,4}\)[\s.-]?)?\d{3,5}[\s.-]?\d{3,4}[\s.-]?\d{0,4}")
+URL_RE = re.compile(r"(?:https?://)?(?:www\.)?(linkedin\.com/[\w/-]+|github\.com/[\w-]+)", re.IGNORECASE)
+BULLET_RE = re.compile(r"^\s*(?:[•●▪■◦‣∙·*\-–]|\d+[.)])\s*")
+
+ROLE_WORDS = re.compile(
+    r"\b(engineer|developer|analyst|manager|intern|designer|scientist|consultant|lead|"
+    r"architect|specialist|associate|assistant|director|administrator|officer|head|"
+    r"coordinator|researcher|programmer|trainee|executive|fellow)\b",
+    re.IGNORECASE,
+)
+DEGREE_WORDS = re.compile(
+    r"\b(bachelor|master|ph\.?d|doctorate|diploma|associate of|b\.?\s?s\.?c?|m\.?\s?s\.?c?|"
+    r"b\.?\s?a|m\.?\s?a|b\.?\s?tech|m\.?\s?tech|b\.?\s?e|m\.?\s?e|mba|bba|bca|mca|high school)\b",
+    re.IGNORECASE,
+)
+INSTITUTION_WORDS = re.compile(
+    r"\b(university|college|institute|school|academy|polytechnic|iit|nit)\b", re.IGNORECASE
+)
+
+
+def match_skills(text: str) -> dict[str, list[str]]:
+    """Finds dictionary skills mentioned in `text`, grouped by category."""
+    return get_skill_taxonomy().match(text)["skills_by_category"]
+
+
+def extract_layout_lines(pdf_bytes: bytes) -> list[dict]:
+    """
+    Reads the PDF's text lines with their font size and boldness, which is what
+    lets section headers be told apart from body text.
+    """
+    import fitz  # PyMuPDF, loaded on first use
+
+    lines = []
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf_document:
+        for page in pdf_document:
+            for block in page.get_text("dict")["blocks"]:
+                for line in block.get("lines", []):
+                    spans = [span for span in line["spans"] if span["text"].strip()]
+                    if not spans:
+                        continue
+                    lines.append(
+                        {
+                            "text": " ".join(span["text"].strip() for span in spans),
+                            "size": max(span["size"] for span in spans),
+                            "bold": all(
+                                span["flags"] & 16 or "bold" in span["font"].lower()
+                                for span in spans
+                            ),
+                        }
+                    )
+    return lines
+
+
+# Upper-case section names, which plain-text extraction often runs together
+# with the surrounding lines.
+_INLINE_HEADER_RE = re.compile(
+    r"(?<!\S)("
+    + "|".join(re.escape(alias.upper()) for alias in sorted(_ALIAS_TO_SECTION, key=len, reverse=True))
+    + r")(?!\S)"
+)
+
+
+# Bullets run together with the preceding text, e.g. "Initech Mar 2022 • Built ...".
+_INLINE_BULLET_RE = re.compile(r"(?<=\S)[ \t]+([•●▪■◦‣∙·])[ \t]+")
+
+
+def _text_lines(resume_text: str) -> list[dict]:
+    """Plain-text fallback when no PDF layout is available."""
+    text = _INLINE_HEADER_RE.sub(lambda m: f"\n{m.group(1)}\n", resume_text)
+    text = _INLINE_BULLET_RE.sub(lambda m: f"\n{m.group(1)} ", text)
+    return [
+        {"text": line.strip(), "size": 0.0, "bold": False}
+        for line in text.splitlines()
+        if line.strip()
+    ]
+
+
+def _header_section(line: dict, body_size: float) -> Optional[str]:
+    """Returns the section a header line opens, "other" for unknown headers, else None."""
+    text = line["text"].strip()
+    key = re.sub(r"[^a-z& ]", "", text.lower()).replace("&", "and").strip()
+    key = re.sub(r"\s+", " ", key)
+    if key in _ALIAS_TO_SECTION and len(text) <= 40:
+        return _ALIAS_TO_SECTION[key]
+    # Short, visually emphasised lines we don't recognise (Certifications,
+    # Awards, ...) still end the previous section.
+    emphasised = (body_size and line["size"] >= body_size * 1.15) or (
+        text.isupper() and line["bold"]
+    )
+    if emphasised and len(text.split()) <= 4 and not DATE_RANGE_RE.search(text):
+        return "other"
+    return None
+
+
+def _split_sections(lines: list[dict]) -> tuple[list[dict], dict[str, list[str]]]:
+    sizes = [line["size"] for line in lines if line["size"]]
+    body_size = statistics.median(sizes) if sizes else 0.0
+    header_lines: list[dict] = []
+    sections: dict[str, list[str]] = {}
+    current = None
+    for line in lines:
+        section = _header_section(line, body_size)
+        if section == "other" and current is None:
+            section = None  # The name is usually the largest text on the page
+        if section is not None:
+            current = section
+            sections.setdefault(section, [])
+        elif current is None:
+            header_lines.append(line)
+        else:
+            sections[current].append(line["text"])
+    sections.pop("other", None)
+    return header_lines, sections
+
+
+def _personal_info(header_lines: list[dict], resume_text: str) -> dict:
+    info = {}
+    for line in header_lines[:3]:
+        text = line["text"].strip()
+        if (
+            not EMAIL_RE.search(text)
+            and not any(ch.isdigit() for ch in text)
+            and 1 < len(text.split()) <= 5
+        ):
+            info["name"] = text
+            break
+    email = EMAIL_RE.search(resume_text)
+    if email:
+        info["email"] = email.group(0)
+    head = " ".join(line["text"] for line in header_lines) or resume_text[:500]
+    phone = next(
+        (m.group(0).strip() for m in PHONE_RE.finditer(head) if len(re.sub(r"\D", "", m.group(0))) >= 9),
+        None,
+    )
+    if phone:
+        info["phone"] = phone
+    for match in URL_RE.finditer(resume_text):
+        site = "linkedin" if "linkedin" in match.group(1).lower() else "github"
+        info.setdefault(site, match.group(1))
+    return info
+
+
+def _strip_bullet(line: str) -> tuple[str, bool]:
+    stripped = BULLET_RE.sub("", line, count=1)
+    return stripped.strip(), stripped != line
+
+
+def _split_title_company(text: str) -> tuple[str, str]:
+    parts = [
+        part.strip(" ,|-–—")
+        for part in re.split(r"\s+at\s+|\s*\|\s*|\s+[-–—]\s+|,\s+", text, maxsplit=1)
+    ]
+    parts = [part for part in parts if part]
+    if not parts:
+        return "", ""
+    if len(parts) == 1:
+        return (parts[0], "") if ROLE_WORDS.search(parts[0]) else ("", parts[0])
+    first, second = parts
+    if ROLE_WORDS.search(second) and not ROLE_WORDS.search(first):
+        return second, first
+    return first, second
+
+
+def _work_experience(lines: list[str]) -> list[dict]:
+    entries: list[dict] = []
+    pending: list[str] = []  # Non-bullet lines seen since the last entry's bullets
+    for raw in lines:
+        text, is_bullet = _strip_bullet(raw)
+        date_range = DATE_RANGE_RE.search(text)
+        if date_range and not is_bullet:
+            remainder = (text[: date_range.start()] + text[date_range.end() :]).strip(" ,|-–—()")
+            heading = " | ".join(pending + ([remainder] if remainder else []))
+            title, company = _split_title_company(heading)
+            entries.append(
+                {
+                    "title": title,
+                    "company": company,
+                    "start_date": date_range.group("start"),
+                    "end_date": date_range.group("end"),
+                    "description": [],
+                }
+            )
+            pending = []
+        elif entries and (is_bullet or entries[-1]["description"]):
+            if is_bullet or not entries[-1]["description"]:
+                entries[-1]["description"].append(text)
+            else:
+                # A non-bullet line after bullets: either a wrapped bullet or the
+                # heading of the next entry (whose dates come on a later line).
+                pending.append(text)
+        elif entries and not entries[-1]["company"]:
+            entries[-1]["company"] = text
+        elif entries and not entries[-1]["title"] and ROLE_WORDS.search(text):
+            entries[-1]["title"] = text
+        else:
+            pending.append(text)
+    if entries and pending:
+        entries[-1]["description"].extend(pending)
+    return entries
+
+
+def _split_degree_institution(text: str) -> tuple[str, str]:
+    """Splits "B.Sc. Computer Science, State University" (either order) into its parts."""
+    parts = [
+        part.strip(" ,|-–—")
+        for part in re.split(r",\s+|\s*\|\s*|\s+[-–—]\s+|\s+at\s+", text)
+    ]
+    parts = [part for part in parts if part]
+    institution = [part for part in parts if INSTITUTION_WORDS.search(part)]
+    if len(parts) < 2 or not institution or len(institution) == len(parts):
+        return "", text
+    degree = [part for part in parts if part not in institution]
+    if not DEGREE_WORDS.search(" ".join(degree)):
+        return "", text
+    return ", ".join(degree), ", ".join(institution)
+
+
+def _education(lines: list[str]) -> list[dict]:
+    entries: list[dict] = []
+    for raw in lines:
+        text, is_bullet = _strip_bullet(raw)
+        date_range = DATE_RANGE_RE.search(text)
+        single_date = None if date_range else SINGLE_DATE_RE.search(text)
+        clean = text
+        if date_range:
+            clean = text[: date_range.start()] + text[date_range.end() :]
+        elif single_date:
+            clean = text[: single_date.start()] + text[single_date.end() :]
+        clean = clean.strip(" ,|-–—()")
+        has_degree = bool(DEGREE_WORDS.search(clean))
+        has_institution = bool(INSTITUTION_WORDS.search(clean))
+
+        current = entries[-1] if entries else None
+        starts_new = (has_degree and current and current["degree"]) or (
+            has_institution and current and current["institution"]
+        )
+        if current is None or starts_new:
+            current = {"degree": "", "institution": "", "start_date": "", "end_date": "", "details": []}
+            entries.append(current)
+        if has_institution and has_degree and not (current["institution"] or current["degree"]):
+            current["degree"], current["institution"] = _split_degree_institution(clean)
+        elif has_institution and not current["institution"]:
+            current["institution"] = clean
+        elif has_degree and not current["degree"]:
+            current["degree"] = clean
+        elif clean:
+            current["details"].append(clean)
+        if date_range:
+            current["start_date"] = date_range.group("start")
+            current["end_date"] = date_range.group("end")
+        elif single_date and not current["end_date"]:
+            current["end_date"] = single_date.group("date")
+    return [entry for entry in entries if entry["degree"] or entry["institution"]]
+
+
+def _projects(lines: list[str]) -> list[dict]:
+    entries: list[dict] = []
+    for raw in lines:
+        text, is_bullet = _strip_bullet(raw)
+        if not is_bullet and (not entries or entries[-1]["description"]):
+            entries.append({"name": text, "description": [], "technologies": []})
+        elif entries:
+            entries[-1]["description"].append(text)
+    for entry in entries:
+        entry_text = " ".join([entry["name"]] + entry["description"])
+        entry["technologies"] = [
+            skill for skills in match_skills(entry_text).values() for skill in skills
+        ]
+    return entries
+
+
+def _confidence(result: dict, sections: dict) -> float:
+    """
+    A rough 0-1 score of how complete and trustworthy the local parse is:
+    contact details, recognised sections and non-empty core fields all count.
+    """
+    info = result["personal_info"]
+    score = 0.0
+    score += 0.1 if info.get("name") else 0.0
+    score += 0.1 if info.get("email") or info.get("phone") else 0.0
+    score += 0.15 * min(len(sections), 3) / 3
+    score += 0.2 if result["skills"] else 0.0
+    score += 0.25 if result["work_experience"] else (0.1 if "work_experience" not in sections else 0.0)
+    score += 0.2 if result["education"] else 0.0
+    return round(min(score, 1.0), 2)
+
+
+def structure_locally(resume_text: str, pdf_bytes: Optional[bytes] = None) -> tuple[dict, float, list[str]]:
+    """
+    Rule-based structuring. Returns the resume in the LLM parser's schema, a
+    confidence score, and the fields whose section was found but could not be
+    parsed (or that every resume must have, like the name).
+    """
+    lines = None
+    if pdf_bytes:
+        try:
+            lines = extract_layout_lines(pdf_bytes)
+        except Exception as e:
+            print(f"Structurer: could not read PDF layout, using text lines: {e}")
+    if not lines:
+        lines = _text_lines(resume_text)
+
+    header_lines, sections = _split_sections(lines)
+    section_text = {name: "\n".join(body) for name, body in sections.items()}
+
+    skills = match_skills(section_text.get("skills") or resume_text)
+    result = {
+        "personal_info": _personal_info(header_lines, resume_text),
+        "summary": " ".join(sections.get("summary", [])),
+        "skills": skills,
+        "work_experience": _work_experience(sections.get("work_experience", [])),
+        "education": _education(sections.get("education", [])),
+        "projects": _projects(sections.get("projects", [])),
+    }
+
+    unfilled = [
+        field for field in RESUME_FIELDS if field in sections and not result[field]
+    ]
+    if not result["personal_info"].get("name") and "personal_info" not in unfilled:
+        unfilled.insert(0, "personal_info")
+    if not result["skills"] and "skills" not in unfilled:
+        unfilled.append("skills")
+    return result, _confidence(result, sections), unfilled
+
+
+def structure_resume(resume_text: str, pdf_bytes: Optional[bytes] = None) -> dict:
+    """
+    Structures a resume with the local rules first, falling back to the LLM
+    parser for the whole resume when confidence is low, or only for the fields
+    the rules could not fill. The method used and the confidence are recorded
+    under "parser".
+    """
+    result, confidence, unfilled = structure_locally(resume_text, pdf_bytes)
+    if confidence < STRUCTURER_MIN_CONFIDENCE:
+        print(f"Structurer: low confidence ({confidence}), using the LLM parser.")
+        structured = parse_text_to_json(resume_text)
+        if "error" not in structured:
+            structured["parser"] = {"method": "llm", "confidence": confidence}
+        return structured
+
+    method = "rules"
+    if unfilled:
+        print(f"Structurer: asking the LLM only for {unfilled}.")
+        filled = parse_fields_to_json(resume_text, unfilled)
+        if "error" not in filled:
+            for field in unfilled:
+                if filled.get(field):
+                    result[field] = filled[field]
+            method = "rules+llm"
+    result["parser"] = {"method": method, "confidence": confidence}
+    return result
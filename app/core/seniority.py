@@ -0,0 +1,278 @@
+import json
+import os
+import re
+from datetime import date
+from typing import Optional
+from app.core.prompt_builder import PromptSection, build_prompt, json_or_text
+from app.core.resume_structurer import DATE_PATTERN, DATE_RANGE_RE, SINGLE_DATE_RE
+from app.services.gemini_service import get_gemini_response, get_gemini_response_async
+
+SENIORITY_LEVELS = ["Intern", "Entry-Level", "Mid-Level", "Senior"]
+# Below this the local estimate is treated as ambiguous and the LLM decides.
+SENIORITY_MIN_CONFIDENCE = float(os.getenv("SENIORITY_MIN_CONFIDENCE", "0.65"))
+
+SENIORITY_PROMPT = """
+    Analyze the "work_experience" and "education" sections of the following structured resume.
+    Based on the total years of experience, job titles, and graduation dates, classify the candidate's seniority level.
+
+    - If there is no work experience and the candidate is still in university, classify as 'Intern'.
+    - If there is 0-2 years of experience and a recent graduation date, classify as 'Entry-Level'.
+    - If there are 2-7 years of relevant experience, classify as 'Mid-Level'.
+    - If there are 7+ years of experience with progressive titles, classify as 'Senior'.
+
+    Return ONLY ONE of the following keywords: Intern, Entry-Level, Mid-Level, Senior.
+
+    **Structured Resume (JSON):**
+    {resume_json_string}
+    """
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6, "jul": 7,
+    "aug": 8, "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_ONGOING = {"present", "current", "now", "ongoing", "today"}
+# Title words ranked by seniority; the highest one in a title wins.
+TITLE_RANKS = [
+    (re.compile(r"\b(intern|internship|trainee|apprentice)\b", re.I), 0),
+    (re.compile(r"\b(junior|jr\.?|graduate|associate|entry)\b", re.I), 1),
+    (re.compile(r"\b(senior|sr\.?|lead|staff|principal|manager|head|director|architect|vp)\b", re.I), 3),
+]
+# Education keys holding when a degree ends; other text only counts as "still
+# studying" with a date attached (e.g. "2022 - Present", "Expected May 2026").
+EDUCATION_END_KEYS = ("end_date", "end", "graduation_date", "expected_graduation")
+_ONGOING_RE = re.compile(r"\b(expected|present|current|now|ongoing|pursuing)\b", re.I)
+_EXPECTED_DATE_RE = re.compile(
+    rf"\bexpected\s+(?:graduation\s*:?\s*)?{DATE_PATTERN}", re.IGNORECASE
+)
+YEARS_FOR_LEVEL = [(7.0, "Senior"), (2.0, "Mid-Level"), (0.0, "Entry-Level")]
+
+
+def parse_resume_date(text: str, is_end: bool = False, today: Optional[date] = None) -> Optional[date]:
+    """
+    Parses "Jan 2020", "January 2020", "06/2020", "2020" or "Present". A bare
+    year means January as a start date and December as an end date.
+    """
+    today = today or date.today()
+    text = text.strip().lower().rstrip(".")
+    if text in _ONGOING:
+        return today
+    match = re.fullmatch(r"([a-z]+)\.?\s+(\d{4})", text)
+    if match:
+        month = _MONTHS.get(match.group(1)[:4]) or _MONTHS.get(match.group(1)[:3])
+        if month:
+            return date(int(match.group(2)), month, 1)
+    match = re.fullmatch(r"(\d{1,2})/(\d{4})", text)
+    if match and 1 <= int(match.group(1)) <= 12:
+        return date(int(match.group(2)), int(match.group(1)), 1)
+    match = re.fullmatch(r"(\d{4})", text)
+    if match:
+        return date(int(match.group(1)), 12 if is_end else 1, 1)
+    return None
+
+
+def _entry_interval(entry: dict, today: date) -> Optional[tuple[date, date]]:
+    """Finds an entry's dates in start/end keys or in any "Jan 2020 - Present" string."""
+    start = entry.get("start_date") or entry.get("start")
+    end = entry.get("end_date") or entry.get("end")
+    if isinstance(start, str) and start.strip():
+        start_date = parse_resume_date(start, today=today)
+        end_date = (
+            parse_resume_date(end, is_end=True, today=today)
+            if isinstance(end, str) and end.strip()
+            else today
+        )
+        if start_date and end_date:
+            return start_date, min(end_date, today)
+    for value in entry.values():
+        if isinstance(value, str):
+            match = DATE_RANGE_RE.search(value)
+            if match:
+                start_date = parse_resume_date(match.group("start"), today=today)
+                end_date = parse_resume_date(match.group("end"), is_end=True, today=today)
+                if start_date and end_date:
+                    return start_date, min(end_date, today)
+    return None
+
+
+def _merged_years(intervals: list[tuple[date, date]]) -> float:
+    """Total years covered, counting overlapping roles once."""
+    total_days = 0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total_days += (current_end - current_start).days
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total_days += (current_end - current_start).days
+    return total_days / 365.25
+
+
+def _title_rank(title: str) -> int:
+    """0 intern, 1 junior, 2 unmarked, 3 senior/lead."""
+    matched = [value for pattern, value in TITLE_RANKS if pattern.search(title)]
+    if 3 in matched:
+        return 3  # "Senior Associate" is senior
+    return min(matched, default=2)
+
+
+def _still_studying(education: list, today: date) -> bool:
+    """
+    True if a degree's end date is ongoing ("Present", "Expected ...") or in
+    the future. Entries without an end date are checked for a date range or an
+    "expected <date>" in their text, so "Current GPA 3.8" doesn't count.
+    """
+    for entry in education:
+        if not isinstance(entry, dict):
+            continue
+        ends = [entry.get(key) for key in EDUCATION_END_KEYS]
+        end = next((value for value in ends if isinstance(value, str) and value.strip()), None)
+        if end is not None:
+            if _ONGOING_RE.search(end):
+                return True
+            match = SINGLE_DATE_RE.search(end)
+            end_date = match and parse_resume_date(match.group("date"), is_end=True, today=today)
+            if end_date and end_date > today:
+                return True
+            continue
+        texts = []
+        for value in entry.values():
+            texts.extend(value if isinstance(value, list) else [value])
+        for value in texts:
+            if not isinstance(value, str):
+                continue
+            if _EXPECTED_DATE_RE.search(value):
+                return True
+            for match in DATE_RANGE_RE.finditer(value):
+                if match.group("end").lower() in _ONGOING:
+                    return True
+                end_date = parse_resume_date(match.group("end"), is_end=True, today=today)
+                if end_date and end_date > today:
+                    return True
+    return False
+
+
+def estimate_seniority(resume: dict, today: Optional[date] = None) -> dict:
+    """
+    Classifies the candidate from the structured work history: merged years of
+    experience (overlaps counted once), title progression and whether they are
+    still studying. Returns {"level", "confidence", "years_of_experience",
+    "progression"}; a low confidence means the signals are missing or disagree.
+    """
+    today = today or date.today()
+    work = [e for e in resume.get("work_experience") or [] if isinstance(e, dict)]
+    education = [e for e in resume.get("education") or [] if isinstance(e, dict)]
+    studying = _still_studying(education, today)
+
+    dated = [(interval, entry) for entry in work if (interval := _entry_interval(entry, today))]
+    non_intern = [
+        interval for interval, entry in dated
+        if _title_rank(str(entry.get("title") or entry.get("position") or "")) > 0
+    ]
+    years = _merged_years(non_intern)
+    ranks = [
+        _title_rank(str(entry.get("title") or entry.get("position") or ""))
+        for _, entry in sorted(dated, key=lambda item: item[0])
+    ]
+    progression = len(ranks) > 1 and ranks[-1] > ranks[0]
+
+    def result(level: str, confidence: float) -> dict:
+        return {
+            "level": level,
+            "confidence": round(confidence, 2),
+            "years_of_experience": round(years, 1),
+            "progression": progression,
+        }
+
+    if not work:
+        return result("Intern" if studying else "Entry-Level", 0.8 if studying else 0.65)
+    if not dated:
+        return result("Entry-Level", 0.2)  # Roles without usable dates: ask the LLM
+    if not non_intern:
+        return result("Intern" if studying else "Entry-Level", 0.8)
+
+    level = next(name for threshold, name in YEARS_FOR_LEVEL if years >= threshold)
+    # Distance to the nearest level boundary: close calls are less certain.
+    margin = min(abs(years - threshold) for threshold, _ in YEARS_FOR_LEVEL if threshold)
+    confidence = 0.6 + min(margin, 2.0) * 0.15
+    if len(dated) < len(work):
+        confidence -= 0.15  # Some roles could not be dated
+    latest_rank = ranks[-1]
+    if latest_rank == 3 and level == "Senior" or latest_rank == 1 and level == "Entry-Level":
+        confidence += 0.1
+    elif latest_rank == 3 and level == "Entry-Level" or latest_rank == 1 and level == "Senior":
+        confidence -= 0.3
+    if studying and level != "Entry-Level":
+        confidence -= 0.2
+    return result(level, max(0.0, min(confidence, 1.0)))
+
+
+def _normalize_level(response: str) -> Optional[str]:
+    for level in SENIORITY_LEVELS:
+        if level.lower() in response.lower():
+            return level
+    return None
+
+
+def _local_estimate(resume_json_string: str) -> Optional[dict]:
+    try:
+        resume = json.loads(resume_json_string)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(resume, dict):
+        return None
+    estimate = estimate_seniority(resume)
+    print(
+        f"Seniority: {estimate['level']} from {estimate['years_of_experience']} years "
+        f"(confidence {estimate['confidence']})."
+    )
+    return estimate
+
+
+def _seniority_prompt(resume_json_string: str) -> str:
+    """The LLM prompt, with only the sections the classification looks at."""
+    resume = json_or_text(resume_json_string)
+    if isinstance(resume, dict):
+        resume = {key: resume.get(key) for key in ("work_experience", "education")}
+    return build_prompt(
+        SENIORITY_PROMPT,
+        [PromptSection("resume_json_string", resume)],
+        call_site="seniority",
+    )
+
+
+def get_candidate_seniority(resume_json_string: str) -> str:
+    """
+    Returns one of SENIORITY_LEVELS, estimated locally and confirmed by the LLM
+    only when the estimate is ambiguous (the estimate stands if the LLM fails).
+    """
+    estimate = _local_estimate(resume_json_string)
+    if estimate and estimate["confidence"] >= SENIORITY_MIN_CONFIDENCE:
+        return estimate["level"]
+    try:
+        response = get_gemini_response(
+            _seniority_prompt(resume_json_string), call_site="seniority"
+        )
+    except Exception:
+        if estimate is None:
+            raise
+        return estimate["level"]
+    return _normalize_level(response) or (estimate["level"] if estimate else response.strip())
+
+
+async def get_candidate_seniority_async(resume_json_string: str) -> str:
+    """Async version of get_candidate_seniority."""
+    estimate = _local_estimate(resume_json_string)
+    if estimate and estimate["confidence"] >= SENIORITY_MIN_CONFIDENCE:
+        return estimate["level"]
+    try:
+        response = await get_gemini_response_async(
+            _seniority_prompt(resume_json_string), call_site="seniority"
+        )
+    except Exception:
+        if estimate is None:
+            raise
+        return estimate["level"]
+    return _normalize_level(response) or (estimate["level"] if estimate else response.strip())
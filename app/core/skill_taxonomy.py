@@ -0,0 +1,240 @@
+import json
+import os
+from collections import Counter, deque
+from functools import lru_cache
+from typing import Iterator, Optional
+from data.market_trends import knowledge_base_data
+from data.skill_dictionary import skill_dictionary
+
+# Extra taxonomy files, separated by os.pathsep. Each is JSON of the form
+# {"fields": {"Field Name": ["term", ...]}, "skills": {"category": ["Skill", ...]}}.
+SKILL_TAXONOMY_PATHS = os.getenv("SKILL_TAXONOMY_PATHS", "")
+
+# Terms that point at a field on their own (role titles, discipline names).
+FIELD_TERMS = {
+    "Software Development": [
+        "software engineer", "software developer", "backend", "frontend", "full-stack",
+        "full stack", "web developer", "mobile developer", "devops engineer",
+        "cloud engineer", "site reliability", "sre", "system design", "microservices",
+        "api", "apis",
+    ],
+    "Data Science": [
+        "data scientist", "data analyst", "data engineer", "machine learning",
+        "deep learning", "analytics", "business intelligence", "statistics",
+        "statistical analysis", "data visualization", "ml engineer", "nlp",
+    ],
+    "Design": [
+        "designer", "ui/ux", "ux", "ui design", "user experience", "user research",
+        "usability testing", "interaction design", "wireframing", "prototyping",
+        "visual design", "product design",
+    ],
+}
+
+# Skill categories that count as weaker evidence for a field.
+CATEGORY_FIELDS = {
+    "languages": "Software Development",
+    "frameworks": "Software Development",
+    "databases": "Software Development",
+    "cloud_devops": "Software Development",
+    "tools": "Software Development",
+    "methodologies": "Software Development",
+    "data_analytics": "Data Science",
+    "design": "Design",
+}
+# Skills whose field differs from their category's.
+SKILL_FIELDS = {
+    "Pandas": "Data Science", "NumPy": "Data Science", "scikit-learn": "Data Science",
+    "TensorFlow": "Data Science", "PyTorch": "Data Science", "Keras": "Data Science",
+    "Spark": "Data Science", "Hadoop": "Data Science", "R": "Data Science",
+    "Jupyter": "Data Science", "BigQuery": "Data Science", "Snowflake": "Data Science",
+    "Redshift": "Data Science", "Azure Synapse Analytics": "Data Science",
+}
+FIELD_TERM_WEIGHT = 3.0
+SKILL_WEIGHT = 1.0
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: finds every occurrence of any of its terms in one
+    pass over the text, however many terms there are.
+    """
+
+    def __init__(self):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[tuple[str, object]]] = [[]]
+        self._built = False
+
+    def add(self, term: str, payload: object) -> None:
+        if self._built:
+            raise RuntimeError("Cannot add terms after the matcher is built.")
+        state = 0
+        for ch in term:
+            if ch not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][ch] = len(self._goto) - 1
+            state = self._goto[state][ch]
+        self._output[state].append((term, payload))
+
+    def build(self) -> None:
+        """Computes failure links breadth-first (root children fail to the root)."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int, str, object]]:
+        """Yields (start, end, term, payload) for every occurrence in `text`."""
+        if not self._built:
+            self.build()
+        state = 0
+        for index, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for term, payload in self._output[state]:
+                yield index - len(term) + 1, index + 1, term, payload
+
+
+def _is_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not (before.isalnum() or before in "_+#.") and not (after.isalnum() or after in "_+#")
+
+
+def _lower_same_length(text: str) -> str:
+    """Lower-cases without changing offsets (a few characters lengthen when lowered)."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+class SkillTaxonomy:
+    """Compiled skills and field terms, matched case-insensitively in linear time."""
+
+    def __init__(self, skills: dict[str, list[str]], field_terms: dict[str, list[str]]):
+        self.fields = sorted(field_terms)
+        self._matcher = AhoCorasick()
+        entries: dict[str, list[tuple]] = {}
+        for category, names in skills.items():
+            for name in names:
+                field = SKILL_FIELDS.get(name, CATEGORY_FIELDS.get(category))
+                entries.setdefault(name.lower(), []).append(("skill", name, category, field))
+        for field, terms in field_terms.items():
+            for term in [field] + list(terms):
+                entries.setdefault(term.lower(), []).append(("field", term, None, field))
+        for term, payloads in entries.items():
+            self._matcher.add(term, payloads)
+        self._matcher.build()
+
+    def match(self, text: str) -> dict:
+        """
+        Returns {"field", "field_scores", "skills", "skills_by_category"} for
+        `text`. Overlapping terms resolve to the longest ("React Native" over
+        "React"); names of two characters or fewer must match case exactly.
+        """
+        lowered = _lower_same_length(text)
+        candidates = [
+            (start, end, payloads)
+            for start, end, _, payloads in self._matcher.iter_matches(lowered)
+            if _is_boundary(lowered, start, end)
+        ]
+        candidates.sort(key=lambda c: (c[0], c[0] - c[1]))
+
+        skill_counts: Counter = Counter()
+        categories: dict[str, str] = {}
+        field_scores: Counter = Counter()
+        last_end = 0
+        for start, end, payloads in candidates:
+            if start < last_end:
+                continue
+            matched_any = False
+            for kind, name, category, field in payloads:
+                if len(name) <= 2 and text[start:end] != name:
+                    continue
+                matched_any = True
+                if kind == "skill":
+                    skill_counts[name] += 1
+                    categories[name] = category
+                    if field:
+                        field_scores[field] += SKILL_WEIGHT
+                else:
+                    field_scores[field] += FIELD_TERM_WEIGHT
+            if matched_any:
+                last_end = end
+
+        skills = [name for name, _ in skill_counts.most_common()]
+        skills_by_category: dict[str, list[str]] = {}
+        for name in skills:
+            skills_by_category.setdefault(categories[name], []).append(name)
+        return {
+            "field": field_scores.most_common(1)[0][0] if field_scores else None,
+            "field_scores": dict(field_scores),
+            "skills": skills,
+            "skills_by_category": skills_by_category,
+        }
+
+
+def _load_extension(path: str, skills: dict, field_terms: dict) -> None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            extension = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Skill taxonomy: could not load '{path}': {e}")
+        return
+    for category, names in extension.get("skills", {}).items():
+        skills.setdefault(category, []).extend(names)
+    for field, terms in extension.get("fields", {}).items():
+        field_terms.setdefault(field, []).extend(terms)
+
+
+@lru_cache(maxsize=1)
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """
+    The taxonomy seeded from the skill dictionary and the fields used in the
+    market data, plus any files listed in SKILL_TAXONOMY_PATHS. Built once.
+    """
+    skills = {category: list(names) for category, names in skill_dictionary.items()}
+    field_terms = {field: list(terms) for field, terms in FIELD_TERMS.items()}
+    for item in knowledge_base_data:
+        field = item["metadata"].get("field")
+        if field and field != "General":
+            field_terms.setdefault(field, [])
+    for path in filter(None, SKILL_TAXONOMY_PATHS.split(os.pathsep)):
+        _load_extension(path, skills, field_terms)
+    return SkillTaxonomy(skills, field_terms)
+
+
+def build_retrieval_query(
+    resume_text: str,
+    job_description: Optional[str] = None,
+    max_skills: int = 7,
+) -> str:
+    """
+    Builds the knowledge-base query ("Field: ... Skills: ...") from the resume,
+    and the job description's requirements when one is given.
+    """
+    taxonomy = get_skill_taxonomy()
+    resume = taxonomy.match(resume_text)
+    field = resume["field"]
+    if job_description is None:
+        return f"Field: {field or 'General'}. Skills: {', '.join(resume['skills'][:max_skills])}"
+
+    job = taxonomy.match(job_description)
+    field = job["field"] or field
+    return (
+        f"Field: {field or 'General'}. "
+        f"Resume Skills: {', '.join(resume['skills'][:max_skills])}. "
+        f"Job Requirements: {', '.join(job['skills'][:max_skills])}"
+    )
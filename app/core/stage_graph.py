@@ -0,0 +1,122 @@
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Optional
+
+
+class Stage:
+    """A named unit of pipeline work and the stages whose results it consumes."""
+
+    def __init__(self, name: str, func: Callable, depends_on: tuple = ()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+async def _call(func: Callable, *args) -> Any:
+    """Awaits coroutine functions directly and runs blocking ones in a thread."""
+    if inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(
+        getattr(func, "__call__", None)
+    ):
+        return await func(*args)
+    return await asyncio.to_thread(func, *args)
+
+
+def limited(func: Callable, semaphore: asyncio.Semaphore) -> Callable:
+    """Wraps a stage function so it only runs while holding `semaphore`."""
+
+    async def run(*args) -> Any:
+        async with semaphore:
+            return await _call(func, *args)
+
+    return run
+
+
+def _check_graph(stages: list[Stage]) -> None:
+    names = {stage.name for stage in stages}
+    if len(names) != len(stages):
+        raise ValueError("Stage names must be unique.")
+    for stage in stages:
+        missing = set(stage.depends_on) - names
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+    # Kahn's algorithm, only to reject cycles before anything is scheduled.
+    remaining = {stage.name: set(stage.depends_on) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Stage graph has a cycle among: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def critical_path(stages: list[Stage], timings: dict[str, float]) -> list[str]:
+    """Returns the chain of stages with the largest summed wall time."""
+    by_name = {stage.name: stage for stage in stages}
+    best: dict[str, tuple[float, list[str]]] = {}
+
+    def longest(name: str) -> tuple[float, list[str]]:
+        if name not in best:
+            upstream = [longest(dep) for dep in by_name[name].depends_on]
+            cost, path = max(upstream, default=(0.0, []))
+            best[name] = (cost + timings.get(name, 0.0), path + [name])
+        return best[name]
+
+    return max((longest(name) for name in by_name), default=(0.0, []))[1]
+
+
+async def run_stage_graph(
+    stages: list[Stage], on_event: Optional[Callable[[dict], Any]] = None
+) -> tuple[dict[str, Any], dict[str, float]]:
+    """
+    Runs every stage as soon as all of its dependencies have finished.
+
+    Each stage function receives the results of its dependencies as positional
+    arguments, in the order they are listed in `depends_on`. Independent branches
+    run concurrently. Returns the results and the wall time (seconds) of each stage.
+    If `on_event` is given it is called with a dict whenever a stage starts or ends.
+    """
+    _check_graph(stages)
+    tasks: dict[str, asyncio.Task] = {}
+    timings: dict[str, float] = {}
+
+    async def emit(event: dict) -> None:
+        if on_event is not None:
+            result = on_event(event)
+            if inspect.isawaitable(result):
+                await result
+
+    async def run(stage: Stage) -> Any:
+        args = [await tasks[dep] for dep in stage.depends_on]
+        await emit({"stage": stage.name, "status": "started"})
+        started = time.perf_counter()
+        status = "failed"
+        try:
+            result = await _call(stage.func, *args)
+            status = "finished"
+            return result
+        finally:
+            timings[stage.name] = time.perf_counter() - started
+            await emit(
+                {
+                    "stage": stage.name,
+                    "status": status,
+                    "seconds": round(timings[stage.name], 3),
+                }
+            )
+
+    for stage in stages:
+        tasks[stage.name] = asyncio.create_task(run(stage), name=stage.name)
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+
+    results = {name: task.result() for name, task in tasks.items()}
+    return results, timings
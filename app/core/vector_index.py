@@ -0,0 +1,282 @@
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Optional
+import numpy as np
+
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "./db/vector_index")
+# How often a loaded index checks whether a newer snapshot has been written.
+VECTOR_INDEX_RELOAD_SECONDS = float(os.getenv("VECTOR_INDEX_RELOAD_SECONDS", "30"))
+# Metadata keys that can be filtered on; stored as integer code arrays.
+FILTER_COLUMNS = ("field", "type", "seniority")
+# Below this fraction of matching rows, score only the matching rows.
+SUBSET_SCAN_FRACTION = 0.5
+
+
+class VectorIndex:
+    """
+    A read-only snapshot of the knowledge base for in-process search:
+
+    - vectors.f32: the normalized embeddings as one memory-mapped float32
+      matrix, so every worker process on the host shares the same page cache;
+    - codes_<column>.npy: one integer code per row for each filter column
+      (-1 when the document has no value), so filters are vectorized masks;
+    - records.bin + offsets.npy: each row's id, document and metadata as JSON,
+      read only for the rows that make it into a result.
+    """
+
+    def __init__(self, path: str = VECTOR_INDEX_PATH):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.count = self.manifest["count"]
+        self.dim = self.manifest["dim"]
+        if self.count:
+            self.vectors = np.memmap(
+                os.path.join(path, "vectors.f32"),
+                dtype=np.float32,
+                mode="r",
+                shape=(self.count, self.dim),
+            )
+        else:  # np.memmap can't map an empty file
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self.codes = {
+            column: np.load(os.path.join(path, f"codes_{column}.npy"), mmap_mode="r")
+            for column in FILTER_COLUMNS
+        }
+        self.vocab = {
+            column: {value: code for code, value in enumerate(values)}
+            for column, values in self.manifest["columns"].items()
+        }
+        self._offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self._records = open(os.path.join(path, "records.bin"), "rb")
+        self._records_lock = threading.Lock()
+        self._readers = 0
+        self._retired = False
+        self._readers_lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Registers a reader; False if the index has already been closed."""
+        with self._readers_lock:
+            if self._records.closed:
+                return False
+            self._readers += 1
+            return True
+
+    def release(self) -> None:
+        with self._readers_lock:
+            self._readers -= 1
+            if self._retired and not self._readers:
+                self._close()
+
+    def retire(self) -> None:
+        """Closes the index once its last reader has released it."""
+        with self._readers_lock:
+            self._retired = True
+            if not self._readers:
+                self._close()
+
+    def _close(self) -> None:
+        with self._records_lock:
+            self._records.close()
+        # numpy unmaps the files when the last reference to each map is dropped.
+        self.vectors = None
+        self.codes = {}
+        self._offsets = None
+
+    @staticmethod
+    def write(
+        path: str,
+        ids: list[str],
+        embeddings: Iterable,
+        documents: list[str],
+        metadatas: list[dict],
+    ) -> None:
+        """Writes a snapshot to `path`, replacing any previous one atomically."""
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        matrix = matrix.reshape(len(ids), -1) if len(ids) else np.zeros((0, 0), np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        matrix.tofile(os.path.join(tmp_path, "vectors.f32"))
+
+        columns = {}
+        for column in FILTER_COLUMNS:
+            values = [(metadata or {}).get(column) for metadata in metadatas]
+            vocab = sorted({str(v) for v in values if v is not None})
+            index = {value: code for code, value in enumerate(vocab)}
+            codes = np.array(
+                [index[str(v)] if v is not None else -1 for v in values], dtype=np.int32
+            )
+            np.save(os.path.join(tmp_path, f"codes_{column}.npy"), codes)
+            columns[column] = vocab
+
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        with open(os.path.join(tmp_path, "records.bin"), "wb") as f:
+            for row, (doc_id, document, metadata) in enumerate(zip(ids, documents, metadatas)):
+                f.write(json.dumps([doc_id, document, metadata or {}]).encode("utf-8"))
+                offsets[row + 1] = f.tell()
+        np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+
+        with open(os.path.join(tmp_path, "manifest.json"), "w", encoding="utf-8") as f:
+            manifest = {
+                "count": len(ids),
+                "dim": matrix.shape[1],
+                "built_at": time.time(),
+                "columns": columns,
+            }
+            json.dump(manifest, f)
+        # Swap directories so readers never see a half-written snapshot.
+        old_path = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def _mask(
+        self, fields: list[str], types: list[str], seniority: Optional[str]
+    ) -> Optional[np.ndarray]:
+        mask = None
+        for column, allowed in (("field", fields), ("type", types)):
+            if not allowed:
+                continue
+            codes = [self.vocab[column][v] for v in allowed if v in self.vocab[column]]
+            column_mask = np.isin(self.codes[column], codes)
+            mask = column_mask if mask is None else mask & column_mask
+        if seniority:
+            codes = self.codes["seniority"]
+            level = self.vocab["seniority"].get(seniority, -2)
+            column_mask = (codes == -1) | (codes == level)
+            mask = column_mask if mask is None else mask & column_mask
+        return mask
+
+    def search(
+        self,
+        query_vectors,
+        n_results: int,
+        fields: Optional[list[str]] = None,
+        types: Optional[list[str]] = None,
+        seniority: Optional[str] = None,
+    ) -> list[list[tuple[int, float]]]:
+        """
+        Top-k rows per query by cosine similarity, restricted by the filters.
+        Returns (row, distance) pairs per query, where distance is the squared
+        L2 distance between unit vectors (2 - 2 * cosine), as Chroma reports it.
+        """
+        if not self.count:
+            return [[] for _ in query_vectors]
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms == 0, 1, norms)
+
+        mask = self._mask(fields or [], types or [], seniority)
+        if mask is not None and mask.mean() < SUBSET_SCAN_FRACTION:
+            rows = np.flatnonzero(mask)
+            scores = self.vectors[rows] @ queries.T
+        else:
+            rows = None
+            scores = self.vectors @ queries.T
+            if mask is not None:
+                scores[~mask] = -np.inf
+
+        results = []
+        k = min(n_results, scores.shape[0])
+        for column in scores.T:
+            if k == 0:
+                results.append([])
+                continue
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top])]
+            top = top[np.isfinite(column[top])]
+            results.append(
+                [
+                    (int(rows[i]) if rows is not None else int(i), float(2 - 2 * column[i]))
+                    for i in top
+                ]
+            )
+        return results
+
+    def record(self, row: int) -> tuple[str, str, dict]:
+        """(id, document, metadata) of one row."""
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        with self._records_lock:
+            self._records.seek(start)
+            data = self._records.read(end - start)
+        doc_id, document, metadata = json.loads(data)
+        return doc_id, document, metadata
+
+
+def snapshot_collection(
+    collection, path: str = VECTOR_INDEX_PATH, page_size: int = 5000
+) -> int:
+    """Rebuilds the index snapshot from every document in a Chroma collection."""
+    ids, embeddings, documents, metadatas = [], [], [], []
+    offset = 0
+    while True:
+        page = collection.get(
+            include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset
+        )
+        if not page["ids"]:
+            break
+        ids += page["ids"]
+        embeddings += list(page["embeddings"])
+        documents += page["documents"]
+        metadatas += page["metadatas"]
+        offset += len(page["ids"])
+    VectorIndex.write(path, ids, np.asarray(embeddings, dtype=np.float32), documents, metadatas)
+    print(f"Vector index: snapshot of {len(ids)} documents written to {path}.")
+    return len(ids)
+
+
+_index: Optional[VectorIndex] = None
+_index_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def get_vector_index(path: str = VECTOR_INDEX_PATH) -> Optional[VectorIndex]:
+    """
+    The loaded snapshot, or None if none has been built yet. Picks up a newer
+    snapshot (e.g. written by scripts/update_kb.py) within
+    VECTOR_INDEX_RELOAD_SECONDS.
+    """
+    global _index, _index_checked_at
+    now = time.monotonic()
+    if _index is not None and now - _index_checked_at < VECTOR_INDEX_RELOAD_SECONDS:
+        return _index
+    with _index_lock:
+        _index_checked_at = now
+        manifest = os.path.join(path, "manifest.json")
+        if not os.path.exists(manifest):
+            return _index
+        with open(manifest, encoding="utf-8") as f:
+            built_at = json.load(f)["built_at"]
+        if _index is None or _index.manifest["built_at"] != built_at:
+            previous, _index = _index, VectorIndex(path)
+            print(f"Vector index: loaded {_index.count} documents from {path}.")
+            if previous is not None:
+                previous.retire()
+    return _index
+
+
+@contextmanager
+def reading_vector_index(path: str = VECTOR_INDEX_PATH):
+    """
+    The current snapshot (or None), kept open until the block exits even if
+    a newer snapshot replaces it in the meantime.
+    """
+    while True:
+        index = get_vector_index(path)
+        if index is None or index.acquire():
+            break
+        # Retired between get_vector_index() and acquire(); the newer one is loaded.
+    try:
+        yield index
+    finally:
+        if index is not None:
+            index.release()
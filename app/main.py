@@ -1,16 +1,35 @@
 import json
+import asyncio
+from typing import AsyncIterator, Optional
 from fastapi import FastAPI, HTTPException, File, UploadFile, Form
-from app.core.resume_parser import (
-    parse_pdf_to_text,
-    preprocess_text,
-    parse_text_to_json,
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.core.resume_cache import get_or_extract_text_async, get_or_run_intake
+from app.core.resume_parser import MAX_UPLOAD_BYTES, PDFLimitError
+from app.core.prompt_builder import compact_json
+from orchestrator import run_analysis_stages, stream_analysis_events
+from app.services.llm_cache import llm_cache
+from app.services.resilience import CircuitOpenError, policy_stats
+from app.services.gemini_quota import QuotaError, gemini_lane, quota_scheduler
+from app.services.job_queue import JobQueue, QueueFullError, create_job_store
+from app.services.batch_analyzer import (
+    BATCH_MAX_RESUMES,
+    BATCH_MAX_UPLOAD_BYTES,
+    BatchError,
+    BatchTooLargeError,
+    analyze_batch,
+    collect_pdfs,
 )
-from orchestrator import run_analysis_pipeline
+from app.services.warmup import WARMUP_ON_STARTUP, readiness, run_warmup
 from app.services.generator_service import (
-    generate_cover_letter,
-    generate_resume_summary,
+    generate_cover_letter_async,
+    generate_resume_summary_async,
 )
 
+# Idle SSE connections get a comment line this often so proxies keep them open.
+SSE_HEARTBEAT_SECONDS = 15
+UPLOAD_CHUNK_BYTES = 256 * 1024
+
 app = FastAPI(
     title="Multi-Agent AI Resume Insight Assistant",
     description="An advanced API using a team of AI agents for real-time resume analysis.",
@@ -22,6 +41,54 @@ def read_root():
     return {"status": "API is running"}
 
 
+@app.get("/ready", tags=["Health Check"])
+def read_readiness():
+    """
+    503 until the startup warm-up (Gemini client, PDF worker pool, knowledge
+    base) has completed successfully, so load balancers hold traffic until then.
+    """
+    ready, steps = readiness()
+    return JSONResponse(
+        status_code=200 if ready else 503, content={"ready": ready, "steps": steps}
+    )
+
+
+_warmup_task = None
+
+
+@app.on_event("startup")
+async def start_warmup():
+    # In the background, so the process accepts connections (and answers
+    # liveness checks on "/") while the heavy clients are being loaded.
+    global _warmup_task
+    if WARMUP_ON_STARTUP:
+        _warmup_task = asyncio.create_task(run_warmup())
+
+
+@app.get("/cache-stats/", tags=["Health Check"])
+def read_cache_stats():
+    """Hit/miss counters for the LLM response cache."""
+    return {"llm_cache": llm_cache.stats()}
+
+
+@app.get("/dependency-stats/", tags=["Health Check"])
+def read_dependency_stats():
+    """
+    Attempts, retries, hedges, failures and circuit state per external
+    dependency, and the shared Gemini quota with its lanes.
+    """
+    return {**policy_stats(), "gemini_quota": quota_scheduler.stats()}
+
+
+def _unavailable(error: CircuitOpenError | QuotaError) -> HTTPException:
+    """503 for a dependency whose circuit breaker is open or whose quota is spent."""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(int(error.retry_after))},
+    )
+
+
 @app.post("/generate-cover-letter/", tags=["Document Generation"])
 async def create_cover_letter(
     resume_text: str = Form(...),
@@ -31,10 +98,12 @@ async def create_cover_letter(
 ):
     """Generates a tailored cover letter from raw resume text and a job description."""
     try:
-        cover_letter = generate_cover_letter(
+        cover_letter = await generate_cover_letter_async(
             resume_text, job_description, company, job_title
         )
         return {"cover_letter": cover_letter}
+    except (CircuitOpenError, QuotaError) as e:
+        raise _unavailable(e)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to generate cover letter: {str(e)}"
@@ -47,8 +116,10 @@ async def create_resume_summary(
 ):
     """Generates an ATS-optimized professional summary from raw resume text."""
     try:
-        summary = generate_resume_summary(resume_text, job_description)
+        summary = await generate_resume_summary_async(resume_text, job_description)
         return {"resume_summary": summary}
+    except (CircuitOpenError, QuotaError) as e:
+        raise _unavailable(e)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to generate resume summary: {str(e)}"
@@ -67,39 +138,15 @@ async def process_resume_with_multi_agent_system(file: UploadFile = File(...)):
             status_code=400, detail="Invalid file type. Please upload a PDF."
         )
 
+    pdf_bytes = await _read_upload(file)
     try:
-        # Step 1: Standard PDF parsing and text preprocessing
-        pdf_bytes = await file.read()
-        raw_text = parse_pdf_to_text(pdf_bytes)
-        processed_text = preprocess_text(raw_text)
-
-        if not processed_text:
-            raise HTTPException(
-                status_code=500, detail="Could not extract text from the PDF."
-            )
-
-        # Step 2: Use the AI parser to get structured JSON data from the text
-        structured_resume = parse_text_to_json(processed_text)
-        if "error" in structured_resume:
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to parse resume text into a structured format.",
-            )
-
-        # Step 3: HAND OFF TO THE ORCHESTRATOR
-        # This single function call kicks off the entire multi-agent workflow.
-        # We pass the structured resume as a formatted JSON string.
-        final_report = run_analysis_pipeline(json.dumps(structured_resume, indent=2))
-
-        # Return both the final report and the structured data that was extracted
-        return {
-            "final_analysis_report": final_report,
-            "structured_resume_data": structured_resume,
-        }
+        return await _analyze_pdf(pdf_bytes)
 
     except HTTPException as he:
         # Re-raise known exceptions to ensure FastAPI handles them correctly
         raise he
+    except (CircuitOpenError, QuotaError) as e:
+        raise _unavailable(e)
     except Exception as e:
         # Catch any other unexpected errors during the complex pipeline
         print(f"An unexpected error occurred in the multi-agent pipeline: {e}")
@@ -107,3 +154,254 @@ async def process_resume_with_multi_agent_system(file: UploadFile = File(...)):
             status_code=500,
             detail=f"An unexpected error occurred during analysis: {str(e)}",
         )
+
+
+async def _read_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Reads an upload (already spooled to disk by Starlette) in chunks, rejecting
+    it with 413 as soon as it exceeds `max_bytes` rather than after buffering it all.
+    """
+    too_large = HTTPException(
+        status_code=413, detail=f"File too large (max {max_bytes} bytes)."
+    )
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+    chunks = []
+    total = 0
+    while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+        total += len(chunk)
+        if total > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def _analyze_pdf(pdf_bytes: bytes) -> dict:
+    """Runs parsing and the multi-agent pipeline on one resume PDF."""
+    # Step 1: Standard PDF parsing and text preprocessing (cached by file hash),
+    # extracted in the PDF process pool so the event loop stays free
+    try:
+        processed_text = await get_or_extract_text_async(pdf_bytes)
+    except PDFLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    if not processed_text:
+        raise HTTPException(
+            status_code=500, detail="Could not extract text from the PDF."
+        )
+
+    # Step 2: Structure the text (local rules first; when they fall short, one
+    # intake call also returns seniority and search queries; skipped entirely
+    # when the same resume text was structured before)
+    structured_resume, intake = await run_in_threadpool(
+        get_or_run_intake, processed_text, pdf_bytes
+    )
+    if "error" in structured_resume:
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to parse resume text into a structured format.",
+        )
+
+    # Step 3: HAND OFF TO THE ORCHESTRATOR
+    # This single function call kicks off the entire multi-agent workflow.
+    # We pass the structured resume as compact JSON (no indentation or empty fields).
+    results, timings = await run_analysis_stages(
+        compact_json(structured_resume), intake=intake
+    )
+
+    # Return both the final report and the structured data that was extracted
+    return {
+        "final_analysis_report": results["final_report"],
+        "structured_resume_data": structured_resume,
+        "stage_timings_seconds": {
+            name: round(seconds, 3) for name, seconds in timings.items()
+        },
+    }
+
+
+def _sse(event: str, data) -> str:
+    """Formats one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _with_heartbeat(events: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Passes events through, emitting an SSE comment whenever the stream goes quiet."""
+    iterator = events.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=SSE_HEARTBEAT_SECONDS)
+            if not done:
+                yield ": keep-alive\n\n"
+                continue
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                return
+            pending = None
+            yield item
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def _analysis_event_stream(pdf_bytes: bytes) -> AsyncIterator[str]:
+    """The streaming counterpart of process_resume_with_multi_agent_system."""
+    yield _sse("stage", {"stage": "upload", "status": "finished"})
+    try:
+        yield _sse("stage", {"stage": "parse", "status": "started"})
+        try:
+            processed_text = await get_or_extract_text_async(pdf_bytes)
+        except PDFLimitError as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        if not processed_text:
+            yield _sse("error", {"detail": "Could not extract text from the PDF."})
+            return
+
+        structured_resume, intake = await run_in_threadpool(
+            get_or_run_intake, processed_text, pdf_bytes
+        )
+        if "error" in structured_resume:
+            yield _sse(
+                "error",
+                {"detail": "Failed to parse resume text into a structured format."},
+            )
+            return
+        yield _sse("stage", {"stage": "parse", "status": "finished"})
+        yield _sse("structured_resume", structured_resume)
+
+        async for event in stream_analysis_events(
+            compact_json(structured_resume), intake
+        ):
+            yield _sse(event["event"], event["data"])
+    except Exception as e:
+        print(f"An unexpected error occurred in the streaming pipeline: {e}")
+        yield _sse("error", {"detail": f"An unexpected error occurred during analysis: {e}"})
+
+
+@app.post("/analyze-resume-with-live-data/stream", tags=["Multi-Agent Analysis"])
+async def stream_resume_analysis(file: UploadFile = File(...)):
+    """
+    Streaming variant of /analyze-resume-with-live-data/ using Server-Sent Events.
+
+    Emits "stage" events as the pipeline advances, a "structured_resume" event,
+    "report" events carrying the final report text as it is generated, and a
+    closing "done" event (or an "error" event).
+    """
+    if file.content_type != "application/pdf":
+        raise HTTPException(
+            status_code=400, detail="Invalid file type. Please upload a PDF."
+        )
+    pdf_bytes = await _read_upload(file)
+    return StreamingResponse(
+        _with_heartbeat(_analysis_event_stream(pdf_bytes)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/analyze-resumes/batch/", tags=["Multi-Agent Analysis"])
+async def analyze_resume_batch(files: list[UploadFile] = File(...)):
+    """
+    Analyzes many resumes in one request. Accepts several PDFs and/or zip files
+    of PDFs and streams newline-delimited JSON: one record per resume as it
+    finishes, then a final {"summary": ...} record.
+    """
+    resumes = []
+    try:
+        for upload in files:
+            filename = upload.filename or "resume.pdf"
+            max_bytes = (
+                BATCH_MAX_UPLOAD_BYTES
+                if filename.lower().endswith(".zip")
+                else MAX_UPLOAD_BYTES
+            )
+            data = await _read_upload(upload, max_bytes)
+            resumes.extend(collect_pdfs(filename, data, BATCH_MAX_RESUMES - len(resumes)))
+    except BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not resumes:
+        raise HTTPException(status_code=400, detail="No PDF files found in the upload.")
+    if len(resumes) > BATCH_MAX_RESUMES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many resumes in one batch (max {BATCH_MAX_RESUMES}).",
+        )
+
+    async def ndjson():
+        async for record in analyze_batch(resumes):
+            yield json.dumps(record) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+async def _analyze_queued_pdf(pdf_bytes: bytes) -> dict:
+    """Queued analyses are background work: their Gemini calls use the batch lane."""
+    with gemini_lane("batch"):
+        return await _analyze_pdf(pdf_bytes)
+
+
+# Created at startup rather than import: the SQLite backend opens its database
+# and creates its tables when the store is built.
+job_queue: Optional[JobQueue] = None
+
+
+@app.on_event("startup")
+async def start_job_queue():
+    global job_queue
+    job_queue = JobQueue(create_job_store(), handler=_analyze_queued_pdf)
+    await job_queue.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    if job_queue is not None:
+        await job_queue.stop()
+
+
+@app.post("/jobs/analyze-resume/", status_code=202, tags=["Background Jobs"])
+async def submit_resume_analysis_job(file: UploadFile = File(...)):
+    """
+    Queues a multi-agent resume analysis and returns a job id immediately.
+    Poll /jobs/{job_id} for status and /jobs/{job_id}/result for the report.
+    """
+    if file.content_type != "application/pdf":
+        raise HTTPException(
+            status_code=400, detail="Invalid file type. Please upload a PDF."
+        )
+    pdf_bytes = await _read_upload(file)
+    try:
+        job_id = await job_queue.submit(pdf_bytes)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/jobs/{job_id}", tags=["Background Jobs"])
+async def get_job_status(job_id: str):
+    """Returns the job's status and timestamps (without the result)."""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    job.pop("result", None)
+    return job
+
+
+@app.get("/jobs/{job_id}/result", tags=["Background Jobs"])
+async def get_job_result(job_id: str):
+    """Returns the analysis once the job has succeeded."""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    if job["status"] in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job is still {job['status']}.")
+    if job["status"] != "succeeded":
+        raise HTTPException(
+            status_code=500, detail=job.get("error") or f"Job {job['status']}."
+        )
+    return job["result"]
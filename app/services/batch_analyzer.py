@@ -0,0 +1,180 @@
+import asyncio
+import io
+import os
+import time
+import zipfile
+from typing import AsyncIterator
+from app.core.resume_cache import get_or_extract_text_async, get_or_run_intake
+from app.core.resume_parser import MAX_UPLOAD_BYTES
+from app.core.prompt_builder import compact_json
+from app.services.gemini_quota import gemini_lane
+from orchestrator import research_market, run_analysis_stages
+
+BATCH_MAX_RESUMES = int(os.getenv("BATCH_MAX_RESUMES", "500"))
+# Gemini stages (intake, seniority, profile, report) running at once across the
+# batch. Research and PDF extraction run outside this limit, so the pipeline
+# stays full while candidates wait for the LLM.
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+# Resumes being worked on at once; the rest wait, unextracted, in the batch.
+BATCH_MAX_IN_FLIGHT = int(os.getenv("BATCH_MAX_IN_FLIGHT", str(4 * BATCH_LLM_CONCURRENCY)))
+BATCH_MAX_UPLOAD_BYTES = int(os.getenv("BATCH_MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+# Cap on the uncompressed size of the PDFs in one zip, checked from the
+# archive's directory before anything is decompressed.
+BATCH_MAX_UNCOMPRESSED_BYTES = int(
+    os.getenv("BATCH_MAX_UNCOMPRESSED_BYTES", str(BATCH_MAX_RESUMES * MAX_UPLOAD_BYTES))
+)
+
+
+class BatchError(ValueError):
+    """Raised for an unusable batch upload (bad zip, too many files)."""
+
+
+class BatchTooLargeError(BatchError):
+    """Raised when a batch holds too many resumes or too many bytes (413)."""
+
+
+def collect_pdfs(
+    filename: str, data: bytes, max_resumes: int = BATCH_MAX_RESUMES
+) -> list[tuple[str, bytes]]:
+    """
+    Expands one uploaded file into (name, pdf_bytes) pairs; zips may hold many
+    PDFs. A zip's entry count and sizes are checked against the limits before
+    any entry is decompressed.
+    """
+    if not filename.lower().endswith(".zip"):
+        return [(filename, data)]
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise BatchError(f"'{filename}' is not a valid zip archive.")
+    with archive:
+        entries = [
+            info
+            for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(".pdf")
+        ]
+        if len(entries) > max_resumes:
+            raise BatchTooLargeError(
+                f"Too many resumes in one batch (max {BATCH_MAX_RESUMES})."
+            )
+        total = 0
+        for info in entries:
+            if info.file_size > MAX_UPLOAD_BYTES:
+                raise BatchTooLargeError(f"'{info.filename}' in '{filename}' is too large.")
+            total += info.file_size
+            if total > BATCH_MAX_UNCOMPRESSED_BYTES:
+                raise BatchTooLargeError(
+                    f"'{filename}' is too large uncompressed "
+                    f"(max {BATCH_MAX_UNCOMPRESSED_BYTES} bytes)."
+                )
+        # Reading stops at each entry's declared size, so the checks above hold.
+        return [(os.path.basename(info.filename), archive.read(info)) for info in entries]
+
+
+class SharedResearch:
+    """
+    Runs market research once per field within a batch: the first candidate in
+    a field starts it and every later candidate in that field awaits the same
+    result instead of issuing its own queries.
+    """
+
+    def __init__(self):
+        self._by_field: dict[str, asyncio.Future] = {}
+        self.shared_hits = 0
+
+    async def __call__(self, search_brief: dict) -> str:
+        field = (search_brief.get("primary_field") or "").strip().casefold()
+        if not field:
+            return await research_market(search_brief)
+        if field in self._by_field:
+            self.shared_hits += 1
+            return await asyncio.shield(self._by_field[field])
+        task = asyncio.ensure_future(research_market(search_brief))
+        self._by_field[field] = task
+        return await asyncio.shield(task)
+
+
+async def _analyze_one(
+    name: str, pdf_bytes: bytes, llm_slots: asyncio.Semaphore, research: SharedResearch
+) -> dict:
+    started = time.perf_counter()
+    try:
+        processed_text = await get_or_extract_text_async(pdf_bytes)
+        if not processed_text:
+            raise ValueError("Could not extract text from the PDF.")
+
+        async with llm_slots:
+            structured_resume, intake = await asyncio.to_thread(
+                get_or_run_intake, processed_text, pdf_bytes
+            )
+        if "error" in structured_resume:
+            raise ValueError("Failed to parse resume text into a structured format.")
+        results, timings = await run_analysis_stages(
+            compact_json(structured_resume),
+            research=research,
+            intake=intake,
+            llm_slots=llm_slots,
+        )
+        return {
+            "filename": name,
+            "status": "succeeded",
+            "final_analysis_report": results["final_report"],
+            "structured_resume_data": structured_resume,
+            "stage_timings_seconds": {k: round(v, 3) for k, v in timings.items()},
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+    except Exception as e:
+        print(f"Batch: analysis of '{name}' failed: {e}")
+        return {
+            "filename": name,
+            "status": "failed",
+            "error": str(e),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+
+async def analyze_batch(resumes: list[tuple[str, bytes]]) -> AsyncIterator[dict]:
+    """
+    Analyzes many resumes as a pipeline and yields each result as it finishes,
+    followed by a final {"summary": ...} record with throughput and failures.
+    """
+    started = time.perf_counter()
+    llm_slots = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+    research = SharedResearch()
+    waiting = iter(resumes)
+    finished: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        for name, pdf_bytes in waiting:
+            await finished.put(await _analyze_one(name, pdf_bytes, llm_slots, research))
+
+    # Tasks copy the current context, so all of their Gemini calls queue in
+    # the batch lane behind interactive and single-resume requests.
+    with gemini_lane("batch"):
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(BATCH_MAX_IN_FLIGHT, len(resumes)))
+        ]
+    failures = []
+    try:
+        for _ in resumes:
+            result = await finished.get()
+            if result["status"] == "failed":
+                failures.append({"filename": result["filename"], "error": result["error"]})
+            yield result
+    finally:
+        for task in workers:
+            task.cancel()
+
+    elapsed = time.perf_counter() - started
+    yield {
+        "summary": {
+            "total": len(resumes),
+            "succeeded": len(resumes) - len(failures),
+            "failed": len(failures),
+            "failures": failures,
+            "elapsed_seconds": round(elapsed, 3),
+            "resumes_per_minute": round(len(resumes) / elapsed * 60, 2) if elapsed else None,
+            "shared_research_hits": research.shared_hits,
+        }
+    }
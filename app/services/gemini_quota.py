@@ -0,0 +1,282 @@
+import asyncio
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from app.core.disk_cache import CACHE_DIR
+
+# The project's Gemini quota, shared by every worker process on the host.
+# Set either to 0 to disable that limit.
+GEMINI_RPM_LIMIT = float(os.getenv("GEMINI_RPM_LIMIT", "300"))
+GEMINI_TPM_LIMIT = float(os.getenv("GEMINI_TPM_LIMIT", "1000000"))
+# Output tokens are unknown up front; this is charged and corrected afterwards.
+GEMINI_EXPECTED_OUTPUT_TOKENS = int(os.getenv("GEMINI_EXPECTED_OUTPUT_TOKENS", "1024"))
+GEMINI_QUOTA_MAX_WAIT_SECONDS = float(os.getenv("GEMINI_QUOTA_MAX_WAIT_SECONDS", "300"))
+
+# Lanes in priority order, each with the share of both buckets it must leave
+# untouched. Only interactive requests may take the last 10%, and batch work
+# stops at 30%, so short interactive generations are never starved by it.
+LANE_RESERVES = {"interactive": 0.0, "analysis": 0.1, "batch": 0.3}
+CALL_SITE_LANES = {"cover_letter": "interactive", "resume_summary": "interactive"}
+DEFAULT_LANE = "analysis"
+_POLL_SECONDS = 0.25
+
+_lane: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("gemini_lane", default=None)
+
+
+@contextmanager
+def gemini_lane(lane: str):
+    """Runs the enclosed code (and the tasks and threads it starts) in `lane`."""
+    token = _lane.set(lane)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def lane_for(call_site: str) -> str:
+    """
+    The caller's lane if one was set, else the call site's. Read it in the
+    calling thread: work handed to the Gemini client loop does not inherit
+    the caller's context.
+    """
+    return _lane.get() or CALL_SITE_LANES.get(call_site, DEFAULT_LANE)
+
+
+# Retry-After for a request the API still rate limited after its retries;
+# Gemini's quotas are per minute.
+RATE_LIMIT_RETRY_AFTER_SECONDS = 60.0
+
+
+class QuotaError(RuntimeError):
+    """The Gemini quota is spent; callers should retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaWaitTimeout(QuotaError):
+    """Raised when a request could not get quota within the maximum wait."""
+
+    def __init__(self, lane: str, retry_after: float):
+        super().__init__(
+            f"No Gemini quota for the {lane} lane within "
+            f"{GEMINI_QUOTA_MAX_WAIT_SECONDS:.0f}s; retry in {retry_after:.0f}s.",
+            retry_after,
+        )
+        self.lane = lane
+
+
+class RateLimitedError(QuotaError):
+    """
+    A 429 from the API. Not retryable by the resilience policy and not a
+    breaker failure: the request queues for quota again instead, and this is
+    raised to the caller once its retries are used up.
+    """
+
+    def __init__(self, error: Exception, retry_after: float = RATE_LIMIT_RETRY_AFTER_SECONDS):
+        super().__init__(f"Gemini rate limited the request: {error}", retry_after)
+        self.error = error
+
+
+class SharedTokenBuckets:
+    """
+    Token buckets kept in SQLite, so every worker process draws from the same
+    quota. Each bucket holds up to `capacity` and refills at `capacity` per
+    minute; a take succeeds only if every bucket can afford it without going
+    below its lane's reserve, and is applied atomically across processes.
+    """
+
+    def __init__(self, limits: dict[str, float], filename: str = "gemini_quota.sqlite3"):
+        self.limits = {name: limit for name, limit in limits.items() if limit > 0}
+        self.path = os.path.join(CACHE_DIR, filename)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    level REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def _levels(self, conn: sqlite3.Connection, now: float) -> dict[str, float]:
+        """Current (refilled) level of every bucket; call inside a transaction."""
+        rows = dict(
+            (name, (level, updated_at))
+            for name, level, updated_at in conn.execute("SELECT name, level, updated_at FROM buckets")
+        )
+        levels = {}
+        for name, capacity in self.limits.items():
+            level, updated_at = rows.get(name, (capacity, now))
+            levels[name] = min(capacity, level + (now - updated_at) * capacity / 60.0)
+        return levels
+
+    def _store(self, conn: sqlite3.Connection, levels: dict[str, float], now: float) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO buckets (name, level, updated_at) VALUES (?, ?, ?)",
+            [(name, level, now) for name, level in levels.items()],
+        )
+
+    def try_take(self, amounts: dict[str, float], reserve: float = 0.0) -> float:
+        """
+        Takes `amounts` from the buckets if all of them can afford it; returns
+        0, or else the seconds until they should be able to.
+        """
+        amounts = {
+            name: min(amount, self.limits[name] * (1 - reserve))
+            for name, amount in amounts.items()
+            if name in self.limits
+        }
+        if not amounts:
+            return 0.0
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                levels = self._levels(conn, now)
+                wait = 0.0
+                for name, amount in amounts.items():
+                    floor = self.limits[name] * reserve
+                    shortfall = floor + amount - levels[name]
+                    if shortfall > 0:
+                        wait = max(wait, shortfall * 60.0 / self.limits[name])
+                if wait == 0:
+                    for name, amount in amounts.items():
+                        levels[name] -= amount
+                    self._store(conn, levels, now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def adjust(self, name: str, delta: float) -> None:
+        """Returns (positive) or charges (negative) `delta` to one bucket."""
+        self._update(lambda levels: levels.__setitem__(name, levels[name] + delta), name)
+
+    def drain(self) -> None:
+        """Empties every bucket, e.g. after a 429 says the real quota is spent."""
+        self._update(lambda levels: levels.update({name: 0.0 for name in levels}))
+
+    def _update(self, change, name: Optional[str] = None) -> None:
+        if not self.limits or (name is not None and name not in self.limits):
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                levels = self._levels(conn, now)
+                change(levels)
+                for key, capacity in self.limits.items():
+                    levels[key] = min(capacity, levels[key])
+                self._store(conn, levels, now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def levels(self) -> dict[str, float]:
+        with self._lock:
+            conn = self._connect()
+            return {name: round(level, 1) for name, level in self._levels(conn, time.time()).items()}
+
+
+class QuotaScheduler:
+    """
+    Admits Gemini requests against the shared requests-per-minute and
+    tokens-per-minute buckets. Within a process, a lane waits while any
+    higher-priority lane has requests waiting; across processes, the lane
+    reserves keep the last share of the quota for higher lanes.
+    """
+
+    def __init__(self, buckets: SharedTokenBuckets):
+        self.buckets = buckets
+        self._waiting = {lane: 0 for lane in LANE_RESERVES}
+        self._waiting_lock = threading.Lock()
+        self._counts = {lane: {"admitted": 0, "waited_seconds": 0.0} for lane in LANE_RESERVES}
+
+    def _blocked_by_higher_lane(self, lane: str) -> bool:
+        with self._waiting_lock:
+            for other in LANE_RESERVES:
+                if other == lane:
+                    return False
+                if self._waiting[other]:
+                    return True
+        return False
+
+    async def acquire(self, lane: str, tokens: int) -> None:
+        """Waits until one request of `tokens` tokens fits in `lane`'s share of the quota."""
+        if not self.buckets.limits:
+            return
+        started = time.monotonic()
+        with self._waiting_lock:
+            self._waiting[lane] += 1
+        try:
+            while True:
+                if not self._blocked_by_higher_lane(lane):
+                    wait = await asyncio.to_thread(
+                        self.buckets.try_take,
+                        {"requests": 1, "tokens": tokens},
+                        LANE_RESERVES[lane],
+                    )
+                    if wait == 0:
+                        break
+                else:
+                    wait = _POLL_SECONDS
+                waited = time.monotonic() - started
+                if waited + wait > GEMINI_QUOTA_MAX_WAIT_SECONDS:
+                    raise QuotaWaitTimeout(lane, max(wait, 1.0))
+                await asyncio.sleep(min(wait, _POLL_SECONDS * 4))
+        finally:
+            with self._waiting_lock:
+                self._waiting[lane] -= 1
+        self._counts[lane]["admitted"] += 1
+        self._counts[lane]["waited_seconds"] += time.monotonic() - started
+
+    async def settle(self, charged_tokens: int, used_tokens: Optional[int]) -> None:
+        """Corrects the token bucket once the response reports its real usage."""
+        if used_tokens is not None and used_tokens != charged_tokens:
+            await asyncio.to_thread(self.buckets.adjust, "tokens", charged_tokens - used_tokens)
+
+    async def rate_limited(self) -> None:
+        """The API answered 429: empty the buckets so every worker backs off."""
+        print("Gemini quota: rate limited by the API, draining the shared buckets.")
+        await asyncio.to_thread(self.buckets.drain)
+
+    def stats(self) -> dict:
+        return {
+            "limits": self.buckets.limits,
+            "levels": self.buckets.levels() if self.buckets.limits else {},
+            "lanes": {
+                lane: {
+                    "waiting": self._waiting[lane],
+                    "admitted": counts["admitted"],
+                    "waited_seconds": round(counts["waited_seconds"], 3),
+                }
+                for lane, counts in self._counts.items()
+            },
+        }
+
+
+quota_scheduler = QuotaScheduler(
+    SharedTokenBuckets({"requests": GEMINI_RPM_LIMIT, "tokens": GEMINI_TPM_LIMIT})
+)
@@ -1,25 +1,281 @@
 import os
-import google.generativeai as genai
+import asyncio
+import threading
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Optional, TypeVar
 from dotenv import load_dotenv
+from app.core.prompt_builder import count_tokens
+from app.services.gemini_quota import (
+    GEMINI_EXPECTED_OUTPUT_TOKENS,
+    RateLimitedError,
+    lane_for,
+    quota_scheduler,
+)
+from app.services.llm_cache import llm_cache, make_cache_key
+from app.services.resilience import ResiliencePolicy, register_policy
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
 
 load_dotenv()  # Load environment variables from .env
 
+T = TypeVar("T")
+
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash")
+# Upper bound on Gemini generations in flight at once, shared by every caller.
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+# Per-attempt deadline and retries for transient errors (timeouts, 429, 5xx).
+# Hedging duplicates slow generations, so it costs tokens and is off by default.
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "60"))
+GEMINI_RETRIES = int(os.getenv("GEMINI_RETRIES", "2"))
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "false").lower() == "true"
+
+_policy = register_policy(
+    ResiliencePolicy(
+        "gemini", timeout=GEMINI_TIMEOUT_SECONDS, retries=GEMINI_RETRIES, hedge=GEMINI_HEDGE
+    )
+)
+
+_model = None
+_model_lock = threading.Lock()
+
+# All Gemini traffic runs on one dedicated event loop so the async gRPC channel,
+# the configured model and the concurrency semaphore are created once and shared
+# by sync callers (worker threads) and async callers (FastAPI handlers) alike.
+_client_loop = None
+_client_loop_lock = threading.Lock()
+_semaphore = None
+
 
 def configure_gemini():
     """Configures the Gemini API with the key."""
     api_key = os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("GOOGLE_API_KEY not found in environment variables.")
+    # The SDK takes about a second to import, so it is loaded on first use
+    # rather than by every process that imports this module.
+    import google.generativeai as genai
+
     genai.configure(api_key=api_key)
 
 
-def get_gemini_response(prompt: str) -> str:
-    """Generates a response from the Gemini model."""
+def _get_model() -> "genai.GenerativeModel":
+    """Returns the shared, configured Gemini model, creating it on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                configure_gemini()
+                import google.generativeai as genai
+
+                _model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    return _model
+
+
+def _get_client_loop() -> asyncio.AbstractEventLoop:
+    """Starts (once) the background event loop that owns all Gemini calls."""
+    global _client_loop
+    if _client_loop is None:
+        with _client_loop_lock:
+            if _client_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="gemini-client", daemon=True
+                )
+                thread.start()
+                _client_loop = loop
+    return _client_loop
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Returns the in-flight limiter. Only ever used on the client loop."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+
+
+async def _call_model(prompt: str, generation_config: Optional[dict], stream: bool = False):
     try:
-        configure_gemini()
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        return response.text
+        return await _get_model().generate_content_async(
+            prompt, generation_config=generation_config, stream=stream
+        )
     except Exception as e:
-        print(f"An error occurred: {e}")
-        return "Error: Could not generate a response."
+        if _is_rate_limited(e):
+            raise RateLimitedError(e) from e
+        raise
+
+
+async def _request(prompt: str, generation_config: Optional[dict]):
+    """One attempt, holding a concurrency slot only while it is in flight."""
+    async with _get_semaphore():
+        return await _call_model(prompt, generation_config)
+
+
+def _used_tokens(response) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", None) or None
+
+
+async def _admit(prompt: str, lane: str) -> int:
+    """Waits for quota in `lane`; returns the tokens charged for the request."""
+    tokens = count_tokens(prompt) + GEMINI_EXPECTED_OUTPUT_TOKENS
+    await quota_scheduler.acquire(lane, tokens)
+    return tokens
+
+
+async def _with_quota(prompt: str, lane: str, attempt: Callable[[], Awaitable[T]]) -> tuple[T, int]:
+    """
+    Runs `attempt()` once the quota scheduler admits the request in `lane`.
+    On a 429 the shared buckets are drained and the request queues for quota
+    again, in the same lane, before it is retried; once the retries are used
+    up, RateLimitedError (a QuotaError) reaches the caller. Returns (result,
+    tokens charged).
+    """
+    for retry in range(GEMINI_RETRIES + 1):
+        charged = await _admit(prompt, lane)
+        try:
+            return await attempt(), charged
+        except RateLimitedError:
+            await quota_scheduler.rate_limited()
+            if retry >= GEMINI_RETRIES:
+                raise
+            print(f"Gemini: rate limited; queueing again in the {lane} lane.")
+    raise AssertionError("unreachable")
+
+
+async def _generate(
+    prompt: str, call_site: str, generation_config: Optional[dict], lane: str
+) -> str:
+    """
+    Runs one generation on the client loop once the quota scheduler admits it
+    in `lane`, bounded by the semaphore, retried under the Gemini resilience
+    policy and cached. Raises when it fails.
+    """
+    key = make_cache_key(GEMINI_MODEL_NAME, generation_config, prompt)
+    cached = await asyncio.to_thread(llm_cache.get, key, call_site)
+    if cached is not None:
+        return cached
+
+    try:
+        response, charged = await _with_quota(
+            prompt, lane, lambda: _policy.call(lambda: _request(prompt, generation_config))
+        )
+        text = response.text
+    except Exception as e:
+        print(f"Gemini: {call_site} generation failed: {e!r}")
+        raise
+    await quota_scheduler.settle(charged, _used_tokens(response))
+    await asyncio.to_thread(llm_cache.set, key, text, call_site)
+    return text
+
+
+async def get_gemini_response_async(
+    prompt: str,
+    call_site: str = "default",
+    generation_config: Optional[dict] = None,
+) -> str:
+    """Generates a response from the Gemini model without blocking the caller's loop."""
+    future = asyncio.run_coroutine_threadsafe(
+        _generate(prompt, call_site, generation_config, lane_for(call_site)),
+        _get_client_loop(),
+    )
+    return await asyncio.wrap_future(future)
+
+
+def get_gemini_response(
+    prompt: str,
+    call_site: str = "default",
+    generation_config: Optional[dict] = None,
+) -> str:
+    """Generates a response from the Gemini model (blocking wrapper for sync callers)."""
+    future = asyncio.run_coroutine_threadsafe(
+        _generate(prompt, call_site, generation_config, lane_for(call_site)),
+        _get_client_loop(),
+    )
+    return future.result()
+
+
+async def _generate_stream(
+    prompt: str,
+    call_site: str,
+    generation_config: Optional[dict],
+    lane: str,
+    emit,
+) -> None:
+    """
+    Streams one generation on the client loop, handing each text chunk to
+    `emit` (thread-safe), then the exception if it failed, then `None`. Only
+    opening the stream is retried; the full text is cached.
+    """
+    key = make_cache_key(GEMINI_MODEL_NAME, generation_config, prompt)
+    try:
+        cached = await asyncio.to_thread(llm_cache.get, key, call_site)
+        if cached is not None:
+            emit(cached)
+            return
+
+        parts = []
+
+        async def attempt():
+            async with _get_semaphore():
+                response = await _policy.call(
+                    lambda: _call_model(prompt, generation_config, stream=True)
+                )
+                # Only opening the stream raises RateLimitedError, so a retry
+                # never repeats chunks that were already emitted.
+                async for chunk in response:
+                    parts.append(chunk.text)
+                    emit(chunk.text)
+                return response
+
+        try:
+            response, charged = await _with_quota(prompt, lane, attempt)
+        except Exception as e:
+            print(f"Gemini: {call_site} stream failed: {e!r}")
+            emit(e)
+            return
+
+        await quota_scheduler.settle(charged, _used_tokens(response))
+        await asyncio.to_thread(llm_cache.set, key, "".join(parts), call_site)
+    finally:
+        emit(None)
+
+
+async def stream_gemini_response_async(
+    prompt: str,
+    call_site: str = "default",
+    generation_config: Optional[dict] = None,
+) -> AsyncIterator[str]:
+    """
+    Yields the Gemini response text chunk by chunk as it is generated; raises
+    if the generation fails, including part-way through.
+    """
+    caller_loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(chunk):
+        try:
+            caller_loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        except RuntimeError:
+            pass  # The caller's loop has already shut down.
+
+    future = asyncio.run_coroutine_threadsafe(
+        _generate_stream(prompt, call_site, generation_config, lane_for(call_site), emit),
+        _get_client_loop(),
+    )
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield chunk
+    finally:
+        # Stops the generation if the consumer goes away (e.g. client disconnect).
+        future.cancel()
@@ -1,11 +1,11 @@
-from app.services.gemini_service import get_gemini_response
+from app.core.prompt_builder import PromptSection, build_prompt
+from app.services.gemini_service import (
+    get_gemini_response,
+    get_gemini_response_async,
+)
 
 
-def generate_cover_letter(
-    resume_text: str, job_description: str, company: str, job_title: str
-) -> str:
-    """Generates a tailored cover letter."""
-    prompt = f"""
+COVER_LETTER_PROMPT = """
     You are a professional career coach and expert resume writer.
     Your task is to write a compelling and professional cover letter based on the provided resume and job description.
 
@@ -22,12 +22,8 @@ def generate_cover_letter(
     4.  In the final paragraph, reiterate interest and include a call to action (e.g., "I am eager to discuss how my skills in [Key Skill 1] and [Key Skill 2] can benefit your team.").
     5.  Maintain a professional and confident tone.
     """
-    return get_gemini_response(prompt)
 
-
-def generate_resume_summary(resume_text: str, job_description: str) -> str:
-    """Generates a tailored professional summary for a resume."""
-    prompt = f"""
+RESUME_SUMMARY_PROMPT = """
     You are an expert resume writer specializing in ATS optimization.
     Your task is to write a powerful, 3-4 sentence "Professional Summary" for a resume, tailored specifically to the provided job description.
 
@@ -43,4 +39,59 @@ def generate_resume_summary(resume_text: str, job_description: str) -> str:
     3.  Frame the candidate's experience in a way that directly addresses the needs outlined in the job description.
     4.  The output should be a single paragraph.
     """
-    return get_gemini_response(prompt)
+
+
+def build_cover_letter_prompt(
+    resume_text: str, job_description: str, company: str, job_title: str
+) -> str:
+    """Builds the prompt for a tailored cover letter."""
+    return build_prompt(
+        COVER_LETTER_PROMPT,
+        [
+            PromptSection("job_title", job_title, priority=3),
+            PromptSection("company", company, priority=3),
+            PromptSection("job_description", job_description, priority=1, min_tokens=500),
+            PromptSection("resume_text", resume_text, min_tokens=1000),
+        ],
+        call_site="cover_letter",
+    )
+
+
+def build_resume_summary_prompt(resume_text: str, job_description: str) -> str:
+    """Builds the prompt for a tailored professional summary."""
+    return build_prompt(
+        RESUME_SUMMARY_PROMPT,
+        [
+            PromptSection("job_description", job_description, priority=1, min_tokens=500),
+            PromptSection("resume_text", resume_text, min_tokens=1000),
+        ],
+        call_site="resume_summary",
+    )
+
+
+def generate_cover_letter(
+    resume_text: str, job_description: str, company: str, job_title: str
+) -> str:
+    """Generates a tailored cover letter."""
+    prompt = build_cover_letter_prompt(resume_text, job_description, company, job_title)
+    return get_gemini_response(prompt, call_site="cover_letter")
+
+
+async def generate_cover_letter_async(
+    resume_text: str, job_description: str, company: str, job_title: str
+) -> str:
+    """Async variant of generate_cover_letter for use inside request handlers."""
+    prompt = build_cover_letter_prompt(resume_text, job_description, company, job_title)
+    return await get_gemini_response_async(prompt, call_site="cover_letter")
+
+
+def generate_resume_summary(resume_text: str, job_description: str) -> str:
+    """Generates a tailored professional summary for a resume."""
+    prompt = build_resume_summary_prompt(resume_text, job_description)
+    return get_gemini_response(prompt, call_site="resume_summary")
+
+
+async def generate_resume_summary_async(resume_text: str, job_description: str) -> str:
+    """Async variant of generate_resume_summary for use inside request handlers."""
+    prompt = build_resume_summary_prompt(resume_text, job_description)
+    return await get_gemini_response_async(prompt, call_site="resume_summary")
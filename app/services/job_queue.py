@@ -0,0 +1,369 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+from app.core.disk_cache import CACHE_DIR
+
+JOB_BACKEND = os.getenv("JOB_BACKEND", "memory")  # "memory" or "sqlite"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
+# A job still waiting after this long is expired instead of run.
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "900"))
+# Finished jobs (and their results) are kept this long for polling.
+JOB_RESULT_RETENTION_SECONDS = float(os.getenv("JOB_RESULT_RETENTION_SECONDS", "3600"))
+# How often idle workers re-check a shared (SQLite) backend for new jobs.
+JOB_POLL_SECONDS = 0.5
+# Running jobs are touched this often by their process; one whose heartbeat is
+# older than JOB_STALE_SECONDS belongs to a process that is gone.
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "15"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", str(4 * JOB_HEARTBEAT_SECONDS)))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, EXPIRED = (
+    "queued",
+    "running",
+    "succeeded",
+    "failed",
+    "expired",
+)
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when the queue is at capacity (backpressure)."""
+
+
+class InMemoryJobStore:
+    """Job records and pending payloads held in this process only."""
+
+    def __init__(self):
+        self._jobs: dict[str, dict] = {}
+        self._payloads: dict[str, Any] = {}
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+
+    def enqueue(self, job: dict, payload: Any, max_pending: int) -> bool:
+        with self._lock:
+            if len(self._pending) >= max_pending:
+                return False
+            self._jobs[job["id"]] = job
+            self._payloads[job["id"]] = payload
+            self._pending.append(job["id"])
+            return True
+
+    def claim(self) -> Optional[tuple[dict, Any]]:
+        with self._lock:
+            if not self._pending:
+                return None
+            job_id = self._pending.popleft()
+            job = self._jobs[job_id]
+            job["status"] = RUNNING
+            job["started_at"] = time.time()
+            return dict(job), self._payloads.pop(job_id)
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: str = None) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(status=status, result=result, error=error, finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.get("finished_at") and job["finished_at"] < finished_before
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+    def heartbeat(self) -> None:
+        pass  # Only this process runs these jobs.
+
+    def recover(self) -> int:
+        return 0  # Nothing survives a restart.
+
+
+class SqliteJobStore:
+    """
+    Job records and payloads in a local SQLite database, so any worker process
+    on the host can pick up, run and report on a job.
+    """
+
+    def __init__(self, filename: str = "jobs.sqlite3"):
+        self.path = os.path.join(CACHE_DIR, filename)
+        # Identifies the jobs this process claimed, for heartbeats and recovery.
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    payload BLOB,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    worker_id TEXT,
+                    heartbeat_at REAL
+                )
+                """
+            )
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("worker_id", "TEXT"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        job = {
+            key: row[key]
+            for key in row.keys()
+            if key not in ("payload", "worker_id", "heartbeat_at")
+        }
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, job: dict, payload: bytes, max_pending: int) -> bool:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock so the capacity check and
+            # the insert are atomic across processes.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                pending = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)
+                ).fetchone()[0]
+                if pending >= max_pending:
+                    self._conn.rollback()
+                    return False
+                self._conn.execute(
+                    "INSERT INTO jobs (id, status, payload, created_at) VALUES (?, ?, ?, ?)",
+                    (job["id"], QUEUED, payload, job["created_at"]),
+                )
+                self._conn.commit()
+                return True
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def claim(self) -> Optional[tuple[dict, bytes]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, started_at = ?, worker_id = ?, heartbeat_at = ?
+                WHERE id = (
+                    SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1
+                )
+                RETURNING *
+                """,
+                (RUNNING, now, self.worker_id, now, QUEUED),
+            ).fetchone()
+            self._conn.commit()
+        if row is None:
+            return None
+        return self._to_dict(row), row["payload"]
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: str = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, "
+                "payload = NULL WHERE id = ?",
+                (
+                    status,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                ),
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def purge(self, finished_before: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (finished_before,),
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def heartbeat(self) -> None:
+        """Marks the jobs this process is running as still alive."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND worker_id = ?",
+                (time.time(), RUNNING, self.worker_id),
+            )
+            self._conn.commit()
+
+    def recover(self) -> int:
+        """
+        Jobs left 'running' by a worker process that is gone (no heartbeat for
+        JOB_STALE_SECONDS) can't be resumed; fail them. Returns the count.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, payload = NULL "
+                "WHERE status = ? AND COALESCE(heartbeat_at, started_at) < ?",
+                (
+                    FAILED,
+                    "Interrupted: the worker running it stopped.",
+                    time.time(),
+                    RUNNING,
+                    time.time() - JOB_STALE_SECONDS,
+                ),
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+
+class JobQueue:
+    """
+    A bounded background job queue: submit() returns a job id immediately and a
+    fixed pool of asyncio workers runs the handler on each payload.
+    """
+
+    def __init__(
+        self,
+        store,
+        handler: Callable[[Any], Awaitable[Any]],
+        workers: int = JOB_WORKERS,
+        max_pending: int = JOB_QUEUE_MAX,
+        job_ttl_seconds: float = JOB_TTL_SECONDS,
+        retention_seconds: float = JOB_RESULT_RETENTION_SECONDS,
+    ):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.job_ttl_seconds = job_ttl_seconds
+        self.retention_seconds = retention_seconds
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self.store.recover)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._janitor(), name="job-janitor"))
+        self._tasks.append(asyncio.create_task(self._heartbeat(), name="job-heartbeat"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, payload: Any) -> str:
+        job = {"id": uuid.uuid4().hex, "status": QUEUED, "created_at": time.time()}
+        accepted = await asyncio.to_thread(
+            self.store.enqueue, job, payload, self.max_pending
+        )
+        if not accepted:
+            raise QueueFullError("The job queue is full. Please retry later.")
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job["id"]
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                await self._run_next()
+            except Exception as e:
+                # A store error must not end the worker task; back off and retry.
+                print(f"Job queue: worker error: {e}")
+                await asyncio.sleep(JOB_POLL_SECONDS)
+
+    async def _run_next(self) -> None:
+        claimed = await asyncio.to_thread(self.store.claim)
+        if claimed is None:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            return
+
+        job, payload = claimed
+        if time.time() - job["created_at"] > self.job_ttl_seconds:
+            await asyncio.to_thread(
+                self.store.finish, job["id"], EXPIRED, None, "Job expired before it could run."
+            )
+            return
+        try:
+            result = await self.handler(payload)
+        except asyncio.CancelledError:
+            # stop() was called mid-job; nothing will resume it.
+            self.store.finish(job["id"], FAILED, None, "Job was interrupted by a server shutdown.")
+            raise
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+            print(f"Job {job['id']} failed: {error}")
+            await asyncio.to_thread(self.store.finish, job["id"], FAILED, None, error)
+            return
+        await asyncio.to_thread(self.store.finish, job["id"], SUCCEEDED, result)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                await asyncio.to_thread(self.store.heartbeat)
+            except Exception as e:
+                print(f"Job queue: heartbeat failed: {e}")
+
+    async def _janitor(self) -> None:
+        while True:
+            await asyncio.sleep(60)
+            try:
+                removed = await asyncio.to_thread(
+                    self.store.purge, time.time() - self.retention_seconds
+                )
+                if removed:
+                    print(f"Job queue: purged {removed} finished jobs.")
+                # Another worker process may have died since startup.
+                recovered = await asyncio.to_thread(self.store.recover)
+                if recovered:
+                    print(f"Job queue: failed {recovered} jobs whose worker stopped.")
+            except Exception as e:
+                print(f"Job queue: janitor failed: {e}")
+
+
+def create_job_store(backend: str = JOB_BACKEND):
+    if backend == "sqlite":
+        return SqliteJobStore()
+    if backend == "memory":
+        return InMemoryJobStore()
+    raise ValueError(f"Unknown JOB_BACKEND '{backend}'. Use 'memory' or 'sqlite'.")
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Optional
+from app.core.disk_cache import DiskCache
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() != "false"
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+LLM_CACHE_DISK_ENTRIES = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "20000"))
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# How long a response stays valid, per prompt call site. Deterministic
+# extraction (parsing, classification) can live for days; advice that depends on
+# live market data should be refreshed more often. A TTL of 0 disables caching.
+CALL_SITE_TTLS = {
+    "default": HOUR,
+    "resume_parser": 7 * DAY,
+    "seniority": 7 * DAY,
+    "profiler": DAY,
+    "intake": DAY,
+    "rag_pre_analysis": DAY,
+    "rag_analysis": 6 * HOUR,
+    "chief_analyst": 6 * HOUR,
+    "synthesizer": 6 * HOUR,
+    "cover_letter": HOUR,
+    "resume_summary": HOUR,
+}
+
+
+def make_cache_key(model_name: str, generation_config: Optional[dict], prompt: str) -> str:
+    """Content address of a generation: model, generation parameters and prompt hash."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    material = json.dumps(
+        {"model": model_name, "params": generation_config or {}, "prompt": prompt_hash},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Two-tier response cache: an in-memory LRU in front of a SQLite store."""
+
+    def __init__(self, memory_entries: int, disk_entries: int):
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = DiskCache("llm_cache.sqlite3", max_entries=disk_entries)
+        self._stats: Counter = Counter()
+
+    def _ttl(self, call_site: str) -> float:
+        return CALL_SITE_TTLS.get(call_site, CALL_SITE_TTLS["default"])
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (value, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str, call_site: str = "default") -> Optional[str]:
+        if not LLM_CACHE_ENABLED or self._ttl(call_site) <= 0:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] >= now:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                self._stats[f"{call_site}.hits"] += 1
+                return entry[0]
+
+        disk_entry = self._disk.get_entry(key)
+        if disk_entry is not None and disk_entry[1] >= now:
+            self._remember(key, disk_entry[0], disk_entry[1])
+            with self._lock:
+                self._stats["disk_hits"] += 1
+                self._stats[f"{call_site}.hits"] += 1
+            return disk_entry[0]
+
+        with self._lock:
+            self._stats["misses"] += 1
+            self._stats[f"{call_site}.misses"] += 1
+        return None
+
+    def set(self, key: str, value: str, call_site: str = "default") -> None:
+        ttl = self._ttl(call_site)
+        if not LLM_CACHE_ENABLED or ttl <= 0:
+            return
+        self._remember(key, value, time.time() + ttl)
+        self._disk.set(key, value, ttl)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._stats.clear()
+        self._disk.clear()
+
+
+llm_cache = LLMCache(LLM_CACHE_MEMORY_ENTRIES, LLM_CACHE_DISK_ENTRIES)
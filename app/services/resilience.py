@@ -0,0 +1,296 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+# Exception class names (from httpx, requests, google.api_core and the
+# standard library) that mean "try again", so no client library has to be
+# imported to classify its errors.
+RETRYABLE_ERROR_NAMES = {
+    "TimeoutError",
+    "ConnectionError",
+    "ConnectionResetError",
+    "TimeoutException",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "WriteTimeout",
+    "PoolTimeout",
+    "ConnectError",
+    "ReadError",
+    "RemoteProtocolError",
+    "Timeout",
+    "DeadlineExceeded",
+    "ServiceUnavailable",
+    "ResourceExhausted",
+    "InternalServerError",
+    "TooManyRequests",
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling a dependency while its circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable; retry in {retry_after:.0f}s.")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, dropped connections, rate limits and 5xx responses."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None and isinstance(getattr(error, "code", None), int):
+        status = error.code
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, so calls fail fast
+    instead of waiting on a dependency that is down. After `reset_seconds` one
+    trial call is let through: success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = time.monotonic() - self._opened_at
+            if waited >= self.reset_seconds and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError(self.name, max(self.reset_seconds - waited, 1.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                print(f"Resilience: {self.name} recovered, circuit closed.")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """
+        Lets another call be the trial after one ended with neither success nor
+        failure (e.g. it was cancelled), so the circuit cannot stay half-open.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            reopen = self._trial_in_flight
+            self._trial_in_flight = False
+            if reopen or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                print(
+                    f"Resilience: {self.name} circuit opened after {self._failures} "
+                    f"failures; failing fast for {self.reset_seconds:.0f}s."
+                )
+
+
+class LatencyWindow:
+    """Recent successful call latencies, for the hedging delay."""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float, min_samples: int = 20) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class ResiliencePolicy:
+    """
+    How calls to one external dependency are made: each attempt is bounded by
+    `timeout`; retryable errors are retried up to `retries` times with
+    full-jitter exponential backoff; with `hedge`, an attempt still running at
+    the dependency's recent p95 latency gets a duplicate request and the first
+    success wins; and a circuit breaker fails calls fast while the dependency
+    is down. Only use `hedge` for idempotent calls.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge: bool = False,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        latency: Optional[LatencyWindow] = None,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_seconds)
+        # Policies for similar calls (e.g. pages on different sites) can share one.
+        self.latency = latency or LatencyWindow()
+        self._counts = {"attempts": 0, "retries": 0, "hedges": 0, "failures": 0, "rejected": 0}
+        self._counts_lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._counts_lock:
+            self._counts[key] += 1
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            counts = dict(self._counts)
+        p95 = self.latency.percentile(0.95)
+        return {
+            **counts,
+            "state": self.breaker.state,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+        }
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _before_call(self) -> None:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self._count("rejected")
+            raise
+        self._count("attempts")
+
+    def _after_failure(self, error: Exception, attempt: int) -> bool:
+        """Records a failed attempt; True if it should be retried."""
+        if not is_retryable(error):
+            # The request itself was bad; the dependency is fine.
+            self.breaker.record_success()
+            return False
+        self._count("failures")
+        self.breaker.record_failure()
+        if attempt >= self.retries or self.breaker.state == "open":
+            return False
+        self._count("retries")
+        print(f"Resilience: {self.name} attempt {attempt + 1} failed ({error!r}); retrying.")
+        return True
+
+    async def _attempt(self, make_call: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        hedge_after = self.latency.percentile(0.95) if self.hedge else None
+        tasks = {asyncio.ensure_future(make_call())}
+        error: Optional[BaseException] = None
+        try:
+            if hedge_after is not None and hedge_after < self.timeout:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    self._count("hedges")
+                    tasks.add(asyncio.ensure_future(make_call()))
+            while tasks:
+                remaining = self.timeout - (loop.time() - started)
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=max(remaining, 0), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError(f"{self.name} timed out after {self.timeout}s")
+                errors = [task.exception() for task in done]
+                for task, task_error in zip(done, errors):
+                    if task_error is None:
+                        self.latency.record(loop.time() - started)
+                        return task.result()
+                error = errors[0]
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(self, make_call: Callable[[], Awaitable[T]]) -> T:
+        """Runs `make_call()` (a coroutine factory, called once per attempt) under the policy."""
+        for attempt in range(self.retries + 1):
+            self._before_call()
+            try:
+                result = await self._attempt(make_call)
+            except Exception as e:
+                if not self._after_failure(e, attempt):
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+                continue
+            except BaseException:
+                # Cancelled (e.g. the client disconnected): no verdict on the dependency.
+                self.breaker.release_trial()
+                raise
+            self.breaker.record_success()
+            return result
+        raise AssertionError("unreachable")
+
+    def call_sync(self, func: Callable[[], T]) -> T:
+        """
+        Blocking counterpart of `call` without hedging; `func` must enforce
+        `self.timeout` itself (e.g. pass it to the HTTP client).
+        """
+        for attempt in range(self.retries + 1):
+            self._before_call()
+            started = time.monotonic()
+            try:
+                result = func()
+            except Exception as e:
+                if not self._after_failure(e, attempt):
+                    raise
+                time.sleep(self.backoff(attempt))
+                continue
+            except BaseException:
+                self.breaker.release_trial()
+                raise
+            self.latency.record(time.monotonic() - started)
+            self.breaker.record_success()
+            return result
+        raise AssertionError("unreachable")
+
+
+_policies: dict[str, ResiliencePolicy] = {}
+
+
+def register_policy(policy: ResiliencePolicy) -> ResiliencePolicy:
+    """Makes a policy's counters and breaker state visible in policy_stats()."""
+    _policies[policy.name] = policy
+    return policy
+
+
+def policy_stats() -> dict:
+    return {name: policy.stats() for name, policy in _policies.items()}
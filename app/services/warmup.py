@@ -0,0 +1,53 @@
+import asyncio
+import os
+import time
+from typing import Callable
+from app.core.resume_parser import warm_up_pdf_pool
+from app.services.gemini_service import _get_model
+
+# Run the warm-up as soon as the app starts; readiness stays false until it ends.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+
+def _open_knowledge_base() -> None:
+    # Imported here so that importing this module doesn't load chromadb/numpy.
+    from app.core.knowledge_base import initialize_knowledge_base
+
+    initialize_knowledge_base()
+
+
+# Everything expensive that is deliberately not done at import time.
+WARMUP_STEPS: dict[str, Callable[[], object]] = {
+    "gemini": _get_model,  # Loads the SDK and configures the model
+    "pdf_pool": warm_up_pdf_pool,  # Forks the extraction workers
+    "knowledge_base": _open_knowledge_base,  # Opens (and seeds) Chroma
+}
+
+# With the warm-up disabled each step happens lazily on first use instead.
+_status: dict[str, dict] = {
+    name: {"status": "pending" if WARMUP_ON_STARTUP else "lazy"} for name in WARMUP_STEPS
+}
+
+
+async def _run_step(name: str, step: Callable[[], object]) -> None:
+    _status[name] = {"status": "running"}
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(step)
+        _status[name] = {"status": "ready"}
+    except Exception as e:
+        print(f"Warm-up: '{name}' failed: {e}")
+        _status[name] = {"status": "failed", "error": str(e)}
+    _status[name]["seconds"] = round(time.perf_counter() - started, 3)
+
+
+async def run_warmup() -> None:
+    """Runs every warm-up step side by side; failures are recorded, not raised."""
+    await asyncio.gather(*(_run_step(name, step) for name, step in WARMUP_STEPS.items()))
+    print(f"Warm-up finished: {_status}")
+
+
+def readiness() -> tuple[bool, dict]:
+    """Returns (ready, per-step status); ready once every step has succeeded."""
+    ready = all(step["status"] in ("ready", "lazy") for step in _status.values())
+    return ready, {name: dict(step) for name, step in _status.items()}
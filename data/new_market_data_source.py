@@ -1,18 +1,14 @@
-import time
-
 def fetch_new_trends():
     """Returns a list of new, trending skills or insights."""
     print("Fetching new data from source...")
     # In a real app, this would be an API call, a DB query, or a web scraper.
-    timestamp = int(time.time())
+    # No IDs here: the ingestion pipeline derives them from the content.
     new_data = [
         {
-            "id": f"trend-{timestamp}-1",
             "content": "Advanced AI Integration: Skills in integrating LLMs (like GPT, Claude, Gemini) into existing applications using frameworks like LangChain or direct API calls are becoming highly sought after for senior developer roles.",
             "metadata": {"type": "skill_trend", "field": "Software Development"},
         },
         {
-            "id": f"trend-{timestamp}-2",
             "content": "FinOps (Financial Operations) is an emerging discipline for Cloud Engineers, focusing on optimizing cloud spending. Knowledge of tools like AWS Cost Explorer or Azure Cost Management is a key differentiator.",
             "metadata": {"type": "upskilling", "field": "Software Development"},
         },
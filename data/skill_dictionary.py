@@ -0,0 +1,47 @@
+# Canonical skill names by category, used for local (non-LLM) skill extraction.
+# Matching (app/core/skill_taxonomy.py) is case-insensitive except for very short
+# names (e.g. "R", "Go", "C"), which must appear exactly as written here.
+skill_dictionary = {
+    "languages": [
+        "Python", "Java", "JavaScript", "TypeScript", "C", "C++", "C#", "Go", "Rust",
+        "Ruby", "PHP", "Swift", "Kotlin", "Scala", "R", "MATLAB", "SQL", "Bash",
+        "Perl", "Dart", "Objective-C", "HTML", "CSS", "Solidity",
+    ],
+    "frameworks": [
+        "React", "Angular", "Vue", "Next.js", "Node.js", "Express", "Django", "Flask",
+        "FastAPI", "Spring Boot", "Spring", "Ruby on Rails", ".NET", "ASP.NET",
+        "Laravel", "Flutter", "React Native", "TensorFlow", "PyTorch", "Keras",
+        "scikit-learn", "Pandas", "NumPy", "Spark", "Hadoop", "LangChain",
+        "Tailwind CSS", "Bootstrap", "jQuery", "Svelte", "GraphQL",
+    ],
+    "databases": [
+        "PostgreSQL", "MySQL", "SQLite", "MongoDB", "Redis", "Cassandra",
+        "DynamoDB", "Elasticsearch", "Oracle", "SQL Server", "Snowflake",
+        "BigQuery", "Redshift", "Azure Synapse Analytics", "Neo4j", "ChromaDB",
+    ],
+    "cloud_devops": [
+        "AWS", "Azure", "GCP", "Google Cloud", "Docker", "Kubernetes", "Terraform",
+        "Ansible", "Jenkins", "GitHub Actions", "GitLab CI", "CI/CD", "Linux",
+        "Nginx", "Helm", "Prometheus", "Grafana", "AWS Cost Explorer",
+        "Azure Cost Management", "FinOps", "Serverless", "Lambda",
+    ],
+    "data_analytics": [
+        "Tableau", "Power BI", "Excel", "Looker", "Data Visualization",
+        "Statistical Analysis", "Machine Learning", "Deep Learning", "NLP",
+        "Computer Vision", "Data Analysis", "Data Engineering", "ETL", "Airflow",
+        "dbt", "A/B Testing", "Statistics", "LLMs", "Generative AI",
+    ],
+    "design": [
+        "Figma", "Sketch", "Adobe XD", "Photoshop", "Illustrator", "InDesign",
+        "User Research", "Usability Testing", "Wireframing", "Prototyping",
+        "UI/UX", "Interaction Design",
+    ],
+    "tools": [
+        "Git", "GitHub", "GitLab", "Jira", "Confluence", "Postman", "VS Code",
+        "Jupyter", "Notion", "Slack", "Selenium", "Cypress", "Jest", "PyTest",
+    ],
+    "methodologies": [
+        "Agile", "Scrum", "Kanban", "TDD", "DevOps", "Microservices",
+        "REST APIs", "System Design", "Object-Oriented Programming",
+    ],
+}
@@ -1,49 +1,153 @@
+import asyncio
+from functools import partial
+from typing import AsyncIterator, Callable, Optional
 from app.agents import profiler
 from app.agents import chief_analyst
-from app.agents.perplexica_researcher import direct_search
-from app.services.gemini_service import get_gemini_response
-
-
-def _get_candidate_seniority(resume_json_string: str) -> str:
-    # (This function remains unchanged)
-    prompt = f"""
-    Analyze the "work_experience" and "education" sections of the following structured resume.
-    Based on the total years of experience, job titles, and graduation dates, classify the candidate's seniority level.
-    Return ONLY ONE of the following keywords: Intern, Entry-Level, Mid-Level, Senior.
-    **Structured Resume (JSON):**
-    {resume_json_string}
-    """
-    return get_gemini_response(prompt).strip()
+from app.agents.perplexica_researcher import batch_search_async
+from app.core.intake import Intake
+from app.core.seniority import get_candidate_seniority_async
+from app.core.stage_graph import Stage, critical_path, limited, run_stage_graph
 
 
-def run_analysis_pipeline(resume_json_string: str) -> str:
-    """
-    Manages the NEW, more robust multi-agent workflow using Perplexica.
-    """
-    print("Orchestrator: Starting Perplexica-powered multi-agent pipeline...")
+def _format_market_brief(research: dict) -> str:
+    """Renders the merged Perplexica batch result as the brief for the analyst."""
+    for query in research["failed_queries"]:
+        print(f"Orchestrator: No research returned for '{query}'.")
+    if not research["message"]:
+        return "No live market data could be retrieved."
+    brief = research["message"]
+    urls = [source["metadata"]["url"] for source in research["sources"]]
+    if urls:
+        brief += "\n\n**Sources:**\n" + "\n".join(f"- {url}" for url in urls)
+    return brief
 
-    # ... (seniority and profiler steps are unchanged) ...
-    seniority = _get_candidate_seniority(resume_json_string)
-    print(f"Orchestrator: Determined seniority is '{seniority}'.")
 
-    print("Orchestrator: Dispatching to Profiler Agent...")
-    search_brief = profiler.create_search_brief(resume_json_string)
+async def research_market(search_brief: dict) -> str:
+    """Fans the profiler's search queries out to Perplexica as one batch."""
     search_queries = search_brief.get("search_queries", [])
+    print(
+        f"Orchestrator: Dispatching {len(search_queries)} queries to Perplexica Researcher Agent..."
+    )
+    return _format_market_brief(await batch_search_async(search_queries))
 
-    # --- This is the only change in the orchestrator ---
-    # Call the new high-level research function
-    print("Orchestrator: Dispatching to enhanced Perplexica Researcher Agent...")
-    market_brief = direct_search(search_queries)
-    # ---
 
+def _build_stages(
+    resume_json_string: str,
+    include_report: bool = True,
+    research: Callable = research_market,
+    intake: Optional[Intake] = None,
+    llm_slots: Optional[asyncio.Semaphore] = None,
+) -> list[Stage]:
+    """
+    The analysis pipeline as a dependency graph. Seniority detection and the
+    profiler -> research branch are independent and run side by side; the final
+    report waits for both. Streaming callers leave the report out and stream it
+    separately; batch callers pass a `research` stage that is shared between
+    candidates. With an `intake`, seniority and the search brief are already
+    known and cost no LLM call. With `llm_slots`, each stage that calls Gemini
+    holds a slot while it runs; research does not.
+    """
+    llm = (lambda func: limited(func, llm_slots)) if llm_slots else (lambda func: func)
+    if intake is not None:
+        stages = [
+            Stage("seniority", lambda: intake.seniority),
+            Stage("search_brief", intake.search_brief),
+        ]
+    else:
+        stages = [
+            Stage("seniority", llm(partial(get_candidate_seniority_async, resume_json_string))),
+            Stage(
+                "search_brief", llm(partial(profiler.create_search_brief, resume_json_string))
+            ),
+        ]
+    stages.append(Stage("research", research, depends_on=("search_brief",)))
+    if include_report:
+        stages.append(
+            Stage(
+                "final_report",
+                llm(partial(chief_analyst.generate_final_report, resume_json_string)),
+                depends_on=("research", "seniority"),
+            )
+        )
+    return stages
+
+
+async def run_analysis_stages(
+    resume_json_string: str,
+    include_report: bool = True,
+    on_event: Optional[Callable[[dict], None]] = None,
+    research: Callable = research_market,
+    intake: Optional[Intake] = None,
+    llm_slots: Optional[asyncio.Semaphore] = None,
+) -> tuple[dict, dict]:
+    """Runs the multi-agent stage graph and returns (results, per-stage seconds)."""
+    print("Orchestrator: Starting Perplexica-powered multi-agent pipeline...")
+    stages = _build_stages(resume_json_string, include_report, research, intake, llm_slots)
+    results, timings = await run_stage_graph(stages, on_event=on_event)
+
+    print(f"Orchestrator: Determined seniority is '{results['seniority']}'.")
     print("--- Perplexica Market Intelligence Brief ---")
-    print(market_brief)
+    print(results["research"])
     print("------------------------------------------")
+    for name, seconds in timings.items():
+        print(f"Orchestrator: Stage '{name}' took {seconds:.2f}s.")
+    print(f"Orchestrator: Critical path: {' -> '.join(critical_path(stages, timings))}")
+    print("Orchestrator: Pipeline complete.")
+    return results, timings
+
 
-    print("Orchestrator: Dispatching to Chief Analyst Agent for final report...")
-    final_report = chief_analyst.generate_final_report(
-        resume_json_string, market_brief, seniority
+async def stream_analysis_events(
+    resume_json_string: str, intake: Optional[Intake] = None
+) -> AsyncIterator[dict]:
+    """
+    Runs the pipeline and yields progress as it happens: a "stage" event each
+    time a stage starts or ends, then "report" events carrying the chief
+    analyst's report text as it streams from Gemini, then a final "done" event.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    graph = asyncio.create_task(
+        run_analysis_stages(
+            resume_json_string,
+            include_report=False,
+            on_event=queue.put_nowait,
+            intake=intake,
+        )
     )
+    try:
+        while not (graph.done() and queue.empty()):
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, graph}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield {"event": "stage", "data": getter.result()}
+            else:
+                getter.cancel()
+        results, timings = graph.result()
+    finally:
+        graph.cancel()
 
-    print("Orchestrator: Pipeline complete.")
-    return final_report
+    yield {"event": "stage", "data": {"stage": "final_report", "status": "started"}}
+    async for chunk in chief_analyst.stream_final_report(
+        resume_json_string, results["research"], results["seniority"]
+    ):
+        yield {"event": "report", "data": {"text": chunk}}
+    yield {
+        "event": "done",
+        "data": {
+            "stage_timings_seconds": {
+                name: round(seconds, 3) for name, seconds in timings.items()
+            }
+        },
+    }
+
+
+async def run_analysis_pipeline_async(resume_json_string: str) -> str:
+    """Async entry point: runs the pipeline and returns the final report."""
+    results, _ = await run_analysis_stages(resume_json_string)
+    return results["final_report"]
+
+
+def run_analysis_pipeline(resume_json_string: str) -> str:
+    """
+    Manages the multi-agent workflow using Perplexica (blocking wrapper).
+    """
+    return asyncio.run(run_analysis_pipeline_async(resume_json_string))
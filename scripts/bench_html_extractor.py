@@ -0,0 +1,108 @@
+"""
+Micro-benchmark: streaming HTML text extractor vs. the previous BeautifulSoup path.
+
+Usage:
+    python scripts/bench_html_extractor.py [--pages-dir DIR | --synthetic] [--repeat N]
+
+By default every *.html file in tests/fixtures/html is used: saved job-board,
+search-result and article pages with their scripts, styles, menus and embedded
+state left in. Point --pages-dir at another directory of saved pages, or pass
+--synthetic for generated "heavy" pages: large inline scripts, styles and
+navigation around a long body of visible text.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+# Add the project root to the Python path to allow importing from 'app'
+sys.path.append(".")
+from app.core.html_text import extract_text
+
+CHUNK_SIZE = 16 * 1024
+DEFAULT_PAGES_DIR = os.path.join("tests", "fixtures", "html")
+
+
+def beautifulsoup_extract(html: bytes) -> str:
+    """The original web_researcher path: full parse, decompose, keep 500 words."""
+    soup = BeautifulSoup(html.decode("utf-8", errors="replace"), "html.parser")
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text(separator=" ", strip=True)
+    return " ".join(text.split()[:500])
+
+
+def streaming_extract(html: bytes) -> str:
+    chunks = (html[i : i + CHUNK_SIZE] for i in range(0, len(html), CHUNK_SIZE))
+    return extract_text(chunks)
+
+
+def synthetic_pages() -> dict[str, bytes]:
+    script = "<script>" + "var tracking = {a: 1, b: [1,2,3]};\n" * 4000 + "</script>"
+    style = "<style>" + ".job-card{margin:0;padding:4px}\n" * 2000 + "</style>"
+    nav = "<nav>" + "".join(f"<a href='/c/{i}'>Category {i}</a>" for i in range(500)) + "</nav>"
+    posting = "<div class='job'><h2>Senior Data Analyst</h2><p>" + (
+        "Own dashboards in Tableau and Power BI, write SQL and Python, partner with product. "
+        * 40
+    ) + "</p></div>"
+    pages = {}
+    for n_postings in (10, 50, 200):
+        body = posting * n_postings
+        html = f"<html><head>{style}{script}</head><body>{nav}{body}{script}</body></html>"
+        pages[f"synthetic-{n_postings}-postings"] = html.encode("utf-8")
+    return pages
+
+
+def load_pages(pages_dir: str) -> dict[str, bytes]:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(pages_dir, "*.html"))):
+        with open(path, "rb") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def time_it(func, html: bytes, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(html)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--pages-dir", default=DEFAULT_PAGES_DIR, help="Directory of saved *.html pages."
+    )
+    parser.add_argument(
+        "--synthetic", action="store_true", help="Use generated pages instead of saved ones."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = synthetic_pages() if args.synthetic else load_pages(args.pages_dir)
+    if not pages:
+        print("No pages found.")
+        return
+
+    # The streaming path also drops <nav> text, so the two outputs are not
+    # expected to be identical; "nav words" shows how much menu text bs4 kept.
+    print(
+        f"{'page':<32}{'size KB':>10}{'bs4 ms':>10}{'stream ms':>12}"
+        f"{'speedup':>10}{'nav words':>11}"
+    )
+    for name, html in pages.items():
+        bs4_ms = time_it(beautifulsoup_extract, html, args.repeat)
+        stream_ms = time_it(streaming_extract, html, args.repeat)
+        kept = set(streaming_extract(html).split())
+        nav_words = sum(1 for w in beautifulsoup_extract(html).split() if w not in kept)
+        print(
+            f"{name[:31]:<32}{len(html) / 1024:>10.0f}{bs4_ms:>10.1f}{stream_ms:>12.2f}"
+            f"{bs4_ms / stream_ms:>9.1f}x{nav_words:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Import-time budget check: how long a fresh interpreter takes to import the app.
+
+Usage:
+    python scripts/bench_import_time.py [--module app.main] [--repeat N]
+                                        [--budget-ms MS] [--top N]
+
+Each run imports the module in a new process (so nothing is already cached in
+sys.modules) and the median wall time is compared with the budget. Exits with
+status 1 when the budget is exceeded, so it can gate CI. The slowest imports of
+the last run (from `python -X importtime`) are listed to show what regressed.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Generous headroom over the current cold start; lower it as startup improves.
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1000"))
+# Modules that must stay out of the import path; they load on first use.
+LAZY_MODULES = ["google.generativeai", "chromadb", "fitz", "cv2"]
+
+TIMER = """
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed_ms = (time.perf_counter() - started) * 1000
+loaded = [name for name in {lazy!r} if name in sys.modules]
+print(f"{{elapsed_ms:.1f}}|{{','.join(loaded)}}")
+"""
+
+
+def time_import(module: str) -> tuple[float, list[str]]:
+    result = subprocess.run(
+        [sys.executable, "-c", TIMER.format(module=module, lazy=LAZY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, loaded = result.stdout.strip().splitlines()[-1].split("|")
+    return float(elapsed), [name for name in loaded.split(",") if name]
+
+
+def slowest_imports(module: str, top: int) -> list[tuple[int, str]]:
+    """Cumulative microseconds per top-level-ish import, slowest first."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 2:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    timings = []
+    loaded = []
+    for _ in range(args.repeat):
+        elapsed, loaded = time_import(args.module)
+        timings.append(elapsed)
+    median = statistics.median(timings)
+
+    print(
+        f"import {args.module}: median {median:.0f} ms over {args.repeat} runs "
+        f"(min {min(timings):.0f}, max {max(timings):.0f}), budget {args.budget_ms:.0f} ms"
+    )
+    print("\nSlowest imports (cumulative):")
+    for micros, name in slowest_imports(args.module, args.top):
+        print(f"  {micros / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"\nFAIL: modules meant to load lazily were imported: {', '.join(loaded)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"\nFAIL: import time {median:.0f} ms exceeds the {args.budget_ms:.0f} ms budget.")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Simulation: tail latency and wasted work with and without the resilience layer.
+
+Usage:
+    python scripts/bench_resilience.py [--calls 400] [--slow-fraction 0.05] [--seed 0]
+
+A fake dependency answers in ~50 ms, except for --slow-fraction of requests
+that stall for 2 s. Two scenarios are run against it:
+
+- tail: every call succeeds eventually; compares the latency percentiles of a
+  plain call with a 5 s timeout (the old behaviour) and of a hedged policy call.
+- outage: the dependency hangs until the client times out; compares how many
+  requests reach it and how long callers wait, plain vs. circuit breaker.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+# Add the project root to the Python path to allow importing from 'app'
+sys.path.append(".")
+from app.services.resilience import ResiliencePolicy
+
+TIMEOUT_SECONDS = 5.0
+
+
+class FakeDependency:
+    def __init__(self, slow_fraction: float, rng: random.Random):
+        self.slow_fraction = slow_fraction
+        self.rng = rng
+        self.down = False
+        self.requests = 0
+
+    async def call(self) -> str:
+        self.requests += 1
+        if self.down:
+            await asyncio.sleep(3600)
+        slow = self.rng.random() < self.slow_fraction
+        await asyncio.sleep(2.0 if slow else self.rng.uniform(0.03, 0.07))
+        return "ok"
+
+
+def percentiles(latencies: list[float]) -> str:
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+    return (
+        f"p50 {statistics.median(ordered) * 1000:7.0f} ms  p95 {pick(0.95):7.0f} ms  "
+        f"p99 {pick(0.99):7.0f} ms"
+    )
+
+
+async def plain_call(dependency: FakeDependency) -> str:
+    return await asyncio.wait_for(dependency.call(), TIMEOUT_SECONDS)
+
+
+async def run_calls(call, calls: int, concurrency: int = 20) -> tuple[list[float], int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call()
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies, failures
+
+
+async def tail(args) -> None:
+    print(f"Tail scenario: {args.calls} calls, {args.slow_fraction:.0%} stall for 2 s")
+    dependency = FakeDependency(args.slow_fraction, random.Random(args.seed))
+    latencies, _ = await run_calls(lambda: plain_call(dependency), args.calls)
+    print(f"  plain   {percentiles(latencies)}  requests {dependency.requests}")
+
+    dependency = FakeDependency(args.slow_fraction, random.Random(args.seed))
+    policy = ResiliencePolicy("bench", timeout=TIMEOUT_SECONDS, retries=0, hedge=True)
+    latencies, _ = await run_calls(lambda: policy.call(dependency.call), args.calls)
+    print(f"  hedged  {percentiles(latencies)}  requests {dependency.requests}")
+
+
+async def outage(args) -> None:
+    calls = args.calls // 4
+    print(f"Outage scenario: {calls} calls while the dependency hangs")
+    dependency = FakeDependency(0, random.Random(args.seed))
+    dependency.down = True
+    latencies, failures = await run_calls(lambda: plain_call(dependency), calls)
+    print(
+        f"  plain    mean wait {statistics.mean(latencies):5.2f} s  "
+        f"failed {failures}/{calls}  requests {dependency.requests}"
+    )
+
+    dependency = FakeDependency(0, random.Random(args.seed))
+    dependency.down = True
+    policy = ResiliencePolicy(
+        "bench", timeout=TIMEOUT_SECONDS, retries=2, backoff_base=0.1, failure_threshold=5
+    )
+    latencies, failures = await run_calls(lambda: policy.call(dependency.call), calls)
+    print(
+        f"  breaker  mean wait {statistics.mean(latencies):5.2f} s  "
+        f"failed {failures}/{calls}  requests {dependency.requests}  "
+        f"rejected {policy.stats()['rejected']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(tail(args))
+    asyncio.run(outage(args))
+
+
+if __name__ == "__main__":
+    main()
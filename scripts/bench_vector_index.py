@@ -0,0 +1,164 @@
+"""
+Benchmark: knowledge-base query latency and throughput, Chroma vs. the
+in-process NumPy vector index (KB_BACKEND=numpy).
+
+Usage:
+    python scripts/bench_vector_index.py [--sizes 1000,100000,1000000]
+                                         [--dim 384] [--queries 200]
+                                         [--chroma-max 100000] [--workdir DIR]
+
+Synthetic unit vectors with field/type/seniority metadata are loaded into a
+persistent Chroma collection and into a NumPy snapshot in --workdir. Each
+backend then answers the same single-vector top-5 queries, unfiltered and with
+a field+type filter. Loading Chroma is slow at large sizes, so sizes above
+--chroma-max only run the NumPy index. At 1M x 384 the snapshot is ~1.5 GB.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add the project root to the Python path to allow importing from 'app'
+sys.path.append(".")
+from app.core.vector_index import VectorIndex
+
+FIELDS = ["Software Development", "Data Science", "Design", "General"]
+TYPES = ["skill_trend", "career_path", "ats_tip", "career_roadmap", "upskilling", "certification"]
+SENIORITY = ["Intern", "Entry-Level", "Mid-Level", "Senior"]
+TOP_K = 5
+
+
+def synthetic_corpus(n: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    metadatas = []
+    for i in range(n):
+        metadata = {"field": FIELDS[i % len(FIELDS)], "type": TYPES[i % len(TYPES)]}
+        if i % 10 == 0:
+            metadata["seniority"] = SENIORITY[i % len(SENIORITY)]
+        metadatas.append(metadata)
+    ids = [f"doc-{i}" for i in range(n)]
+    documents = [f"Synthetic market document {i}" for i in range(n)]
+    return ids, vectors, documents, metadatas
+
+
+def measure(run_query, queries: np.ndarray) -> dict:
+    run_query(queries[0])  # warm-up
+    latencies = []
+    started = time.perf_counter()
+    for query in queries:
+        t = time.perf_counter()
+        run_query(query)
+        latencies.append((time.perf_counter() - t) * 1000)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "qps": len(queries) / elapsed,
+    }
+
+
+def bench_numpy(workdir, ids, vectors, documents, metadatas, queries) -> dict:
+    path = os.path.join(workdir, "vector_index")
+    started = time.perf_counter()
+    VectorIndex.write(path, ids, vectors, documents, metadatas)
+    build_seconds = time.perf_counter() - started
+    index = VectorIndex(path)
+
+    def query(vector, **filters):
+        hits = index.search([vector], TOP_K, **filters)[0]
+        return [index.record(row) for row, _ in hits]
+
+    return {
+        "build_s": build_seconds,
+        "all": measure(query, queries),
+        "filtered": measure(
+            lambda v: query(v, fields=["Data Science", "General"], types=["career_roadmap"]),
+            queries,
+        ),
+    }
+
+
+def bench_chroma(workdir, ids, vectors, documents, metadatas, queries) -> dict:
+    import chromadb
+
+    client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"))
+    collection = client.get_or_create_collection("bench")
+    batch = client.get_max_batch_size()
+    started = time.perf_counter()
+    for i in range(0, len(ids), batch):
+        collection.add(
+            ids=ids[i : i + batch],
+            embeddings=vectors[i : i + batch],
+            documents=documents[i : i + batch],
+            metadatas=metadatas[i : i + batch],
+        )
+    build_seconds = time.perf_counter() - started
+
+    def query(vector, where=None):
+        return collection.query(
+            query_embeddings=[vector],
+            n_results=TOP_K,
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+
+    where = {
+        "$and": [{"field": {"$in": ["Data Science", "General"]}}, {"type": "career_roadmap"}]
+    }
+    return {
+        "build_s": build_seconds,
+        "all": measure(query, queries),
+        "filtered": measure(lambda v: query(v, where), queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--chroma-max", type=int, default=100_000)
+    parser.add_argument("--workdir", default=None)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(
+        f"{'docs':>9}  {'backend':<7} {'build s':>8}  {'filter':<8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'q/s':>9}"
+    )
+    for n in sizes:
+        workdir = args.workdir or tempfile.mkdtemp(prefix="bench-kb-")
+        try:
+            corpus = synthetic_corpus(n, args.dim)
+            backends = [("numpy", bench_numpy)]
+            if n <= args.chroma_max:
+                backends.insert(0, ("chroma", bench_chroma))
+            for name, bench in backends:
+                result = bench(workdir, *corpus, queries)
+                for label in ("all", "filtered"):
+                    stats = result[label]
+                    print(
+                        f"{n:>9}  {name:<7} {result['build_s']:>8.1f}  {label:<8} "
+                        f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['qps']:>9.0f}"
+                    )
+            if n > args.chroma_max:
+                print(f"{n:>9}  chroma  skipped (above --chroma-max)")
+        finally:
+            if not args.workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
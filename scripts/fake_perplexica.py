@@ -0,0 +1,72 @@
+"""
+A local stand-in for the Perplexica /api/search endpoint, for exercising the
+researcher agents without a real Perplexica deployment.
+
+Usage:
+    python scripts/fake_perplexica.py [--port 3000] [--latency 0.5] [--fail-rate 0.2]
+
+Then point the app at it with PERPLEXICA_URL=http://localhost:<port>.
+Queries containing the word "fail" always return HTTP 500.
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(latency: float, fail_rate: float):
+    class FakePerplexicaHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/api/search":
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            query = payload.get("query", "")
+            time.sleep(latency)
+
+            if "fail" in query.lower() or random.random() < fail_rate:
+                self.send_error(500, "Simulated Perplexica failure")
+                return
+
+            slug = "-".join(query.lower().split())[:60]
+            body = json.dumps(
+                {
+                    "message": f"Stand-in answer for '{query}'. Demand for this profile is steady [1].",
+                    "sources": [
+                        {
+                            "pageContent": f"Example source for {query}",
+                            "metadata": {
+                                "title": f"Source for {query}",
+                                "url": f"https://example.com/{slug}",
+                            },
+                        }
+                    ],
+                }
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return FakePerplexicaHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in Perplexica server.")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", args.port), make_handler(args.latency, args.fail_rate)
+    )
+    print(f"Fake Perplexica listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
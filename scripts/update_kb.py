@@ -1,37 +1,93 @@
-import chromadb
+"""
+Updates the knowledge base. Safe to re-run: documents are keyed by a hash of
+their content, so anything already stored is skipped without re-embedding.
+
+Usage:
+    python scripts/update_kb.py                      # latest market trends
+    python scripts/update_kb.py PATH [PATH ...]      # JSONL files / directories
+    python scripts/update_kb.py PATH --replace-sources
+    python scripts/update_kb.py --delete-source SOURCE
+    python scripts/update_kb.py --compact
+    python scripts/update_kb.py --snapshot           # rebuild the numpy index
+
+JSONL lines are {"content": ..., "metadata": {"type": ..., "field": ...}};
+directories are searched for *.jsonl, *.txt and *.md files. With
+--replace-sources, chunks of a re-ingested file that it no longer produces
+are deleted. --compact removes duplicate documents (e.g. left by the old
+timestamp-ID ingestion). The in-process vector index snapshot (used with
+KB_BACKEND=numpy) is rebuilt after any change if it exists, or on --snapshot.
+"""
+import argparse
+import itertools
+import os
 import sys
 
 # Add the project root to the Python path to allow importing from 'data'
 sys.path.append(".")
 from data.new_market_data_source import fetch_new_trends
+from app.core.embedding_cache import get_embedding_function
+from app.core.kb_ingestion import (
+    INGEST_BATCH_SIZE,
+    INGEST_EMBED_WORKERS,
+    compact,
+    delete_documents,
+    ingest,
+    iter_records,
+    iter_source,
+)
+from app.core.knowledge_base import KB_BACKEND, get_collection
+from app.core.vector_index import VECTOR_INDEX_PATH, snapshot_collection
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Update the knowledge base.")
+    parser.add_argument("paths", nargs="*", help="JSONL files or directories to ingest")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=INGEST_EMBED_WORKERS)
+    parser.add_argument("--replace-sources", action="store_true")
+    parser.add_argument("--delete-source", action="append", default=[])
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--snapshot", action="store_true")
+    args = parser.parse_args()
+
     print("Connecting to persistent Knowledge Base...")
     # IMPORTANT: Connect to the same persistent client as the main app
-    client = chromadb.PersistentClient(path="./db")
-    collection = client.get_or_create_collection("resume_insights_knowledge_base")
-
-    # Fetch new data
-    new_trends = fetch_new_trends()
-
-    if not new_trends:
-        print("No new trends to add.")
-        return
+    collection = get_collection()
 
-    print(f"Found {len(new_trends)} new trends to add to the knowledge base.")
+    for source in args.delete_source:
+        print(f"Deleted {delete_documents(source=source)} documents from '{source}'.")
 
-    # Prepare data for upserting
-    documents = [item["content"] for item in new_trends]
-    metadata = [item["metadata"] for item in new_trends]
-    ids = [item["id"] for item in new_trends]
+    if args.paths:
+        records = itertools.chain.from_iterable(iter_source(path) for path in args.paths)
+    elif not (args.delete_source or args.compact or args.snapshot):
+        new_trends = fetch_new_trends()
+        if not new_trends:
+            print("No new trends to add.")
+            return
+        print(f"Found {len(new_trends)} trends from the market data source.")
+        records = iter_records(new_trends, source="new_market_data_source")
+    else:
+        records = None
 
-    # Use 'upsert' to add new documents or update existing ones if IDs match.
-    # This prevents adding duplicate data if the script is run multiple times.
-    collection.upsert(ids=ids, metadatas=metadata, documents=documents)
+    if records is not None:
+        ingest(
+            records,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            replace_sources=args.replace_sources,
+        )
+    if args.compact:
+        compact()
+    if (
+        args.snapshot
+        or KB_BACKEND == "numpy"
+        or os.path.exists(os.path.join(VECTOR_INDEX_PATH, "manifest.json"))
+    ):
+        snapshot_collection(collection)
 
     print("Knowledge Base successfully updated.")
     print(f"Total documents in collection: {collection.count()}")
+    print(f"Embedding cache: {get_embedding_function().stats()}")
 
 
 if __name__ == "__main__":
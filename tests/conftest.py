@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Keep caches and the vector store out of the tracked db/ directory.
+_tmp = tempfile.mkdtemp(prefix="resume-analyzer-tests-")
+os.environ.setdefault("CACHE_DIR", os.path.join(_tmp, "cache"))
+os.environ.setdefault("CHROMA_PATH", os.path.join(_tmp, "chroma"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
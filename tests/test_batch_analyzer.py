@@ -0,0 +1,91 @@
+import asyncio
+import io
+import zipfile
+import pytest
+from app.services import batch_analyzer
+from app.services.batch_analyzer import BatchError, BatchTooLargeError, collect_pdfs
+
+
+def _zip(entries: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def no_reads(monkeypatch):
+    """Fails the test if an entry is decompressed."""
+
+    def read(self, *args, **kwargs):
+        raise AssertionError("an entry was decompressed before the limits were checked")
+
+    monkeypatch.setattr(zipfile.ZipFile, "read", read)
+
+
+def test_collects_pdfs_from_a_zip():
+    data = _zip({"a.pdf": b"%PDF-a", "dir/b.PDF": b"%PDF-b", "notes.txt": b"x"})
+    assert collect_pdfs("batch.zip", data) == [("a.pdf", b"%PDF-a"), ("b.PDF", b"%PDF-b")]
+
+
+def test_too_many_entries_are_rejected_before_decompressing(monkeypatch, no_reads):
+    monkeypatch.setattr(batch_analyzer, "BATCH_MAX_RESUMES", 5)
+    data = _zip({f"{i}.pdf": b"%PDF" for i in range(6)})
+    with pytest.raises(BatchTooLargeError):
+        collect_pdfs("batch.zip", data, max_resumes=5)
+
+
+def test_zip_bomb_is_rejected_by_declared_size(monkeypatch, no_reads):
+    monkeypatch.setattr(batch_analyzer, "BATCH_MAX_UNCOMPRESSED_BYTES", 8 * 1024 * 1024)
+    # Three entries of 5 MB of zeros compress to a few KB each.
+    data = _zip({f"{i}.pdf": bytes(5 * 1024 * 1024) for i in range(3)})
+    assert len(data) < 100 * 1024
+    with pytest.raises(BatchTooLargeError):
+        collect_pdfs("bomb.zip", data)
+
+
+def test_invalid_zip_is_a_bad_request_not_too_large():
+    with pytest.raises(BatchError) as error:
+        collect_pdfs("broken.zip", b"not a zip")
+    assert not isinstance(error.value, BatchTooLargeError)
+
+
+def test_batch_keeps_at_most_max_in_flight_resumes(monkeypatch):
+    in_flight = peak = 0
+
+    async def extract(pdf_bytes):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        return "resume text"
+
+    async def stages(resume_json, research, intake, llm_slots):
+        nonlocal in_flight
+        in_flight -= 1
+        return {"final_report": "report"}, {}
+
+    monkeypatch.setattr(batch_analyzer, "BATCH_MAX_IN_FLIGHT", 3)
+    monkeypatch.setattr(batch_analyzer, "get_or_extract_text_async", extract)
+    monkeypatch.setattr(batch_analyzer, "get_or_run_intake", lambda text, pdf: ({"name": "x"}, None))
+    monkeypatch.setattr(batch_analyzer, "run_analysis_stages", stages)
+
+    async def run():
+        return [record async for record in batch_analyzer.analyze_batch([(f"{i}.pdf", b"") for i in range(10)])]
+
+    records = asyncio.run(run())
+    assert peak == 3
+    assert sum(record.get("status") == "succeeded" for record in records) == 10
+    assert records[-1]["summary"]["succeeded"] == 10
+
+
+def test_only_gemini_stages_hold_llm_slots():
+    from orchestrator import _build_stages
+
+    async def research(brief):
+        return "brief"
+
+    stages = {stage.name: stage for stage in _build_stages("{}", research=research, llm_slots=asyncio.Semaphore(1))}
+    assert stages["research"].func is research
+    assert all(stages[name].func.__name__ == "run" for name in ("seniority", "search_brief", "final_report"))
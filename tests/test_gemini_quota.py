@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from app.services import gemini_service
+from app.services import gemini_quota
+from app.services.gemini_quota import QuotaError, QuotaScheduler, RateLimitedError, SharedTokenBuckets
+
+
+class TooManyRequests(Exception):
+    pass
+
+
+class Response:
+    text = "ok"
+    usage_metadata = None
+
+
+class RateLimitedModel:
+    """Answers 429 to the first `limited` requests."""
+
+    def __init__(self, limited: int):
+        self.limited = limited
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, generation_config=None, stream=False):
+        self.calls += 1
+        if self.calls <= self.limited:
+            raise TooManyRequests("429")
+        return Response()
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    buckets = SharedTokenBuckets({"requests": 6000}, filename=str(tmp_path / "quota.sqlite3"))
+    scheduler = QuotaScheduler(buckets)
+    # After a drain a lane waits for its reserve to refill; keep that short.
+    monkeypatch.setitem(gemini_quota.LANE_RESERVES, "analysis", 0.001)
+    monkeypatch.setitem(gemini_quota.LANE_RESERVES, "batch", 0.002)
+    monkeypatch.setattr(gemini_service, "quota_scheduler", scheduler)
+    return scheduler
+
+
+def test_rate_limit_requeues_without_opening_the_circuit(scheduler, monkeypatch):
+    model = RateLimitedModel(limited=gemini_service.GEMINI_RETRIES)
+    monkeypatch.setattr(gemini_service, "_model", model)
+    failures = gemini_service._policy.stats()["failures"]
+
+    text = gemini_service.get_gemini_response("a prompt for the 429 test", call_site="test_429")
+
+    assert text == "ok"
+    assert model.calls == gemini_service.GEMINI_RETRIES + 1
+    # Each retry queued for quota again rather than being retried by the policy.
+    assert scheduler.stats()["lanes"]["analysis"]["admitted"] == model.calls
+    assert gemini_service._policy.stats()["failures"] == failures
+    assert gemini_service._policy.breaker.state == "closed"
+
+
+def test_interactive_lane_goes_first(scheduler):
+    order = []
+
+    async def run():
+        scheduler.buckets.drain()
+
+        async def one(lane):
+            await scheduler.acquire(lane, 1)
+            order.append(lane)
+
+        batch = [asyncio.create_task(one("batch")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        interactive = [asyncio.create_task(one("interactive")) for _ in range(2)]
+        await asyncio.gather(*batch, *interactive)
+
+    asyncio.run(run())
+    assert order == ["interactive", "interactive", "batch", "batch"]
+
+
+def test_rate_limit_after_all_retries_is_a_quota_error(scheduler, monkeypatch):
+    monkeypatch.setattr(gemini_service, "_model", RateLimitedModel(limited=100))
+    with pytest.raises(QuotaError) as error:
+        gemini_service.get_gemini_response("a prompt that stays rate limited", call_site="test_429_final")
+    assert error.value.retry_after > 0
+
+
+def test_quota_errors_are_503_with_retry_after(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import main
+
+    async def rate_limited(*args):
+        raise RateLimitedError(TooManyRequests("429"))
+
+    monkeypatch.setattr(main, "generate_resume_summary_async", rate_limited)
+    response = TestClient(main.app).post(
+        "/generate-resume-summary/", data={"resume_text": "r", "job_description": "j"}
+    )
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) > 0
@@ -0,0 +1,29 @@
+import os
+from app.core.html_text import extract_text
+
+PAGES = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+
+def test_word_split_across_chunks_is_kept_whole():
+    html = "<p>" + "filler " * 5000 + "hello world</p>"
+    cut = html.index("hello") + 2
+    assert extract_text([html[:cut], html[cut:]], max_words=10000).endswith("hello world")
+
+
+def test_tags_still_separate_words():
+    assert extract_text(["<p>one</p><p>tw", "o</p><br/>three"]) == "one two three"
+
+
+def test_skipped_tags_and_word_budget():
+    assert extract_text(["<script>var x</script><p>a b c", " d</p>"], max_words=3) == "a b c"
+
+
+def test_saved_job_posting_keeps_the_posting_and_drops_page_chrome():
+    with open(os.path.join(PAGES, "job_posting.html"), "rb") as f:
+        html = f.read()
+    chunks = [html[i : i + 4096] for i in range(0, len(html), 4096)]
+    text = extract_text(chunks)
+    assert "Senior Data Analyst (m/f/d)" in text
+    assert "€68,000 – €82,000" in text
+    assert "gtm.js" not in text and "__NEXT_DATA__" not in text
+    assert "jobs in Berlin" not in text
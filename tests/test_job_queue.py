@@ -0,0 +1,114 @@
+import asyncio
+import sqlite3
+import time
+from app.services import job_queue
+from app.services.job_queue import FAILED, RUNNING, SqliteJobStore
+
+
+def _store_with_running_job(path) -> tuple[SqliteJobStore, str]:
+    store = SqliteJobStore(str(path))
+    job = {"id": "job-1", "created_at": time.time()}
+    assert store.enqueue(job, b"payload", max_pending=10)
+    claimed, payload = store.claim()
+    assert claimed["id"] == "job-1" and payload == b"payload"
+    return store, "job-1"
+
+
+def test_recover_leaves_jobs_of_live_workers_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_STALE_SECONDS", 60)
+    owner, job_id = _store_with_running_job(tmp_path / "jobs.sqlite3")
+    # A second process sharing the database starts up long after the job began.
+    other = SqliteJobStore(str(tmp_path / "jobs.sqlite3"))
+    with sqlite3.connect(other.path) as conn:
+        conn.execute("UPDATE jobs SET started_at = ?", (time.time() - 3600,))
+
+    owner.heartbeat()
+    assert other.recover() == 0
+    assert other.get(job_id)["status"] == RUNNING
+    assert "worker_id" not in other.get(job_id)
+
+
+def test_recover_fails_jobs_whose_worker_stopped(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_STALE_SECONDS", 60)
+    _, job_id = _store_with_running_job(tmp_path / "jobs.sqlite3")
+    other = SqliteJobStore(str(tmp_path / "jobs.sqlite3"))
+    with sqlite3.connect(other.path) as conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = ?", (time.time() - 120,))
+
+    assert other.recover() == 1
+    assert other.get(job_id)["status"] == FAILED
+
+
+def test_existing_databases_gain_the_heartbeat_columns(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, payload BLOB, "
+            "result TEXT, error TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+        )
+        conn.execute(
+            "INSERT INTO jobs (id, status, created_at, started_at) VALUES ('old', ?, 0, 0)",
+            (RUNNING,),
+        )
+    store = SqliteJobStore(str(path))
+    # Rows from before the upgrade have no heartbeat and fall back to started_at.
+    assert store.recover() == 1
+
+
+class FlakyStore(job_queue.InMemoryJobStore):
+    """Fails the first claim, as a locked or unavailable database would."""
+
+    def __init__(self):
+        super().__init__()
+        self.claims = 0
+
+    def claim(self):
+        self.claims += 1
+        if self.claims == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return super().claim()
+
+
+def test_worker_survives_store_errors(monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_POLL_SECONDS", 0.01)
+
+    async def handler(payload):
+        return {"echo": payload}
+
+    async def scenario():
+        queue = job_queue.JobQueue(FlakyStore(), handler, workers=1)
+        await queue.start()
+        job_id = await queue.submit("hello")
+        for _ in range(200):
+            job = await queue.get(job_id)
+            if job["status"] == job_queue.SUCCEEDED:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job["status"] == job_queue.SUCCEEDED
+    assert job["result"] == {"echo": "hello"}
+
+
+def test_stop_fails_in_memory_jobs_that_were_running():
+    started = None
+
+    async def handler(payload):
+        started.set()
+        await asyncio.sleep(3600)
+
+    async def scenario():
+        nonlocal started
+        started = asyncio.Event()
+        queue = job_queue.JobQueue(job_queue.InMemoryJobStore(), handler, workers=1)
+        await queue.start()
+        job_id = await queue.submit("slow")
+        await asyncio.wait_for(started.wait(), timeout=5)
+        await queue.stop()
+        return await queue.get(job_id)
+
+    job = asyncio.run(scenario())
+    assert job["status"] == FAILED
+    assert "shutdown" in job["error"]
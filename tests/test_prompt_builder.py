@@ -0,0 +1,88 @@
+import json
+from app.core.prompt_builder import (
+    TRUNCATION_MARKER,
+    PromptSection,
+    build_prompt,
+    count_tokens,
+    parse_budgets,
+    shrink_json,
+    truncate_text,
+)
+
+WORDS = " ".join(f"word{i}" for i in range(2000))
+
+
+def test_count_tokens_splits_long_words_and_punctuation():
+    assert count_tokens("") == 0
+    assert count_tokens("a b c") == 3
+    # "internationalization" is 20 characters: five 4-character pieces.
+    assert count_tokens("internationalization") == 5
+    assert count_tokens('{"a":1}') == 7
+
+
+def test_parse_budgets_skips_malformed_entries():
+    assert parse_budgets("chief_analyst=4k, synthesizer=3000,=5,seniority=-1,,profiler") == {
+        "synthesizer": 3000
+    }
+
+
+def test_truncate_text_fits_budget_and_marks_the_cut():
+    text = truncate_text(WORDS, 100)
+    assert count_tokens(text) <= 100
+    assert text.endswith(TRUNCATION_MARKER)
+    assert truncate_text("short text", 100) == "short text"
+
+
+def test_shrink_json_stays_valid_and_within_budget():
+    value = {
+        "skills": [f"skill number {i}" for i in range(200)],
+        "summary": "lorem ipsum dolor " * 300,
+        "empty": [],
+        "name": "Ada",
+    }
+    text = shrink_json(value, 150)
+    assert count_tokens(text) <= 150
+    shrunk = json.loads(text)
+    assert shrunk["name"] == "Ada"
+    assert shrunk["skills"] and shrunk["summary"]
+    assert "empty" not in shrunk
+
+
+def test_build_prompt_cuts_lowest_priority_first_and_respects_min_tokens():
+    template = "Resume:\n{resume}\nResearch:\n{research}\nNotes:\n{notes}"
+    sections = [
+        PromptSection("resume", WORDS, priority=2),
+        PromptSection("research", [WORDS[:3000]] * 5, priority=0, min_tokens=200),
+        PromptSection("notes", WORDS, priority=1, min_tokens=300),
+    ]
+    prompt = build_prompt(template, sections, budget=1500)
+    assert count_tokens(prompt) <= 1500
+
+    resume, rest = prompt.split("\nResearch:\n")
+    research, notes = rest.split("\nNotes:\n")
+    # The lowest-priority section is cut down to its floor before the next is touched.
+    assert 150 <= count_tokens(research) <= 200
+    assert count_tokens(notes) >= 300
+    assert count_tokens(resume) > count_tokens(notes)
+
+
+def test_build_prompt_leaves_prompts_within_budget_alone():
+    prompt = build_prompt("Q: {q}", [PromptSection("q", "short question")], budget=100)
+    assert prompt == "Q: short question"
+
+
+def test_generator_prompts_fit_their_budgets():
+    from app.core.prompt_builder import PROMPT_TOKEN_BUDGETS
+    from app.services.generator_service import (
+        build_cover_letter_prompt,
+        build_resume_summary_prompt,
+    )
+
+    prompt = build_cover_letter_prompt(WORDS * 5, WORDS * 5, "Acme", "Data Engineer")
+    # The job title is used twice in the template but budgeted once.
+    assert count_tokens(prompt) <= PROMPT_TOKEN_BUDGETS["cover_letter"] + 10
+    assert "Data Engineer at Acme" in prompt
+
+    prompt = build_resume_summary_prompt(WORDS * 5, WORDS * 5)
+    assert count_tokens(prompt) <= PROMPT_TOKEN_BUDGETS["resume_summary"]
+    assert "word0" in prompt
@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from app.services.resilience import CircuitOpenError, ResiliencePolicy
+
+
+class Unavailable(Exception):
+    code = 503
+
+
+def _open_policy() -> ResiliencePolicy:
+    """A policy whose circuit is open after one failure and half-open right away."""
+    policy = ResiliencePolicy("test", timeout=5, retries=0, failure_threshold=1, reset_seconds=0)
+
+    async def fail():
+        raise Unavailable()
+
+    with pytest.raises(Unavailable):
+        asyncio.run(policy.call(fail))
+    return policy
+
+
+def test_cancelled_trial_does_not_keep_circuit_open():
+    policy = _open_policy()
+    assert policy.breaker.state == "half_open"
+
+    async def cancel_trial():
+        task = asyncio.ensure_future(policy.call(lambda: asyncio.sleep(60)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+
+    async def ok():
+        return "ok"
+
+    assert asyncio.run(policy.call(ok)) == "ok"
+    assert policy.breaker.state == "closed"
+
+
+def test_open_circuit_rejects_until_reset():
+    policy = ResiliencePolicy("test", timeout=5, retries=0, failure_threshold=1, reset_seconds=60)
+
+    async def fail():
+        raise Unavailable()
+
+    with pytest.raises(Unavailable):
+        asyncio.run(policy.call(fail))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(policy.call(fail))
@@ -0,0 +1,100 @@
+import os
+import pytest
+from app.core.resume_structurer import STRUCTURER_MIN_CONFIDENCE, structure_locally
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "resumes")
+
+
+def _fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_chronological_resume_is_structured_without_the_llm():
+    result, confidence, unfilled = structure_locally(_fixture("chronological.txt"))
+
+    assert confidence >= STRUCTURER_MIN_CONFIDENCE
+    assert unfilled == []
+    assert result["personal_info"] == {
+        "name": "Jane Doe",
+        "email": "jane.doe@example.com",
+        "phone": "+1 555 123 4567",
+        "linkedin": "linkedin.com/in/janedoe",
+        "github": "github.com/janedoe",
+    }
+    assert result["summary"].startswith("Backend engineer")
+    assert [(e["title"], e["company"], e["start_date"], e["end_date"]) for e in result["work_experience"]] == [
+        ("Senior Software Engineer", "Acme Corp", "Jan 2021", "Present"),
+        ("Software Engineer", "Globex", "Jun 2018", "Dec 2020"),
+    ]
+    assert result["work_experience"][0]["description"] == [
+        "Led the migration of the billing platform to Kubernetes on AWS.",
+        "Mentored four engineers.",
+    ]
+    education = result["education"][0]
+    assert (education["degree"], education["institution"]) == ("B.Sc. Computer Science", "State University")
+    assert (education["start_date"], education["end_date"]) == ("2014", "2018")
+    assert {"Python", "Django", "PostgreSQL", "Kubernetes"} <= {
+        skill for skills in result["skills"].values() for skill in skills
+    }
+    assert result["projects"][0]["name"] == "ledgerlite"
+    assert result["projects"][0]["technologies"] == ["Python"]
+
+
+def test_run_together_text_is_split_into_sections_and_entries():
+    result, confidence, unfilled = structure_locally(_fixture("run_together.txt"))
+
+    assert confidence >= STRUCTURER_MIN_CONFIDENCE
+    # No line of its own for the name: only that field goes to the LLM.
+    assert unfilled == ["personal_info"]
+    assert result["personal_info"]["email"] == "john.smith@example.com"
+    entry = result["work_experience"][0]
+    assert (entry["title"], entry["company"], entry["start_date"], entry["end_date"]) == (
+        "Data Analyst", "Initech", "Mar 2022", "Present"
+    )
+    assert entry["description"] == ["Built Tableau dashboards and SQL reports for finance."]
+    education = result["education"][0]
+    assert (education["degree"], education["institution"]) == (
+        "Bachelor of Science in Statistics", "City College"
+    )
+
+
+def test_text_without_resume_sections_goes_to_the_llm():
+    _, confidence, unfilled = structure_locally(_fixture("sparse.txt"))
+
+    assert confidence < STRUCTURER_MIN_CONFIDENCE
+    assert "personal_info" in unfilled
+
+
+def test_pdf_layout_headers_end_sections():
+    pymupdf = pytest.importorskip("pymupdf")
+    lines = [
+        ("Maria Garcia", 20, "hebo"),
+        ("maria@example.com", 10, "helv"),
+        ("Work Experience", 14, "hebo"),
+        ("UX Designer, Initech", 10, "helv"),
+        ("Feb 2020 - Present", 10, "helv"),
+        ("• Ran usability testing for the mobile app in Figma.", 10, "helv"),
+        ("Awards", 14, "hebo"),
+        ("Design Award 2021", 10, "helv"),
+        ("Education", 14, "hebo"),
+        ("Master of Design, Institute of Design", 10, "helv"),
+        ("2018 - 2020", 10, "helv"),
+    ]
+    document = pymupdf.open()
+    page = document.new_page()
+    y = 60
+    for text, size, font in lines:
+        page.insert_text((50, y), text, fontsize=size, fontname=font)
+        y += size + 10
+    pdf_bytes = document.tobytes()
+
+    result, confidence, _ = structure_locally("", pdf_bytes)
+
+    assert confidence >= STRUCTURER_MIN_CONFIDENCE
+    assert result["personal_info"]["name"] == "Maria Garcia"
+    entry = result["work_experience"][0]
+    assert (entry["title"], entry["company"]) == ("UX Designer", "Initech")
+    # The unrecognised "Awards" header closes the work section.
+    assert entry["description"] == ["Ran usability testing for the mobile app in Figma."]
+    assert result["education"][0]["degree"] == "Master of Design"
@@ -0,0 +1,35 @@
+from datetime import date
+from app.core.seniority import _still_studying, estimate_seniority
+
+TODAY = date(2026, 6, 1)
+
+
+def _education(**entry) -> list[dict]:
+    return [{"degree": "B.Sc. Computer Science", "institution": "State University", **entry}]
+
+
+def test_gpa_and_thesis_wording_do_not_mean_still_studying():
+    assert not _still_studying(
+        _education(end_date="2019", gpa="Current GPA 3.8", details=["Presented thesis on compilers"]),
+        TODAY,
+    )
+    assert not _still_studying(_education(gpa="Current GPA 3.8", details=["Pursuing research"]), TODAY)
+
+
+def test_ongoing_or_future_end_dates_mean_still_studying():
+    assert _still_studying(_education(end_date="Present"), TODAY)
+    assert _still_studying(_education(end_date="Expected May 2027"), TODAY)
+    assert _still_studying(_education(end_date="2027"), TODAY)
+    assert _still_studying(_education(details=["Sep 2023 - Present"]), TODAY)
+    assert _still_studying(_education(details=["Expected graduation: May 2027"]), TODAY)
+    assert not _still_studying(_education(details=["Sep 2015 - Jun 2019"]), TODAY)
+
+
+def test_graduate_with_current_gpa_is_not_an_intern():
+    resume = {
+        "education": _education(end_date="2019", gpa="Current GPA 3.8"),
+        "work_experience": [
+            {"title": "Software Engineer", "company": "Acme", "start_date": "Jul 2019", "end_date": "Present"}
+        ],
+    }
+    assert estimate_seniority(resume, today=TODAY)["level"] == "Mid-Level"
@@ -0,0 +1,32 @@
+import numpy as np
+from app.core import vector_index
+from app.core.vector_index import VectorIndex, get_vector_index, reading_vector_index
+
+
+def _write(path, documents):
+    ids = [f"doc-{i}" for i in range(len(documents))]
+    vectors = np.eye(len(documents), 4, dtype=np.float32)
+    VectorIndex.write(str(path), ids, vectors, documents, [{"type": "note"}] * len(documents))
+
+
+def test_swapping_snapshots_closes_the_previous_index(tmp_path, monkeypatch):
+    path = tmp_path / "vector_index"
+    monkeypatch.setattr(vector_index, "_index", None)
+    monkeypatch.setattr(vector_index, "VECTOR_INDEX_RELOAD_SECONDS", 0)
+
+    _write(path, ["first", "second"])
+    with reading_vector_index(str(path)) as old:
+        _write(path, ["third", "fourth", "fifth"])
+        new = get_vector_index(str(path))
+        assert new is not old and new.count == 3
+        # A reader that started on the old snapshot can still finish with it.
+        assert old.record(1)[1] == "second"
+        assert not old._records.closed
+    assert old._records.closed
+    assert old.vectors is None
+    assert not old.acquire()
+
+    with reading_vector_index(str(path)) as index:
+        assert index is new
+        hits = index.search([[0, 0, 1, 0]], 1)[0]
+        assert index.record(hits[0][0])[1] == "fifth"